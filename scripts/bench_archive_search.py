@@ -0,0 +1,185 @@
+"""
+Search latency benchmark for agent/archive_index.py over a synthetic chat
+archive (100k messages by default), against the single FTS5 phrase query
+search_past_conversations ran before hybrid search.
+
+    python scripts/bench_archive_search.py [--messages 100000] [--model]
+
+Without --model, embeddings.encode is replaced by a hashed bag-of-words
+encoder (384 dims, unit length, like MiniLM's output), so the int8 matrix,
+its loading and the scoring are exercised without sentence-transformers;
+real MiniLM adds roughly 10 ms per query encode on CPU. With --model the
+installed model indexes the archive, which takes several minutes at 100k.
+Reported: indexing time, matrix size, cold and incremental matrix loads,
+and p50/p95 latency of each retriever, the fused search() and the
+search_past_conversations tool. The archive's word frequencies are
+Zipf-like, so a query made of its most common words ("w5 w19", in about a
+third of the rows) shows what a stopword-heavy query costs BM25.
+"""
+
+import argparse
+import itertools
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.environ["LITTLEHIVE_HOME"] = tempfile.mkdtemp(prefix="littlehive-bench-")
+
+import numpy as np
+
+from littlehive.agent import archive_index, embeddings
+from littlehive.agent.db import get_connection
+from littlehive.agent.migrations import run_migrations
+from littlehive.tools import memory_tools
+
+DIMS = 384
+VOCAB = 20_000
+PLANTED = [
+    "we decided the team offsite goes to Lisbon in May",
+    "remind me that the dentist moved my appointment to thursday",
+    "the landlord said the rent goes up by fifty euros from april",
+    "my sister's flight lands at 7pm on friday, terminal 2",
+]
+QUERIES = [
+    "what did we decide about the offsite",
+    "Lisbon offsite plans",
+    "when is the dentist appointment",
+    "how much is the rent increase",
+    "what time does my sister land",
+    "w17 w42 w99",
+    "w5 w19",
+    "anything about invoices",
+]
+
+
+def hashed_encode(texts, wait=None):
+    """Bag of words hashed into DIMS buckets, normalised like the model's output."""
+    out = np.zeros((len(texts), DIMS), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for word in text.lower().split():
+            out[i, zlib.crc32(word.encode()) % DIMS] += 1.0
+    out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-9)
+    return out
+
+
+def fill_archive(n, seed):
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(VOCAB)]
+    # Zipf-like word frequencies, so common words match many rows
+    cum_weights = list(itertools.accumulate(1.0 / (i + 1) for i in range(VOCAB)))
+    rows = [
+        (rng.choice(["user", "assistant"]),
+         " ".join(rng.choices(vocab, cum_weights=cum_weights, k=rng.randint(5, 120))),
+         "2026-01-01 10:00:00")
+        for _ in range(n)
+    ]
+    for i, text in enumerate(PLANTED):
+        rows.insert(rng.randrange(len(rows)), ("user", text, f"2026-02-0{i + 1} 10:00:00"))
+    conn = get_connection()
+    try:
+        conn.executemany("INSERT INTO chat_archive (role, content, timestamp) VALUES (?, ?, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def phrase_query(query):
+    """The replaced lookup: the whole query as one FTS5 phrase."""
+    conn = get_connection(readonly=True)
+    try:
+        phrase = '"' + query.replace('"', '""') + '"'
+        return conn.execute(
+            "SELECT rowid FROM chat_archive WHERE chat_archive MATCH ? ORDER BY rank LIMIT 20", (phrase,)
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def latencies(fn, reps):
+    samples = []
+    for _ in range(reps):
+        for query in QUERIES:
+            start = time.perf_counter()
+            fn(query)
+            samples.append(((time.perf_counter() - start) * 1000, query))
+    samples.sort()
+    times = [ms for ms, _ in samples]
+    return statistics.median(times), times[int(len(times) * 0.95)], samples[-1][1]
+
+
+def timed_ms(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--messages", type=int, default=100_000)
+    ap.add_argument("--reps", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--model", action="store_true", help="use the installed sentence-transformers model")
+    args = ap.parse_args()
+    # db.py's slow-statement warnings would interleave with the report
+    logging.disable(logging.WARNING)
+
+    if args.model:
+        if embeddings.encode(["warm up"]) is None:
+            sys.exit("sentence-transformers is not installed or the model failed to load")
+    else:
+        embeddings.encode = hashed_encode
+
+    run_migrations()
+    fill_archive(args.messages, args.seed)
+    start = time.perf_counter()
+    indexed = 0
+    while batch := archive_index.index_pending(limit=5000):
+        indexed += batch
+    print(f"indexed {indexed} messages in {time.perf_counter() - start:.1f} s "
+          f"({'model' if args.model else 'hashed encoder'})")
+
+    cold = timed_ms(archive_index._load)
+    messages, matrix = archive_index._live()
+    print(f"int8 matrix: {len(matrix)} chunks, {matrix.nbytes / 1e6:.1f} MB, cold load {cold:.0f} ms")
+    memory_tools.archive_messages([{"role": "user", "content": "a brand new message about w1 and w2"}])
+    first = timed_ms(archive_index._load)
+    memory_tools.archive_messages([{"role": "user", "content": "another new message about w3"}])
+    print(f"refresh after one new message: {first:.1f} ms (buffer growth), then {timed_ms(archive_index._load):.1f} ms")
+
+    k = archive_index.CANDIDATES
+    runs = [
+        ("phrase query (before)", phrase_query),
+        ("BM25 candidates", lambda q: archive_index._bm25_candidates(q, k)),
+        ("vector candidates", lambda q: archive_index._vector_candidates(q, k)),
+        ("search() fused", archive_index.search),
+        ("search_past_conversations", memory_tools.search_past_conversations),
+    ]
+    print(f"\n{len(QUERIES)} queries x {args.reps}")
+    print(f"{'':28} {'p50 ms':>8} {'p95 ms':>8}  slowest query")
+    for label, fn in runs:
+        p50, p95, slowest = latencies(fn, args.reps)
+        print(f"{label:28} {p50:8.2f} {p95:8.2f}  {slowest!r}")
+
+    print("\ntop hit per query (before | after):")
+    conn = get_connection(readonly=True)
+    try:
+        def content(rowid):
+            return conn.execute("SELECT content FROM chat_archive WHERE rowid = ?", (rowid,)).fetchone()[0][:48]
+
+        for query in QUERIES[:5]:
+            old = phrase_query(query)
+            new = archive_index.search(query, limit=1)
+            print(f"  {query!r}: {content(old[0][0]) if old else '-'} | {content(new[0]) if new else '-'}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
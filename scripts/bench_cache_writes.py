@@ -0,0 +1,204 @@
+"""
+Benchmark for the bulk cache writes in agent/local_cache.py at 100, 1k and
+10k rows, against the row-at-a-time writes they replaced: one INSERT per
+row in a Python loop, after deleting the whole table for events and tasks.
+
+    python scripts/bench_cache_writes.py [--sizes 100 1000 10000]
+
+Both paths go through get_connection(), so only the write pattern differs
+(scripts/bench_db.py covers the connection side). Steady-state re-syncs
+change 1% of the rows, which is what a poll usually sees. The last line
+counts the rows each path rewrites for such a re-sync.
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.environ["LITTLEHIVE_HOME"] = tempfile.mkdtemp(prefix="littlehive-bench-")
+
+from littlehive.agent import local_cache
+from littlehive.agent.db import get_connection
+
+
+def events(n, changed=0.0, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"e{i}",
+            "summary": "Sync" if rng.random() >= changed else f"Moved {rng.random()}",
+            "start": f"2026-03-0{1 + i % 9}T10:00:00Z",
+            "end": f"2026-03-0{1 + i % 9}T11:00:00Z",
+            "description": "d" * 200,
+            "attendees": ["a@example.com", "b@example.com"],
+            "hangout_link": None,
+        }
+        for i in range(n)
+    ]
+
+
+def tasks(n, changed=0.0, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"t{i}",
+            "list_id": "L",
+            "title": "Task" if rng.random() >= changed else f"Task {rng.random()}",
+            "notes": "n" * 100,
+            "status": "needsAction",
+            "due": None,
+            "updated": "2026-03-01T10:00:00Z",
+        }
+        for i in range(n)
+    ]
+
+
+def emails(n, changed=0.0, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"m{i}",
+            "thread_id": f"t{i}",
+            "sender": "Alice <alice@example.com>",
+            "subject": "Hello",
+            "snippet": "x" * 150,
+            "date": "Mon, 2 Mar 2026 09:00:00 +0000",
+            "is_read": rng.random() < changed,
+            "timestamp_ms": 1_700_000_000_000 + i,
+        }
+        for i in range(n)
+    ]
+
+
+def _task_rows(items):
+    return [
+        (t["id"], t.get("list_id"), t.get("title"), t.get("notes"), t.get("status"), t.get("due"), t.get("updated"))
+        for t in items
+    ]
+
+
+def _email_rows(items):
+    return [
+        (e["id"], e.get("thread_id"), e.get("sender"), "", e.get("subject"), e.get("snippet"),
+         e.get("date"), e.get("is_read", False), " ", False, e.get("timestamp_ms"))
+        for e in items
+    ]
+
+
+def row_at_a_time(table, columns, rows, clear, update_columns=()):
+    """
+    The replaced write path: optional full DELETE, then one statement per
+    row; conflicting rows are rewritten whether or not anything changed.
+    """
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+    if update_columns:
+        sql += " ON CONFLICT(id) DO UPDATE SET " + ", ".join(f"{c}=excluded.{c}" for c in update_columns)
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        if clear:
+            cursor.execute(f"DELETE FROM {table}")
+        for row in rows:
+            cursor.execute(sql, row)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def legacy_events(items):
+    row_at_a_time("cached_events", local_cache._EVENT_COLUMNS, [local_cache._event_row(e) for e in items], True)
+
+
+def legacy_tasks(items):
+    row_at_a_time("cached_tasks", local_cache._TASK_COLUMNS, _task_rows(items), True)
+
+
+def legacy_emails(items):
+    row_at_a_time(
+        "cached_emails", local_cache._EMAIL_COLUMNS, _email_rows(items), False,
+        ("is_read", "snippet", "labels", "recipients", "has_attachment"),
+    )
+
+
+def clear(table):
+    conn = get_connection()
+    conn.execute(f"DELETE FROM {table}")
+    conn.commit()
+    conn.close()
+
+
+def best_ms(fn, arg, reps, setup=None):
+    best = float("inf")
+    for _ in range(reps):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def rows_written(write, full, steady, table="cached_events"):
+    """Rows a steady-state re-sync inserts, updates or deletes, counted by triggers."""
+    write(full)
+    conn = get_connection()
+    try:
+        conn.execute("CREATE TABLE IF NOT EXISTS bench_writes (n INTEGER)")
+        conn.execute("DELETE FROM bench_writes")
+        conn.execute("INSERT INTO bench_writes VALUES (0)")
+        for op in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS bench_{table}_{op.lower()} AFTER {op} ON {table} "
+                "BEGIN UPDATE bench_writes SET n = n + 1; END"
+            )
+        conn.commit()
+        write(steady)
+        return conn.execute("SELECT n FROM bench_writes").fetchone()[0]
+    finally:
+        for op in ("insert", "update", "delete"):
+            conn.execute(f"DROP TRIGGER IF EXISTS bench_{table}_{op}")
+        conn.commit()
+        conn.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10_000])
+    args = ap.parse_args()
+    # 10k-row writes trip db.py's slow-statement warning
+    logging.disable(logging.WARNING)
+    local_cache.init_cache_db()
+
+    print(f"{'rows':>6}  {'operation':36} {'before ms':>10} {'after ms':>10}")
+    for n in args.sizes:
+        reps = 5 if n < 10_000 else 3
+        cases = [
+            ("events re-sync, 1% changed", events, legacy_events, local_cache.replace_cached_events, None),
+            ("tasks re-sync, 1% changed", tasks, legacy_tasks, local_cache.replace_cached_tasks, None),
+            ("emails upsert, empty cache", emails, legacy_emails, local_cache.upsert_emails, "cached_emails"),
+            ("emails upsert, 1% changed", emails, legacy_emails, local_cache.upsert_emails, None),
+        ]
+        for label, make, before, after, empty_first in cases:
+            full, steady = make(n), make(n, changed=0.01, seed=1)
+            setup = (lambda table=empty_first: clear(table)) if empty_first else None
+            timings = []
+            for write in (before, after):
+                write(full)
+                timings.append(best_ms(write, steady, reps, setup))
+            print(f"{n:6}  {label:36} {timings[0]:10.2f} {timings[1]:10.2f}")
+
+    written = [
+        rows_written(write, events(1000), events(1000, changed=0.01, seed=1))
+        for write in (legacy_events, local_cache.replace_cached_events)
+    ]
+    print(f"\nrows written by a 1%-changed re-sync of 1000 events: before {written[0]}, after {written[1]}")
+
+
+if __name__ == "__main__":
+    main()
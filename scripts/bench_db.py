@@ -0,0 +1,118 @@
+"""
+Contention benchmark for agent/db.py: writer and reader threads hammer one
+table for a fixed time, first the way every module used to talk to SQLite
+(a fresh sqlite3.connect per query on a rollback-journal file), then
+through get_connection() (pooled per-thread connections, WAL, read-only
+pool for readers).
+
+    python scripts/bench_db.py [--seconds 4] [--writers 4] [--readers 4]
+
+Each run uses its own scratch database, pre-filled with --rows rows.
+Reported per run: committed writes and reads per second, p50/p99 latency
+of each, and how many operations failed with "database is locked".
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.environ["LITTLEHIVE_HOME"] = tempfile.mkdtemp(prefix="littlehive-bench-")
+
+from littlehive.agent import db
+
+WRITE_SQL = "INSERT INTO events (ts, msg) VALUES (datetime('now'), 'hello')"
+READ_SQL = "SELECT count(*), max(id) FROM events WHERE id > (SELECT max(id) - 500 FROM events)"
+
+
+def create(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, ts TEXT, msg TEXT)")
+    conn.executemany("INSERT INTO events (ts, msg) VALUES (datetime('now'), ?)", [("x" * 80,)] * rows)
+    conn.commit()
+    conn.close()
+
+
+def run(get_conn, seconds, writers, readers):
+    latencies = {"w": [], "r": []}
+    errors = [0]
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def worker(kind, readonly, sql):
+        done, failed = [], 0
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            try:
+                conn = get_conn(readonly)
+                try:
+                    conn.execute(sql).fetchall()
+                    conn.commit()
+                finally:
+                    conn.close()
+            except sqlite3.OperationalError:
+                failed += 1
+                continue
+            done.append(time.perf_counter() - start)
+        with lock:
+            latencies[kind].extend(done)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker, args=("w", False, WRITE_SQL)) for _ in range(writers)]
+    threads += [threading.Thread(target=worker, args=("r", True, READ_SQL)) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors[0]
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--seconds", type=float, default=4)
+    ap.add_argument("--writers", type=int, default=4)
+    ap.add_argument("--readers", type=int, default=4)
+    ap.add_argument("--rows", type=int, default=20_000)
+    args = ap.parse_args()
+    # Slow-statement warnings from db.py would interleave with the table
+    logging.disable(logging.WARNING)
+
+    scratch = tempfile.mkdtemp(prefix="littlehive-bench-db-")
+    before = os.path.join(scratch, "before.db")
+    after = os.path.join(scratch, "after.db")
+    create(before, args.rows)
+    create(after, args.rows)
+
+    runs = [
+        ("connect per query, rollback journal",
+         lambda readonly: sqlite3.connect(before, timeout=db.BUSY_TIMEOUT_MS / 1000)),
+        ("get_connection(), WAL",
+         lambda readonly: db.get_connection(readonly=readonly, path=after)),
+    ]
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:g} s, {args.rows} rows\n")
+    print(f"{'':38} {'writes/s':>9} {'reads/s':>9} {'write p50/p99 ms':>18} {'read p50/p99 ms':>18} {'locked':>7}")
+    for label, get_conn in runs:
+        latencies, errors = run(get_conn, args.seconds, args.writers, args.readers)
+        w, r = latencies["w"], latencies["r"]
+        print(
+            f"{label:38} {len(w) / args.seconds:9.0f} {len(r) / args.seconds:9.0f} "
+            f"{percentile(w, .5):8.2f}/{percentile(w, .99):<9.2f} "
+            f"{percentile(r, .5):8.2f}/{percentile(r, .99):<9.2f} {errors:7d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Log-write throughput benchmark for agent/logger_setup.py: the batching
+listener (one transaction per batch of up to BATCH_SIZE records) against
+the per-record writes it replaced (a plain QueueListener, one transaction
+and commit per record).
+
+    python scripts/bench_logging.py [--records 20000] [--flood 200000]
+
+Both paths write through log_store.write_rows() into telemetry.db, so only
+the batching differs. Reported per path: writer-only records/s (the queue
+is filled before the listener starts), end-to-end records/s (a producer
+logs while the listener drains) and, for the batching listener, a DEBUG
+flood showing how many records the backpressure sampling dropped.
+"""
+
+import argparse
+import logging
+import os
+import queue
+import sys
+import tempfile
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.environ["LITTLEHIVE_HOME"] = tempfile.mkdtemp(prefix="littlehive-bench-")
+
+from littlehive.agent import logger_setup
+from littlehive.agent.db import get_connection
+from littlehive.agent.log_store import log_days, write_rows, TABLE_PREFIX
+from littlehive.agent.paths import TELEMETRY_DB_PATH
+
+
+class PerRecordHandler(logging.Handler):
+    """The replaced write path: one transaction and commit per record."""
+
+    def __init__(self, db_path):
+        super().__init__()
+        self.db_path = db_path
+        self._batch = logger_setup.SQLiteHandler(db_path)
+
+    def emit(self, record):
+        try:
+            conn = get_connection(path=self.db_path)
+            try:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                write_rows(cursor, [self._batch._row(record)])
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception:
+            self.handleError(record)
+
+
+def rows_logged():
+    conn = get_connection(path=TELEMETRY_DB_PATH)
+    try:
+        cursor = conn.cursor()
+        return sum(
+            cursor.execute(f"SELECT COUNT(*) FROM {TABLE_PREFIX}{day}").fetchone()[0]
+            for day in log_days(cursor)
+        )
+    finally:
+        conn.close()
+
+
+def make_logger(name, q):
+    log = logging.getLogger(f"bench.{name}")
+    log.handlers[:] = [QueueHandler(q)]
+    log.propagate = False
+    log.setLevel(logging.DEBUG)
+    return log
+
+
+def make_listener(batched, q):
+    handler = (logger_setup.SQLiteHandler if batched else PerRecordHandler)(TELEMETRY_DB_PATH)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    if batched:
+        return logger_setup.BatchingQueueListener(q, handler)
+    return QueueListener(q, handler, respect_handler_level=True)
+
+
+def writer_only(batched, n):
+    q = queue.Queue(-1)
+    log = make_logger(f"drain{batched}", q)
+    for i in range(n):
+        log.info(f"[Brain] turn {i} tool call ok")
+    listener = make_listener(batched, q)
+    before = rows_logged()
+    start = time.perf_counter()
+    listener.start()
+    listener.stop()
+    elapsed = time.perf_counter() - start
+    return (rows_logged() - before) / elapsed
+
+
+def end_to_end(batched, n, level=logging.INFO):
+    q = queue.Queue(-1)
+    log = make_logger(f"e2e{batched}{level}", q)
+    listener = make_listener(batched, q)
+    before = rows_logged()
+    listener.start()
+    start = time.perf_counter()
+    for i in range(n):
+        log.log(level, f"[Brain] turn {i} tool call ok")
+    listener.stop()
+    elapsed = time.perf_counter() - start
+    written = rows_logged() - before
+    return written / elapsed, written, getattr(listener, "dropped", 0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--records", type=int, default=20_000)
+    ap.add_argument("--flood", type=int, default=200_000)
+    args = ap.parse_args()
+    # Only the listeners under test write to telemetry.db; the flood's
+    # "[Logger] Dropped ..." warnings would otherwise interleave with the table
+    logger_setup.logger.listener.stop()
+    logger_setup.logger.setLevel(logging.ERROR)
+
+    print(f"{args.records} INFO records\n")
+    print(f"{'':34} {'writer-only rec/s':>18} {'end-to-end rec/s':>17}")
+    for label, batched in (("per-record commit", False), ("BatchingQueueListener", True)):
+        drain = writer_only(batched, args.records)
+        rate, _, _ = end_to_end(batched, args.records)
+        print(f"{label:34} {drain:18,.0f} {rate:17,.0f}")
+
+    rate, written, dropped = end_to_end(True, args.flood, logging.DEBUG)
+    print(
+        f"\nDEBUG flood of {args.flood} through BatchingQueueListener: {written} written at "
+        f"{rate:,.0f} rec/s, {dropped} sampled out ({dropped / args.flood:.0%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Equivalence and speed benchmark for agent/parser.py against the parser it
+replaced (scripts/legacy_parser.py).
+
+    python scripts/bench_parser.py            # compare on a fresh fuzzed corpus
+    python scripts/bench_parser.py --write    # regenerate tests/data/parser_corpus.jsonl
+
+The corpus is REAL_OUTPUTS (tool calls as the model writes them, sloppy
+ones included) plus fuzzed variants of them: truncated, with a character
+dropped, with a structural character or marker injected, or with trailing
+text. Every output is classified as
+
+    same        both parsers return the same calls
+    recovered   the new parser returns every call the old one did, plus more
+    rejected    a truncated output whose last call was cut inside its
+                arguments; the new parser drops that call (the old one
+                sometimes ran it with what was left)
+    changed     anything else; each of these needs a look
+
+--write stores a sample of the corpus, plus every "changed" output of the
+full run, with the old parser's calls ("old") and, where they differ, the
+current parser's ("expected"); tests/test_parser.py holds the parser to
+that file. The large inputs at the end can take the old parser minutes;
+it gets --limit seconds for each.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), os.path.join(ROOT, "scripts")]
+os.environ["LITTLEHIVE_HOME"] = tempfile.mkdtemp(prefix="littlehive-bench-")
+
+from littlehive.agent import parser
+import legacy_parser
+
+CORPUS_PATH = os.path.join(ROOT, "tests", "data", "parser_corpus.jsonl")
+
+REAL_OUTPUTS = [
+    '[TOOL_CALLS]search_emails[ARGS]{"query": "is:unread", "max_results": 5}',
+    '[TOOL_CALLS]get_events[ARGS]{"time_min": "2026-03-04T00:00:00Z", "time_max": "2026-03-04T23:59:59Z"}</s>',
+    '[TOOL_CALLS][{"name": "set_reminder", "arguments": {"task": "call mom", "reminder_time": "2026-03-05T14:00:00+05:30"}}]',
+    '[TOOL_CALLS][{"name": "get_tasks", "arguments": "{\\"status\\": \\"needsAction\\"}"}, {"name": "list_bills", "arguments": {}}]',
+    "Let me check that.[TOOL_CALLS]get_pending_reminders",
+    '[TOOL_CALLS]list_bills[ARGS]{"status": "pending"}[TOOL_CALLS]get_events[ARGS]{}',
+    '[TOOL_CALLS]search_emails[ARGS]{"query": "from:amazon"}get_events[ARGS]{"time_min": "2026-03-04T00:00:00Z"}',
+    '[TOOL_CALLS]send_email[ARGS]{"to": "a@b.com", "subject": "Hi", "body": "Line1\\nLine \\"2\\" {braces} [ARGS] ok",}',
+    '[TOOL_CALLS]save_core_fact[ARGS]{"fact": "User prefers tea over coffee"',
+    '[TOOL_CALLS]manage_email[ARGS]{"message_id": ["18e1a", "18e1b"], "action": "archive"} Done.',
+    '[TOOL_CALLS]web_search [ARGS]{"query": "weather in Pune tomorrow"}',
+    '[TOOL_CALLS]create_event[ARGS]{"summary": "Sync", "attendees": ["x@y.com",], '
+    '"start_time": "2026-03-05T08:00:00+05:30", "end_time": "2026-03-05T09:00:00+05:30"}',
+    '[TOOL_CALLS]create_task[ARGS]{"title": "Renew passport", "notes": "Form \\u2116 7", "due": "2026-04-01"}',
+    '[TOOL_CALLS]update_task[ARGS]{"task_id": "MTIz", "status": "completed"}</s>',
+    '[TOOL_CALLS]search_past_conversations[ARGS]{"query": "dentist appointment"}',
+    '[TOOL_CALLS]delete_core_fact[ARGS]{"fact_id": 12}',
+    '[TOOL_CALLS]read_full_email[ARGS]{"message_id": "18e2f9c0d1"}\n\nI\'ll read that email now.',
+    '[TOOL_CALLS]add_bill[ARGS]{"name": "Electricity", "amount": 1840.5, "due_date": "2026-03-10", "recurring": true}',
+    '[TOOL_CALLS]get_tasks[ARGS]{}[TOOL_CALLS]get_pending_reminders[ARGS]{}',
+    '[TOOL_CALLS]send_email[ARGS]{"to": "team@example.com", "subject": "Notes", "body": "- item one\\n- item two\\n\\nThanks,\\nA"',
+    '[TOOL_CALLS][{"name": "search_emails", "arguments": {"query": "subject:(invoice OR receipt)", "max_results": 10}},',
+    '[TOOL_CALLS]set_reminder[ARGS]{"task": "pay rent", "reminder_time": "2026-03-31T09:00:00+05:30", "priority": "critical"}',
+]
+
+_INJECT = [",", "}", "]", " ", "\n", '"', "{", "[ARGS]", "[TOOL_CALLS]"]
+_TRAIL = ["</s>", " ok", "}", "\n\nDone."]
+
+
+def fuzz(rng, text):
+    """A mutated copy of `text`, and whether it is a truncation of it."""
+    r = rng.random()
+    if r < 0.4:
+        return text[: rng.randint(0, len(text))], True
+    if r < 0.6:
+        i = rng.randint(0, len(text))
+        return text[:i] + rng.choice(_INJECT) + text[i:], False
+    if r < 0.8:
+        i = rng.randrange(len(text))
+        return text[:i] + text[i + 1:], False
+    return text + rng.choice(_TRAIL), False
+
+
+def build_corpus(fuzzed, seed):
+    rng = random.Random(seed)
+    corpus = [("real", text, False) for text in REAL_OUTPUTS]
+    seen = set(REAL_OUTPUTS)
+    while len(corpus) < len(REAL_OUTPUTS) + fuzzed:
+        text, truncated = fuzz(rng, rng.choice(REAL_OUTPUTS))
+        if text not in seen:
+            seen.add(text)
+            corpus.append(("fuzzed", text, truncated))
+    return corpus
+
+
+def large_outputs():
+    body = "x" * 200_000
+    return {
+        "200 KB string body": '[TOOL_CALLS]send_email[ARGS]{"to": "a@b.com", "body": "' + body + '"}',
+        "200 KB body, truncated": '[TOOL_CALLS]send_email[ARGS]{"to": "a@b.com", "body": "' + body,
+        "20k-item array, truncated": '[TOOL_CALLS]send_email[ARGS]{"items": ['
+        + ", ".join(f'{{"k": {i}, "v": "{i}"}}' for i in range(20_000)),
+        "3000 chained calls": "[TOOL_CALLS]" + "".join(f'f{i}[ARGS]{{"i": {i}}}' for i in range(3000)),
+    }
+
+
+def _started_calls(text):
+    # Calls whose arguments had begun: one per [ARGS] marker or "arguments" key
+    return text.count(parser.ARGS_MARKER) + len(re.findall(r'"arguments"\s*:', text))
+
+
+def classify(old, new, text, truncated):
+    if truncated and len(new) < _started_calls(text):
+        return "rejected"
+    if old == new:
+        return "same"
+    if all(call in new for call in old):
+        return "recovered"
+    return "changed"
+
+
+def timed(fn, inputs, min_seconds=0.5):
+    """Best per-pass time over repeated passes of `inputs`."""
+    best = float("inf")
+    spent = 0.0
+    while True:
+        start = time.perf_counter()
+        for text in inputs:
+            fn(text)
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        if spent >= min_seconds:
+            return best
+
+
+def _time_legacy(text, conn):
+    logging.disable(logging.WARNING)
+    conn.send(timed(legacy_parser.parse_mistral_tool_calls, [text], min_seconds=0))
+
+
+def timed_legacy(text, limit):
+    """timed() for the old parser in a child process; None if it needs over `limit` seconds."""
+    parent, child = multiprocessing.Pipe(duplex=False)
+    proc = multiprocessing.Process(target=_time_legacy, args=(text, child), daemon=True)
+    proc.start()
+    result = parent.recv() if parent.poll(limit) else None
+    proc.terminate()
+    proc.join()
+    return result
+
+
+def write_corpus(corpus, sample):
+    records = []
+    for i, (kind, text, truncated) in enumerate(corpus):
+        old = legacy_parser.parse_mistral_tool_calls(text)
+        new = parser.parse_mistral_tool_calls(text)
+        verdict = classify(old, new, text, truncated)
+        if i >= sample and verdict != "changed":
+            continue
+        record = {"kind": kind, "text": text, "old": old}
+        if verdict != "same":
+            record["expected"] = new
+            record["change"] = verdict
+        records.append(record)
+    os.makedirs(os.path.dirname(CORPUS_PATH), exist_ok=True)
+    with open(CORPUS_PATH, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    print(f"Wrote {len(records)} outputs to {os.path.relpath(CORPUS_PATH, ROOT)}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--fuzzed", type=int, default=20_000, help="fuzzed outputs to generate")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--write", action="store_true", help="regenerate the test corpus")
+    ap.add_argument("--show", type=int, default=10, help="'changed' outputs to print")
+    ap.add_argument("--limit", type=float, default=60, help="seconds the old parser gets per large input")
+    args = ap.parse_args()
+    # Both parsers log every argument blob they give up on
+    logging.disable(logging.WARNING)
+
+    if args.write:
+        write_corpus(build_corpus(args.fuzzed, args.seed), sample=len(REAL_OUTPUTS) + 600)
+        return
+
+    corpus = build_corpus(args.fuzzed, args.seed)
+    counts = {"same": 0, "recovered": 0, "rejected": 0, "changed": 0}
+    changed = []
+    for _, text, truncated in corpus:
+        old = legacy_parser.parse_mistral_tool_calls(text)
+        new = parser.parse_mistral_tool_calls(text)
+        verdict = classify(old, new, text, truncated)
+        counts[verdict] += 1
+        if verdict == "changed":
+            changed.append((text, old, new))
+    print(f"{len(corpus)} outputs: " + ", ".join(f"{n} {k}" for k, n in counts.items()))
+    for text, old, new in changed[: args.show]:
+        print(f"  {text!r}\n    old: {old}\n    new: {new}")
+
+    texts = [text for _, text, _ in corpus]
+    old_t = timed(legacy_parser.parse_mistral_tool_calls, texts)
+    new_t = timed(parser.parse_mistral_tool_calls, texts)
+    print(f"\n{'corpus':<28} old {old_t * 1e3:8.1f} ms   new {new_t * 1e3:8.1f} ms")
+    for label, text in large_outputs().items():
+        old_t = timed_legacy(text, args.limit)
+        new_t = timed(parser.parse_mistral_tool_calls, [text])
+        old_text = f"{old_t * 1e3:8.1f} ms" if old_t is not None else f"> {args.limit:g} s".rjust(11)
+        print(f"{label:<28} old {old_text}   new {new_t * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
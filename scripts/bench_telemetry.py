@@ -0,0 +1,120 @@
+"""
+Contention benchmark for the telemetry split (migration 5): logging threads
+write log batches while a brain thread commits small main-database writes,
+first with the log tables in the main database file, as before, then in
+the attached telemetry.db.
+
+    python scripts/bench_telemetry.py [--seconds 4] [--loggers 4] [--batch 20]
+
+Log batches go through logger_setup.SQLiteHandler.emit_batch(), the
+listener's write path, so only the file they land in differs. The brain's
+write is one INSERT and commit on a connection from get_connection(), which
+attaches telemetry.db like the app's. It opens a deferred transaction, as
+the app's writes do: BEGIN IMMEDIATE would take the write lock of every
+attached file, telemetry.db included. Reported per run: brain write
+p50/p99 latency and writes/s, and log rows/s.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.environ["LITTLEHIVE_HOME"] = tempfile.mkdtemp(prefix="littlehive-bench-")
+
+from littlehive.agent import log_store, logger_setup
+from littlehive.agent.db import get_connection
+from littlehive.agent.paths import DB_PATH, TELEMETRY_DB_PATH
+
+BRAIN_SQL = "INSERT INTO brain_writes (ts, content) VALUES (datetime('now'), ?)"
+
+
+def log_records(n):
+    return [
+        logging.LogRecord("littlehive", logging.INFO, __file__, 0, f"[Brain] turn {i} tool call ok", None, None)
+        for i in range(n)
+    ]
+
+
+def run(log_path, seconds, loggers, batch):
+    # Day tables are cached per process; the next run writes to another file
+    log_store._ready_days.clear()
+    handler = logger_setup.SQLiteHandler(log_path)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    latencies, logged = [], [0]
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def log_worker():
+        records = log_records(batch)
+        written = 0
+        while time.perf_counter() < stop:
+            handler.emit_batch(records)
+            written += batch
+        with lock:
+            logged[0] += written
+
+    def brain():
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            conn = get_connection()
+            try:
+                conn.execute(BRAIN_SQL, ("x" * 200,))
+                conn.commit()
+            finally:
+                conn.close()
+            latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=log_worker) for _ in range(loggers)]
+    threads.append(threading.Thread(target=brain))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, logged[0]
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--seconds", type=float, default=4)
+    ap.add_argument("--loggers", type=int, default=4)
+    ap.add_argument("--batch", type=int, default=20, help="log records per transaction")
+    args = ap.parse_args()
+    # Only the handlers under test write logs; the app's listener and the
+    # slow-statement warnings from db.py would add writes of their own
+    logger_setup.logger.listener.stop()
+    logging.disable(logging.WARNING)
+
+    conn = get_connection()
+    conn.execute("CREATE TABLE brain_writes (id INTEGER PRIMARY KEY, ts TEXT, content TEXT)")
+    conn.commit()
+    conn.close()
+
+    runs = [
+        ("logs in the main database", DB_PATH),
+        ("logs in attached telemetry.db", TELEMETRY_DB_PATH),
+    ]
+    print(f"{args.loggers} logging threads ({args.batch} records per commit), 1 brain thread, {args.seconds:g} s\n")
+    print(f"{'':32} {'brain p50/p99 ms':>18} {'brain writes/s':>15} {'log rows/s':>11}")
+    for label, log_path in runs:
+        latencies, logged = run(log_path, args.seconds, args.loggers, args.batch)
+        print(
+            f"{label:32} {percentile(latencies, .5):8.2f}/{percentile(latencies, .99):<9.2f} "
+            f"{len(latencies) / args.seconds:15,.0f} {logged / args.seconds:11,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
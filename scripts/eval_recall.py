@@ -0,0 +1,177 @@
+"""
+Recall-quality evaluation for memory_tools.recall_core_facts: 30 personal
+facts, 20 requests that each need one of them, buried among 0, 200 and
+2000 distractor facts.
+
+    python scripts/eval_recall.py [--distractors 0 200 2000] [--thresholds 0.2 0.3] [--model]
+
+A request is a hit when its fact reaches the prompt, pinned in the system
+prompt or recalled next to the message. Scoring paths: the keyword
+fallback used while no embedding model is loaded, a hashed bag-of-words
+encoder standing in for MiniLM (lexical, so it shows the vector pipeline
+working rather than MiniLM's quality) and, with --model, the installed
+sentence-transformers model. Also reported: fact tokens per turn now
+against injecting every fact into the system prompt, as before.
+"""
+
+import argparse
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import zlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.environ["LITTLEHIVE_HOME"] = tempfile.mkdtemp(prefix="littlehive-bench-")
+
+import numpy as np
+
+from littlehive.agent import embeddings
+from littlehive.agent.db import get_connection
+from littlehive.tools import memory_tools
+
+FACTS = [
+    "User's name is Sam Rivera", "User lives in Austin, Texas", "User works as a product manager at Acme",
+    "User's wife is named Priya", "User's daughter Maya was born on March 3, 2019", "User is allergic to peanuts",
+    "User prefers window seats on flights", "User's dentist is Dr. Okafor", "User drives a blue Subaru Outback",
+    "User's manager is Linda Chen", "User plays tennis on Saturday mornings", "User's mother lives in Chicago",
+    "User prefers meetings after 10am", "User's gym membership renews in January", "User is vegetarian",
+    "User's favorite coffee is an oat milk latte", "User's son Leo plays soccer on Wednesdays",
+    "User's passport expires in August 2027", "User banks with Chase", "User's landlord is Mark Davis",
+    "User's anniversary is June 14", "User is learning Spanish", "User's dog is a beagle named Biscuit",
+    "User's car insurance is with Geico", "User's best friend is Tom Becker",
+    "User wants reminders 30 minutes before meetings", "User's favorite restaurant is Uchi",
+    "User's brother Raj lives in Seattle", "User takes the 8:15 train to work",
+    "User's electricity provider is Austin Energy",
+]
+# (request, the fact it needs)
+LABELED = [
+    ("book a flight to Denver for next week", "User prefers window seats on flights"),
+    ("what should I cook for dinner tonight", "User is vegetarian"),
+    ("remind me to call the dentist", "User's dentist is Dr. Okafor"),
+    ("schedule a meeting with my manager", "User's manager is Linda Chen"),
+    ("when is Maya's birthday", "User's daughter Maya was born on March 3, 2019"),
+    ("plan something for our anniversary", "User's anniversary is June 14"),
+    ("is my passport still valid for the trip", "User's passport expires in August 2027"),
+    ("find a dog walker for Biscuit", "User's dog is a beagle named Biscuit"),
+    ("what time is Leo's soccer practice", "User's son Leo plays soccer on Wednesdays"),
+    ("order coffee for the team", "User's favorite coffee is an oat milk latte"),
+    ("email the landlord about the leak", "User's landlord is Mark Davis"),
+    ("get a quote to renew my car insurance", "User's car insurance is with Geico"),
+    ("book a table at my favorite restaurant", "User's favorite restaurant is Uchi"),
+    ("when is my brother visiting from Seattle", "User's brother Raj lives in Seattle"),
+    ("pay the electricity bill", "User's electricity provider is Austin Energy"),
+    ("find a Spanish tutor", "User is learning Spanish"),
+    ("check if my gym membership renews soon", "User's gym membership renews in January"),
+    ("text Tom about the game", "User's best friend is Tom Becker"),
+    ("set up a call with mom in Chicago", "User's mother lives in Chicago"),
+    ("which train do I take to work", "User takes the 8:15 train to work"),
+]
+WORK_WORDS = [
+    "project", "deadline", "report", "budget", "vendor", "quarter", "launch", "review", "client", "contract",
+    "invoice", "hiring", "roadmap", "offsite", "survey", "partner", "migration", "audit", "workshop", "retro",
+]
+STOPWORDS = {
+    "the", "a", "an", "is", "my", "me", "of", "to", "in", "on", "at", "for", "and", "what", "when",
+    "does", "do", "i", "about", "with", "should", "her", "his", "their", "user", "s",
+}
+
+
+def hashed_encode(texts, wait=None):
+    """Stemmed, stopword-free bag of words hashed into 384 dims, unit length."""
+    out = np.zeros((len(texts), 384), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for word in re.findall(r"\w+", text.lower()):
+            if word not in STOPWORDS:
+                out[i, zlib.crc32(word[:5].encode()) % 384] += 1.0
+    out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-9)
+    return out
+
+
+def no_model(texts, wait=None):
+    return None
+
+
+def load_facts(distractors, seed):
+    """
+    Onboarding facts first (they are the oldest, so pinned), then half the
+    distractors, the remaining facts, and the other half.
+    """
+    rng = random.Random(seed)
+    filler = [
+        f"User's {rng.choice(WORK_WORDS)} note {i}: {' '.join(rng.choices(WORK_WORDS, k=6))}"
+        for i in range(distractors)
+    ]
+    half = distractors // 2
+    ordered = FACTS[:3] + filler[:half] + FACTS[3:] + filler[half:]
+    conn = get_connection()
+    try:
+        conn.execute("DELETE FROM core_memory")
+        conn.executemany("INSERT INTO core_memory (fact_text) VALUES (?)", [(fact,) for fact in ordered])
+        conn.commit()
+    finally:
+        conn.close()
+    return ordered
+
+
+def evaluate():
+    pinned, _ = memory_tools.get_pinned_core_facts()
+    hits, turn_tokens, misses = 0, [], []
+    for request, wanted in LABELED:
+        recalled = [f["fact"] for f in memory_tools.recall_core_facts(request)]
+        if wanted in pinned or wanted in recalled:
+            hits += 1
+        else:
+            misses.append(request)
+        turn_tokens.append(sum(memory_tools._approx_tokens(fact) for fact in recalled))
+    pinned_tokens = sum(memory_tools._approx_tokens(fact) for fact in pinned)
+    return hits, pinned_tokens, turn_tokens, misses
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--distractors", type=int, nargs="+", default=[0, 200, 2000])
+    ap.add_argument("--thresholds", type=float, nargs="+", default=[0.2, 0.3])
+    ap.add_argument("--seed", type=int, default=3)
+    ap.add_argument("--model", action="store_true", help="also score with the installed sentence-transformers model")
+    ap.add_argument("--misses", action="store_true", help="list the requests each run missed")
+    args = ap.parse_args()
+    # Model-loading warnings would interleave with the table
+    logging.disable(logging.WARNING)
+    # Imported late: config sets up the console log handler
+    from littlehive.agent.config import get_config
+
+    paths = [("keyword fallback", no_model, [None]), ("hashed encoder", hashed_encode, args.thresholds)]
+    if args.model:
+        if embeddings.encode(["warm up"]) is None:
+            sys.exit("sentence-transformers is not installed or the model failed to load")
+        paths.append(("model", embeddings.encode, args.thresholds))
+
+    config = get_config()
+    print(f"{len(LABELED)} labeled requests\n")
+    print(f"{'path':18} {'min sim':>7} {'facts':>6} {'hits':>6}  {'all facts tok':>13} "
+          f"{'pinned tok':>10} {'turn tok avg/max':>16}")
+    for label, encode, thresholds in paths:
+        memory_tools.encode = encode
+        for distractors in args.distractors:
+            ordered = load_facts(distractors, args.seed)
+            all_tokens = sum(memory_tools._approx_tokens(fact) for fact in ordered)
+            for threshold in thresholds:
+                if threshold is not None:
+                    config["core_facts_min_similarity"] = threshold
+                hits, pinned_tokens, turn_tokens, misses = evaluate()
+                shown = "-" if threshold is None else f"{threshold:g}"
+                print(
+                    f"{label:18} {shown:>7} {len(ordered):6} {hits:3}/{len(LABELED):<2}  {all_tokens:13,} "
+                    f"{pinned_tokens:10} {sum(turn_tokens) / len(turn_tokens):9.0f}/{max(turn_tokens):<6}"
+                )
+                if args.misses:
+                    for request in misses:
+                        print(f"    missed: {request}")
+
+
+if __name__ == "__main__":
+    main()
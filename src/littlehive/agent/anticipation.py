@@ -11,7 +11,7 @@ import logging
 from datetime import datetime, timedelta
 from collections import defaultdict
 
-from littlehive.agent.paths import DB_PATH
+from littlehive.agent.db import get_connection
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +22,7 @@ TOOL_CATEGORY_MAP = {
     "reply_to_email": "email",
     "manage_email": "email",
     "get_events": "calendar",
+    "find_free_slots": "calendar",
     "create_event": "calendar",
     "update_event": "calendar",
     "delete_event": "calendar",
@@ -89,7 +90,7 @@ ENTITY_EXTRACT_KEYS = {
 
 
 def _get_db():
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection()
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -0,0 +1,224 @@
+"""
+Hybrid Chat Archive Search
+Finds archived messages by meaning as well as by wording. Two retrievers
+each propose candidates, and reciprocal-rank fusion merges their rankings:
+
+    BM25        chat_archive's own FTS5 index, any of the query words
+    vectors     cosine similarity against sentence embeddings of each
+                message, split into chunks of up to CHUNK_CHARS
+
+The chunk vectors are stored in chat_archive_vectors as int8 (unit vectors
+scaled by 127, 384 bytes each for MiniLM). Search runs on an in-memory copy
+of that matrix which only ever reads the rows added since its last load.
+
+    archive_hash()     dedup key of a message (chat_archive_hashes)
+    index_pending()    embeds archived messages that have no vectors yet
+    search()           fused ranking of chat_archive rowids
+
+Indexing runs after archive_messages() (on its background thread) and
+catches up on older messages INDEX_BATCH at a time. Without an embedding
+model, or while it is still loading, search() is BM25 alone.
+"""
+
+import re
+import hashlib
+import threading
+import logging
+
+from littlehive.agent.db import get_connection
+from littlehive.agent import embeddings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_CHARS = 1000
+# Long pastes beyond this many chunks are only searchable through BM25
+MAX_CHUNKS = 8
+INDEX_BATCH = 256
+CANDIDATES = 50
+# Standard RRF damping; keeps the top few ranks of either list from dominating
+RRF_K = 60
+INT8_SCALE = 127
+# Rows dequantized at a time while scoring, bounding the float32 scratch space
+SCORE_BLOCK_ROWS = 8192
+
+_index_lock = threading.Lock()
+_cache_lock = threading.Lock()
+# In-memory copy of chat_archive_vectors: the first `size` rows of the
+# buffers are live; capacity doubles so appends don't copy the matrix
+_cache = {"messages": None, "matrix": None, "size": 0, "last_id": 0}
+
+
+def archive_hash(role: str, content: str) -> bytes:
+    return hashlib.sha1(f"{role}\0{content}".encode("utf-8", "surrogatepass")).digest()
+
+
+def chunks(text: str) -> list:
+    """Splits on whitespace into pieces of at most CHUNK_CHARS (a longer word is cut)."""
+    pieces, current = [], ""
+    for word in text.split():
+        while len(word) > CHUNK_CHARS:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(word[:CHUNK_CHARS])
+            word = word[CHUNK_CHARS:]
+        if current and len(current) + 1 + len(word) > CHUNK_CHARS:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces[:MAX_CHUNKS]
+
+
+def quantize(vectors):
+    import numpy as np
+
+    return np.clip(np.rint(vectors * INT8_SCALE), -INT8_SCALE, INT8_SCALE).astype(np.int8)
+
+
+def index_pending(limit: int = INDEX_BATCH) -> int:
+    """
+    Embeds up to `limit` archived messages past the newest one with vectors,
+    oldest first. Encoding happens outside any transaction. Returns the
+    number of messages indexed.
+    """
+    if not embeddings.available():
+        return 0
+    with _index_lock:
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT IFNULL(MAX(message_id), 0) FROM chat_archive_vectors")
+            after = cursor.fetchone()[0]
+            cursor.execute(
+                "SELECT rowid, content FROM chat_archive WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (after, limit),
+            )
+            messages = cursor.fetchall()
+            if not messages:
+                return 0
+
+            keys, texts = [], []
+            for rowid, content in messages:
+                for n, piece in enumerate(chunks(content or "")):
+                    keys.append((rowid, n))
+                    texts.append(piece)
+            if texts:
+                vectors = embeddings.encode(texts)
+                if vectors is None:
+                    return 0
+                vectors = quantize(vectors)
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO chat_archive_vectors (message_id, chunk, embedding) VALUES (?, ?, ?)",
+                    [(rowid, n, vector.tobytes()) for (rowid, n), vector in zip(keys, vectors)],
+                )
+            conn.commit()
+        finally:
+            conn.close()
+    return len(messages)
+
+
+def _load():
+    """Brings the in-memory matrix up to date with chat_archive_vectors."""
+    import numpy as np
+
+    with _cache_lock:
+        conn = get_connection(readonly=True)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT IFNULL(MAX(id), 0) FROM chat_archive_vectors")
+            newest = cursor.fetchone()[0]
+            if newest < _cache["last_id"]:
+                # Table was rebuilt underneath us
+                _cache.update(messages=None, matrix=None, size=0, last_id=0)
+            if newest == _cache["last_id"]:
+                return _live()
+            cursor.execute(
+                "SELECT id, message_id, embedding FROM chat_archive_vectors "
+                "WHERE id > ? ORDER BY id",
+                (_cache["last_id"],),
+            )
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+        if rows:
+            messages = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+            matrix = np.frombuffer(b"".join(row[2] for row in rows), dtype=np.int8).reshape(len(rows), -1)
+            size, needed = _cache["size"], _cache["size"] + len(rows)
+            if _cache["matrix"] is None or needed > len(_cache["matrix"]):
+                capacity = max(needed, 2 * size)
+                grown_messages = np.empty(capacity, dtype=np.int64)
+                grown_matrix = np.empty((capacity, matrix.shape[1]), dtype=np.int8)
+                if size:
+                    grown_messages[:size] = _cache["messages"][:size]
+                    grown_matrix[:size] = _cache["matrix"][:size]
+                _cache.update(messages=grown_messages, matrix=grown_matrix)
+            _cache["messages"][size:needed] = messages
+            _cache["matrix"][size:needed] = matrix
+            _cache["size"] = needed
+        _cache["last_id"] = newest
+        return _live()
+
+
+def _live():
+    size = _cache["size"]
+    if not size:
+        return None, None
+    return _cache["messages"][:size], _cache["matrix"][:size]
+
+
+def _vector_candidates(query: str, k: int) -> list:
+    # Still loading: BM25 alone rather than a stall
+    encoded = embeddings.encode([query], wait=0)
+    if encoded is None:
+        return []
+    import numpy as np
+
+    messages, matrix = _load()
+    if matrix is None:
+        return []
+    q = encoded[0]
+    scores = np.empty(len(matrix), dtype=np.float32)
+    for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+        block = matrix[start:start + SCORE_BLOCK_ROWS]
+        scores[start:start + len(block)] = block.astype(np.float32) @ q
+    # Enough chunks that k distinct messages survive collapsing
+    top = min(len(scores), k * MAX_CHUNKS)
+    best = np.argpartition(-scores, top - 1)[:top]
+    ranked = []
+    for i in best[np.argsort(-scores[best])]:
+        message_id = int(messages[i])
+        if message_id not in ranked:
+            ranked.append(message_id)
+            if len(ranked) == k:
+                break
+    return ranked
+
+
+def _bm25_candidates(query: str, k: int) -> list:
+    words = re.findall(r"\w+", query)
+    if not words:
+        return []
+    # Any word may match; bm25 ranks rows with more (and rarer) words first
+    match = "content : (" + " OR ".join('"' + word + '"' for word in words) + ")"
+    conn = get_connection(readonly=True)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT rowid FROM chat_archive WHERE chat_archive MATCH ? ORDER BY rank LIMIT ?",
+            (match, k),
+        )
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def search(query: str, limit: int = 20) -> list:
+    """chat_archive rowids best matching `query`, best first."""
+    scores = {}
+    for ranking in (_bm25_candidates(query, CANDIDATES), _vector_candidates(query, CANDIDATES)):
+        for rank, rowid in enumerate(ranking):
+            scores[rowid] = scores.get(rowid, 0.0) + 1.0 / (RRF_K + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)[:limit]
@@ -17,6 +17,9 @@ DEFAULT_CONFIG = {
     "model_path": "mlx-community/mistralai_Ministral-3-14B-Instruct-2512-MLX-MXFP4",
     "dnd_start": 23,
     "dnd_end": 7,
+    "work_hours_start": 9,
+    "work_hours_end": 18,
+    "work_days": [0, 1, 2, 3, 4],
     "shell_enabled": False,
     "shell_workspace": "~/littlehive-workspace",
     "shell_allowed_commands": [
@@ -50,6 +53,24 @@ DEFAULT_CONFIG = {
     "self_healing_enabled": True,
     "self_healing_max_retries": 2,
     "self_healing_circuit_breaker_threshold": 5,
+    "constrained_tool_calls": False,
+    "calendar_sync_days_back": 30,
+    "calendar_sync_days_ahead": 60,
+    "calendar_full_sync_hours": 24,
+    "email_cache_retention_days": 90,
+    "email_cache_max_mb": 64,
+    "email_body_cache_mb": 32,
+    "db_maintenance_seconds": 20,
+    "db_vacuum_convert_max_mb": 64,
+    "log_retention_days": 7,
+    "telemetry_retention_days": 90,
+    "tracing_enabled": True,
+    "trace_file_mb": 10,
+    "trace_job_min_ms": 100,
+    "core_facts_pinned_tokens": 300,
+    "core_facts_turn_tokens": 200,
+    "core_facts_top_k": 6,
+    "core_facts_min_similarity": 0.2,
 }
 
 _cached_config = None
@@ -0,0 +1,266 @@
+"""
+SQLite Connection Provider
+Hands out pooled connections to the shared database, configured once with
+WAL journaling and tuned pragmas so the brain, scheduler, log listener and
+dashboard threads stop serializing on the rollback journal.
+
+Usage mirrors a plain sqlite3 connection:
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(...)
+    conn.commit()
+    conn.close()   # returns the connection to the pool
+
+Read-write connections are cached per thread (a connection never crosses
+threads). Read-only connections, used by the dashboard whose request threads
+are short-lived, come from a small shared pool instead. Every statement is
+timed; aggregates are available from get_query_stats(), and statements run
+inside a trace are recorded as spans of it (see tracing.py).
+
+Connections to the main database also attach telemetry.db (as schema
+"telemetry"), which holds the logs and action history; see migration 5.
+"""
+
+import sqlite3
+import threading
+import time
+import logging
+
+from littlehive.agent import tracing
+from littlehive.agent.paths import DB_PATH, TELEMETRY_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+BUSY_TIMEOUT_MS = 5000
+MMAP_SIZE = 256 * 1024 * 1024
+SLOW_QUERY_MS = 250
+TELEMETRY_SCHEMA = "telemetry"
+READONLY_POOL_SIZE = 4
+# Idle connections kept per thread; more than one only when calls nest
+THREAD_POOL_SIZE = 2
+
+_local = threading.local()
+_readonly_pool = {}
+_pool_lock = threading.Lock()
+_wal_ready = set()
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+# ---------------------------------------------------------------------------
+# Query timing
+# ---------------------------------------------------------------------------
+
+def _record(sql: str, elapsed: float):
+    key = " ".join(sql.split())[:120]
+    with _stats_lock:
+        entry = _stats.get(key)
+        if entry is None:
+            entry = _stats[key] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += elapsed
+        if elapsed > entry[2]:
+            entry[2] = elapsed
+    # Statements run inside a turn or job show up in its trace
+    tracing.record("sqlite", elapsed, {"db.statement": key})
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        logger.warning(f"[DB] Slow query ({elapsed * 1000:.0f} ms): {key}")
+
+
+def get_query_stats(limit: int = 20) -> list:
+    """Statements ranked by total time spent, with call counts and max latency."""
+    with _stats_lock:
+        rows = [
+            {
+                "sql": sql,
+                "calls": calls,
+                "total_ms": round(total * 1000, 2),
+                "avg_ms": round(total * 1000 / calls, 3),
+                "max_ms": round(worst * 1000, 2),
+            }
+            for sql, (calls, total, worst) in _stats.items()
+        ]
+    rows.sort(key=lambda r: r["total_ms"], reverse=True)
+    return rows[:limit]
+
+
+def reset_query_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class _TimedCursor:
+    """sqlite3.Cursor wrapper that times execute calls."""
+
+    __slots__ = ("_cursor",)
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            self._cursor.execute(sql, parameters)
+        finally:
+            _record(sql, time.perf_counter() - start)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, seq_of_parameters)
+        finally:
+            _record(sql, time.perf_counter() - start)
+        return self
+
+    def executescript(self, script):
+        start = time.perf_counter()
+        try:
+            self._cursor.executescript(script)
+        finally:
+            _record(script, time.perf_counter() - start)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+# ---------------------------------------------------------------------------
+# Pooled connections
+# ---------------------------------------------------------------------------
+
+class PooledConnection:
+    """
+    Proxy around a pooled sqlite3.Connection. close() hands the connection
+    back: uncommitted work is rolled back, open cursors are closed and the
+    row factory is reset, exactly as a real close would leave things for the
+    next caller.
+    """
+
+    __slots__ = ("_conn", "_pool", "_shared", "_cursors")
+
+    def __init__(self, conn, pool, shared):
+        object.__setattr__(self, "_conn", conn)
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_shared", shared)
+        object.__setattr__(self, "_cursors", [])
+
+    def cursor(self):
+        cursor = self._conn.cursor()
+        self._cursors.append(cursor)
+        return _TimedCursor(cursor)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
+
+    def close(self):
+        conn = self._conn
+        if conn is None:
+            return
+        object.__setattr__(self, "_conn", None)
+        try:
+            for cursor in self._cursors:
+                cursor.close()
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+        except sqlite3.Error:
+            conn.close()
+            return
+        if self._shared:
+            with _pool_lock:
+                if len(self._pool) < READONLY_POOL_SIZE:
+                    self._pool.append(conn)
+                    return
+        elif len(self._pool) < THREAD_POOL_SIZE:
+            self._pool.append(conn)
+            return
+        conn.close()
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+
+def _prepare(conn: sqlite3.Connection, key: str, schema: str = "main"):
+    """Journal settings for one database file of a read-write connection."""
+    if key not in _wal_ready:
+        # Only takes effect on a new, empty file, so it must precede the
+        # WAL switch (which writes the header). Older files are converted
+        # by maintenance.enable_incremental_vacuum().
+        conn.execute(f"PRAGMA {schema}.auto_vacuum=INCREMENTAL")
+        # Persistent per database file; later connections inherit it
+        conn.execute(f"PRAGMA {schema}.journal_mode=WAL")
+        _wal_ready.add(key)
+    conn.execute(f"PRAGMA {schema}.synchronous=NORMAL")
+
+
+def _open(path: str, readonly: bool) -> sqlite3.Connection:
+    if readonly:
+        conn = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+        )
+    else:
+        conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000)
+        _prepare(conn, path)
+    if path == DB_PATH:
+        # Telemetry tables live in their own file so that log and action
+        # writes take its write lock, not the main database's. Unqualified
+        # names resolve main first, then telemetry, so queries need no changes.
+        try:
+            if readonly:
+                conn.execute(
+                    f"ATTACH DATABASE ? AS {TELEMETRY_SCHEMA}",
+                    (f"file:{TELEMETRY_DB_PATH}?mode=ro",),
+                )
+            else:
+                conn.execute(f"ATTACH DATABASE ? AS {TELEMETRY_SCHEMA}", (TELEMETRY_DB_PATH,))
+                _prepare(conn, TELEMETRY_DB_PATH, TELEMETRY_SCHEMA)
+        except sqlite3.OperationalError as e:
+            # Read-only attach before the file has been created
+            logger.warning(f"[DB] Telemetry database not attached: {e}")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    return conn
+
+
+def get_connection(readonly: bool = False, path: str = None) -> PooledConnection:
+    """
+    Returns a pooled connection to `path` (the main database by default).
+    Callers use it like a plain connection and must close() it when done.
+    """
+    path = path or DB_PATH
+    if readonly:
+        with _pool_lock:
+            pool = _readonly_pool.setdefault(path, [])
+            conn = pool.pop() if pool else None
+    else:
+        pools = getattr(_local, "pools", None)
+        if pools is None:
+            pools = _local.pools = {}
+        pool = pools.setdefault(path, [])
+        conn = pool.pop() if pool else None
+    if conn is None:
+        conn = _open(path, readonly)
+    return PooledConnection(conn, pool, readonly)
@@ -10,7 +10,7 @@ import sqlite3
 import logging
 from datetime import datetime, timedelta
 
-from littlehive.agent.paths import DB_PATH
+from littlehive.agent.db import get_connection
 
 logger = logging.getLogger(__name__)
 
@@ -37,8 +37,10 @@ def _get_time_period():
 
 def _get_calendar_busyness():
     """Return a busyness score and summary of today's calendar."""
+    from littlehive.agent.local_cache import count_cached_events
+
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
@@ -49,24 +51,15 @@ def _get_calendar_busyness():
             conn.close()
             return 0, "No calendar data available."
 
-        now = datetime.now()
-        today_start = now.replace(hour=0, minute=0, second=0).isoformat()
-        today_end = now.replace(hour=23, minute=59, second=59).isoformat()
+        conn.close()
 
-        cursor.execute(
-            "SELECT COUNT(*) as cnt FROM cached_events WHERE start_time >= ? AND start_time <= ?",
-            (today_start, today_end),
-        )
-        total_today = cursor.fetchone()["cnt"]
+        now = datetime.now().astimezone()
+        today_start = int(now.replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+        today_end = int(now.replace(hour=23, minute=59, second=59).timestamp())
 
+        total_today = count_cached_events(today_start, today_end)
         # Count events already passed vs upcoming
-        cursor.execute(
-            "SELECT COUNT(*) as cnt FROM cached_events WHERE start_time >= ? AND start_time <= ?",
-            (now.isoformat(), today_end),
-        )
-        remaining = cursor.fetchone()["cnt"]
-
-        conn.close()
+        remaining = count_cached_events(int(now.timestamp()), today_end)
 
         if total_today == 0:
             return 0, "Calendar is clear today."
@@ -85,7 +78,7 @@ def _get_pending_urgents():
     """Count high-priority pending items (critical reminders, overdue bills)."""
     items = []
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
@@ -125,7 +118,7 @@ def _get_pending_urgents():
 def _get_hours_since_last_interaction():
     """How many hours since the user's last chat message."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute(
             "SELECT name FROM sqlite_master WHERE type='table' AND name='chat_archive'"
@@ -152,7 +145,7 @@ def _get_hours_since_last_interaction():
 def _get_recent_activity_summary():
     """Summarize last 3 tool categories used (from user_actions)."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
@@ -0,0 +1,152 @@
+"""
+Sentence Embedding Service
+One process-wide sentence-transformers model for everything that compares
+text by meaning: core fact dedup and recall (memory_tools) and archive
+search (archive_index). Vectors are float32 and unit-length, so a dot
+product is the cosine similarity.
+
+    warm_up()      starts loading the model on a background thread
+    available()    False when sentence-transformers isn't installed
+    encode()       (n, dim) vectors, or None when there is no model (yet)
+
+The model is loaded by warm_up() at startup, alongside the LLM, so the
+first caller doesn't pay for it. encode() calls from any thread are queued
+to one worker, which gathers whatever arrives within BATCH_WAIT_SECONDS
+into a single model.encode. Vectors are kept in an LRU keyed by text hash,
+so repeated texts (the same query, a fact being re-checked) skip the model.
+
+Callers with a non-semantic fallback pass wait=0 and get None while the
+model is still loading, instead of blocking.
+"""
+
+import hashlib
+import logging
+import threading
+import queue
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+BATCH_WAIT_SECONDS = 0.005
+MAX_BATCH = 64
+# 384 float32 dims: 1.5 KB per entry
+CACHE_ENTRIES = 4096
+
+_model = None
+_load_failed = False
+_loaded = threading.Event()
+_start_lock = threading.Lock()
+_started = False
+
+_requests = queue.Queue()
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _load():
+    global _model, _load_failed
+    try:
+        from sentence_transformers import SentenceTransformer
+
+        _model = SentenceTransformer(MODEL_NAME)
+        logger.info(f"[Embeddings] {MODEL_NAME} loaded.")
+    except ImportError:
+        _load_failed = True
+        logger.warning("[Embeddings] sentence-transformers not installed; semantic matching disabled.")
+    except Exception as e:
+        _load_failed = True
+        logger.error(f"[Embeddings] Failed to load {MODEL_NAME}: {e}")
+    finally:
+        _loaded.set()
+    if _model is not None:
+        _serve()
+
+
+def warm_up():
+    """Starts the model load and the encode worker, once per process."""
+    global _started
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+    threading.Thread(target=_load, name="embeddings", daemon=True).start()
+
+
+def available() -> bool:
+    """True unless the model is known to be unusable."""
+    return not _load_failed
+
+
+def _key(text: str) -> bytes:
+    return hashlib.sha1(text.encode("utf-8", "surrogatepass")).digest()
+
+
+def _serve():
+    """Worker loop: batches queued requests into one model.encode."""
+    import numpy as np
+
+    while True:
+        batch = [_requests.get()]
+        size = len(batch[0][0])
+        try:
+            while size < MAX_BATCH:
+                texts, slot = _requests.get(timeout=BATCH_WAIT_SECONDS)
+                batch.append((texts, slot))
+                size += len(texts)
+        except queue.Empty:
+            pass
+
+        unique = list(dict.fromkeys(text for texts, _ in batch for text in texts))
+        try:
+            vectors = _model.encode(unique, normalize_embeddings=True).astype(np.float32)
+        except Exception as e:
+            logger.error(f"[Embeddings] Encoding failed: {e}")
+            for _, slot in batch:
+                slot["error"] = e
+                slot["done"].set()
+            continue
+        encoded = dict(zip(unique, vectors))
+        with _cache_lock:
+            for text, vector in encoded.items():
+                key = _key(text)
+                _cache[key] = vector
+                _cache.move_to_end(key)
+            while len(_cache) > CACHE_ENTRIES:
+                _cache.popitem(last=False)
+        for texts, slot in batch:
+            slot["vectors"] = {text: encoded[text] for text in texts}
+            slot["done"].set()
+
+
+def encode(texts: list, wait: float = None):
+    """
+    (len(texts), dim) float32 array of unit vectors. Returns None without a
+    model, or if it isn't loaded within `wait` seconds (None: as long as it
+    takes).
+    """
+    warm_up()
+    if not _loaded.wait(wait):
+        return None
+    if _model is None:
+        return None
+    import numpy as np
+
+    found = {}
+    with _cache_lock:
+        for text in texts:
+            key = _key(text)
+            if key in _cache:
+                _cache.move_to_end(key)
+                found[text] = _cache[key]
+    missing = [text for text in dict.fromkeys(texts) if text not in found]
+    # Bulk callers go MAX_BATCH at a time, so a query arriving meanwhile
+    # waits for one batch, not the whole backfill
+    for start in range(0, len(missing), MAX_BATCH):
+        slot = {"done": threading.Event()}
+        _requests.put((missing[start:start + MAX_BATCH], slot))
+        slot["done"].wait()
+        if "error" in slot:
+            raise slot["error"]
+        found.update(slot["vectors"])
+    return np.stack([found[text] for text in texts]) if texts else np.zeros((0, 0), dtype=np.float32)
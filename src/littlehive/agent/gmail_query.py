@@ -0,0 +1,226 @@
+"""
+Gmail Search Syntax -> Local Cache SQL
+Translates the Gmail operators the agent actually uses into a WHERE clause
+over cached_emails and its FTS5 index (cached_emails_fts), so search_emails
+can be answered from SQLite instead of a live API call.
+
+Supported:
+    from: subject:              full-text match on that header
+    bare words, "phrases"       full-text match on sender, recipients, subject, snippet
+    is:unread is:read is:starred is:important
+    in:inbox in:anywhere label:<system label> category:<tab>
+    has:attachment
+    newer_than: older_than:     (Nd, Nm, Ny, Nh)
+    after: before:              (YYYY/MM/DD, YYYY-MM-DD or epoch seconds)
+    -<term>                     negation of any of the above
+
+Anything else (OR, braces, parenthesised groups outside an operator, user
+labels, in:sent, ...) makes translate_query() return None: the caller should
+ask the live API rather than answer a different question. That includes
+to:, bcc: and from:me, which are about mail the user sent, and sent mail is
+never cached, and cc:, since To and Cc share the cached recipients column.
+"""
+
+import re
+import time
+from datetime import datetime
+
+_TERM = re.compile(r'(-?)(?:([a-z_]+):)?("[^"]*"?|\([^)]*\)?|[^\s()"]+)', re.I)
+
+_FTS_COLUMNS = {
+    "from": "sender",
+    "subject": "subject",
+}
+
+# Operators that select sent mail, which the cache does not hold, and cc:,
+# which it cannot tell apart from To
+_LIVE_ONLY_OPERATORS = ("to", "bcc", "cc")
+
+_SYSTEM_LABELS = {
+    "inbox": "INBOX",
+    "starred": "STARRED",
+    "important": "IMPORTANT",
+}
+
+_CATEGORIES = {
+    "primary": "CATEGORY_PERSONAL",
+    "personal": "CATEGORY_PERSONAL",
+    "social": "CATEGORY_SOCIAL",
+    "promotions": "CATEGORY_PROMOTIONS",
+    "updates": "CATEGORY_UPDATES",
+    "forums": "CATEGORY_FORUMS",
+}
+
+_AGE_UNITS_MS = {
+    "h": 3600 * 1000,
+    "d": 86400 * 1000,
+    "m": 30 * 86400 * 1000,
+    "y": 365 * 86400 * 1000,
+}
+
+
+def _fts_phrase(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _strip_group(value: str) -> str:
+    if value.startswith("(") or value.startswith('"'):
+        value = value[1:]
+        if value.endswith(")") or value.endswith('"'):
+            value = value[:-1]
+    return value.strip()
+
+
+def _parse_date_ms(value: str):
+    if value.isdigit():
+        return int(value) * 1000
+    for fmt in ("%Y/%m/%d", "%Y-%m-%d"):
+        try:
+            return int(datetime.strptime(value, fmt).timestamp() * 1000)
+        except ValueError:
+            continue
+    return None
+
+
+def _label_condition(label: str):
+    # labels is stored space-padded (" INBOX UNREAD ") so LIKE matches whole IDs
+    return "coalesce(labels, '') LIKE ?", [f"% {label} %"]
+
+
+def translate_query(query: str, now_ms: int = None):
+    """
+    Returns {"where": [...], "params": [...], "match": str | None,
+    "since_ms": int | None, "until_ms": int | None}, or None when the query
+    uses syntax the cache cannot answer exactly.
+
+    `match` is the FTS5 expression for all positive full-text terms;
+    negated full-text terms are already folded into `where`.
+    """
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    where = []
+    params = []
+    match_terms = []
+    since_ms = None
+    until_ms = None
+
+    query = (query or "").strip()
+    pos = 0
+    while pos < len(query):
+        if query[pos].isspace():
+            pos += 1
+            continue
+        m = _TERM.match(query, pos)
+        if m is None or m.end() == pos:
+            return None
+        pos = m.end()
+        negate, op, value = m.group(1) == "-", (m.group(2) or "").lower(), m.group(3)
+
+        if not op:
+            if value in ("OR", "AND", "|") or value.startswith(("(", "{")) or "{" in value:
+                return None
+            text = _strip_group(value)
+            if not text:
+                continue
+            fts = _fts_phrase(text)
+            if negate:
+                where.append(
+                    "rowid NOT IN (SELECT rowid FROM cached_emails_fts WHERE cached_emails_fts MATCH ?)"
+                )
+                params.append(fts)
+            else:
+                match_terms.append(fts)
+            continue
+
+        value = _strip_group(value)
+        cond = None
+        cond_params = []
+        lowered = value.lower()
+
+        if op in _LIVE_ONLY_OPERATORS or (op == "from" and lowered == "me"):
+            return None
+        elif op in _FTS_COLUMNS:
+            if not value or " OR " in value or "{" in value:
+                return None
+            words = value.split() if m.group(3).startswith("(") else [value]
+            fts = " ".join(f"{_FTS_COLUMNS[op]} : {_fts_phrase(w)}" for w in words)
+            if negate:
+                where.append(
+                    "rowid NOT IN (SELECT rowid FROM cached_emails_fts WHERE cached_emails_fts MATCH ?)"
+                )
+                params.append(fts)
+            else:
+                match_terms.append(fts)
+            continue
+        elif op == "is":
+            if lowered in ("unread", "read"):
+                cond = "is_read = ?"
+                cond_params = [0 if lowered == "unread" else 1]
+            elif lowered in _SYSTEM_LABELS:
+                cond, cond_params = _label_condition(_SYSTEM_LABELS[lowered])
+            else:
+                return None
+        elif op == "in":
+            if lowered == "anywhere":
+                continue
+            if lowered != "inbox":
+                # sent mail, drafts, trash and spam are never cached
+                return None
+            cond, cond_params = _label_condition("INBOX")
+        elif op == "label":
+            if lowered in ("unread", "read"):
+                cond, cond_params = "is_read = ?", [0 if lowered == "unread" else 1]
+            elif lowered in _SYSTEM_LABELS:
+                cond, cond_params = _label_condition(_SYSTEM_LABELS[lowered])
+            else:
+                # User labels are stored by ID, not by name
+                return None
+        elif op == "category":
+            if lowered not in _CATEGORIES:
+                return None
+            cond, cond_params = _label_condition(_CATEGORIES[lowered])
+        elif op == "has":
+            if lowered != "attachment":
+                return None
+            cond, cond_params = "has_attachment = ?", [1]
+        elif op in ("newer_than", "older_than"):
+            age = re.fullmatch(r"(\d+)([hdmy])", lowered)
+            if not age:
+                return None
+            bound = now_ms - int(age.group(1)) * _AGE_UNITS_MS[age.group(2)]
+            newer = (op == "newer_than") != negate
+            cond, cond_params = ("timestamp_ms >= ?" if newer else "timestamp_ms < ?"), [bound]
+            if newer:
+                since_ms = max(since_ms or bound, bound)
+            else:
+                until_ms = min(until_ms or bound, bound)
+            where.append(cond)
+            params.extend(cond_params)
+            continue
+        elif op in ("after", "before"):
+            bound = _parse_date_ms(value)
+            if bound is None:
+                return None
+            after = (op == "after") != negate
+            cond, cond_params = ("timestamp_ms >= ?" if after else "timestamp_ms < ?"), [bound]
+            if after:
+                since_ms = max(since_ms or bound, bound)
+            else:
+                until_ms = min(until_ms or bound, bound)
+            where.append(cond)
+            params.extend(cond_params)
+            continue
+        else:
+            return None
+
+        if negate:
+            cond = f"NOT ({cond})"
+        where.append(cond)
+        params.extend(cond_params)
+
+    return {
+        "where": where,
+        "params": params,
+        "match": " AND ".join(match_terms) if match_terms else None,
+        "since_ms": since_ms,
+        "until_ms": until_ms,
+    }
@@ -1,187 +1,20 @@
 import sqlite3
 import json
-from datetime import datetime, timedelta, timezone
-import os
+import time
+import zlib
+from datetime import datetime, timezone
 
-from littlehive.agent.paths import DB_PATH
+from littlehive.agent.db import get_connection
+from littlehive.agent.migrations import run_migrations
 
 def _get_db():
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection()
     conn.row_factory = sqlite3.Row
     return conn
 
 def init_cache_db():
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = _get_db()
-    cursor = conn.cursor()
-    
-    # Cached Emails (Last 24 hours)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS cached_emails (
-            id TEXT PRIMARY KEY,
-            thread_id TEXT,
-            sender TEXT,
-            subject TEXT,
-            snippet TEXT,
-            date TEXT,
-            is_read BOOLEAN,
-            timestamp_ms INTEGER
-        )
-    """)
-    
-    # Cached Events (Today + Next 3 Days)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS cached_events (
-            id TEXT PRIMARY KEY,
-            summary TEXT,
-            start_time TEXT,
-            end_time TEXT,
-            description TEXT,
-            attendees TEXT,
-            hangout_link TEXT
-        )
-    """)
-    
-    # Cached Google Tasks
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS cached_tasks (
-            id TEXT PRIMARY KEY,
-            list_id TEXT,
-            title TEXT,
-            notes TEXT,
-            status TEXT,
-            due TEXT,
-            updated TEXT
-        )
-    """)
-    
-    # Sync State
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS sync_state (
-            service TEXT PRIMARY KEY,
-            last_sync_timestamp INTEGER,
-            last_history_id TEXT
-        )
-    """)
-
-    # Custom API Registry
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS custom_apis (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE NOT NULL,
-            url TEXT NOT NULL,
-            method TEXT DEFAULT 'GET',
-            headers TEXT DEFAULT '{}',
-            body_template TEXT DEFAULT '',
-            description TEXT DEFAULT '',
-            created_at DATETIME DEFAULT (datetime('now', 'localtime'))
-        )
-    """)
-
-    # Shell Audit Log
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS shell_audit_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            command TEXT NOT NULL,
-            working_dir TEXT DEFAULT '',
-            status TEXT NOT NULL,
-            output_summary TEXT DEFAULT '',
-            executed_at DATETIME DEFAULT (datetime('now', 'localtime'))
-        )
-    """)
-
-    # Internal TODO List
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS internal_todos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            notes TEXT DEFAULT '',
-            status TEXT DEFAULT 'needsAction',
-            due TEXT DEFAULT '',
-            created_at DATETIME DEFAULT (datetime('now', 'localtime')),
-            updated_at DATETIME DEFAULT (datetime('now', 'localtime'))
-        )
-    """)
-
-    # --- Anticipation Engine Tables ---
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS user_actions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME DEFAULT (datetime('now', 'localtime')),
-            hour INTEGER,
-            minute INTEGER,
-            day_of_week INTEGER,
-            day_of_month INTEGER,
-            tool_name TEXT NOT NULL,
-            action_category TEXT,
-            entities TEXT DEFAULT '[]',
-            turn_id TEXT,
-            session_position INTEGER DEFAULT 0,
-            source TEXT DEFAULT 'web'
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS action_patterns (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            pattern_type TEXT NOT NULL,
-            pattern_key TEXT NOT NULL UNIQUE,
-            description TEXT,
-            frequency INTEGER DEFAULT 1,
-            total_opportunities INTEGER DEFAULT 1,
-            confidence REAL DEFAULT 0.0,
-            last_matched DATETIME,
-            first_seen DATETIME DEFAULT (datetime('now', 'localtime')),
-            predicted_action TEXT,
-            trigger_conditions TEXT,
-            is_active BOOLEAN DEFAULT 1,
-            user_confirmed BOOLEAN DEFAULT 0
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS anticipation_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            pattern_id INTEGER,
-            suggestion_text TEXT,
-            confidence REAL,
-            suggested_at DATETIME DEFAULT (datetime('now', 'localtime')),
-            user_response TEXT DEFAULT 'pending',
-            FOREIGN KEY (pattern_id) REFERENCES action_patterns(id)
-        )
-    """)
-
-    cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_user_actions_timestamp ON user_actions(timestamp)"
-    )
-    cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_user_actions_category ON user_actions(action_category, day_of_week, hour)"
-    )
-
-    # --- Self-Healing Engine Table ---
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tool_failure_memory (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tool_name TEXT NOT NULL,
-            error_type TEXT,
-            error_signature TEXT,
-            args_hash TEXT,
-            occurrence_count INTEGER DEFAULT 1,
-            first_seen DATETIME DEFAULT (datetime('now', 'localtime')),
-            last_seen DATETIME DEFAULT (datetime('now', 'localtime')),
-            resolution TEXT,
-            is_recurring BOOLEAN DEFAULT 0
-        )
-    """)
-
-    cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_failure_memory_tool ON tool_failure_memory(tool_name, args_hash)"
-    )
-
-    conn.commit()
-    conn.close()
+    # The schema lives in migrations.py; kept for existing callers
+    run_migrations()
 
 # --- Sync State ---
 def get_sync_state(service: str):
@@ -205,153 +38,543 @@ def update_sync_state(service: str, timestamp_ms: int = None, history_id: str =
     conn.commit()
     conn.close()
 
+# --- Bulk Writes ---
+def _upsert_sql(table: str, columns: tuple, update_columns: tuple) -> str:
+    """INSERT ... ON CONFLICT(id) that only rewrites rows whose values changed."""
+    placeholders = ", ".join("?" for _ in columns)
+    assignments = ", ".join(f"{c}=excluded.{c}" for c in update_columns)
+    changed = " OR ".join(f"{table}.{c} IS NOT excluded.{c}" for c in update_columns)
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+        f"ON CONFLICT(id) DO UPDATE SET {assignments} WHERE {changed}"
+    )
+
+def _sync_rows(table: str, columns: tuple, rows: list):
+    """
+    Make `table` hold exactly `rows` (tuples starting with the id): upsert
+    what is new or changed and delete only the ids that vanished, all in one
+    transaction so readers never see a half-written or empty table.
+    """
+    conn = _get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(_upsert_sql(table, columns, columns[1:]), rows)
+        cursor.execute(
+            f"DELETE FROM {table} WHERE id NOT IN (SELECT value FROM json_each(?))",
+            (json.dumps([r[0] for r in rows]),),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
 # --- Email Cache ---
+_EMAIL_COLUMNS = (
+    "id", "thread_id", "sender", "recipients", "subject", "snippet", "date",
+    "is_read", "labels", "has_attachment", "timestamp_ms",
+)
+
+def _labels_text(label_ids) -> str:
+    """Space-padded label IDs, so `labels LIKE '% STARRED %'` matches whole IDs."""
+    return f" {' '.join(label_ids)} " if label_ids else " "
+
 def upsert_emails(emails: list):
     if not emails:
         return
     conn = _get_db()
     cursor = conn.cursor()
-    for e in emails:
-        cursor.execute("""
-            INSERT INTO cached_emails (id, thread_id, sender, subject, snippet, date, is_read, timestamp_ms)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(id) DO UPDATE SET 
-                is_read=excluded.is_read, 
-                snippet=excluded.snippet
-        """, (
-            e['id'], 
-            e.get('thread_id'), 
-            e.get('sender'), 
-            e.get('subject'), 
-            e.get('snippet'), 
-            e.get('date'), 
-            e.get('is_read', False),
-            e.get('timestamp_ms')
-        ))
+    cursor.executemany(
+        _upsert_sql(
+            "cached_emails",
+            _EMAIL_COLUMNS,
+            ("is_read", "snippet", "labels", "recipients", "has_attachment"),
+        ),
+        [
+            (
+                e['id'],
+                e.get('thread_id'),
+                e.get('sender'),
+                e.get('recipients'),
+                e.get('subject'),
+                e.get('snippet'),
+                e.get('date'),
+                e.get('is_read', False),
+                _labels_text(e.get('label_ids', [])),
+                bool(e.get('has_attachment', False)),
+                e.get('timestamp_ms'),
+            )
+            for e in emails
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+def delete_cached_emails(message_ids):
+    """Drops messages that were deleted, trashed or archived upstream, bodies included."""
+    if not message_ids:
+        return
+    conn = _get_db()
+    cursor = conn.cursor()
+    rows = [(m,) for m in message_ids]
+    cursor.executemany("DELETE FROM cached_emails WHERE id = ?", rows)
+    cursor.executemany("DELETE FROM email_bodies WHERE id = ?", rows)
+    conn.commit()
+    conn.close()
+
+def set_cached_email_labels(labels_by_id: dict):
+    """Applies {message_id: [label IDs]} changes (read flag included) to already-cached messages."""
+    if not labels_by_id:
+        return
+    conn = _get_db()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "UPDATE cached_emails SET labels = ?, is_read = ? WHERE id = ?",
+        [
+            (_labels_text(label_ids), "UNREAD" not in label_ids, m)
+            for m, label_ids in labels_by_id.items()
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+def rebuild_email_index():
+    """Re-derives cached_emails_fts from cached_emails (needed after a full VACUUM)."""
+    conn = _get_db()
+    conn.execute("INSERT INTO cached_emails_fts(cached_emails_fts) VALUES ('rebuild')")
     conn.commit()
     conn.close()
 
+# Mail from the last day is the "recent slice": what the poll notifies about
+# and the incremental sync window. Older cached mail only serves searches.
+RECENT_EMAIL_MS = 24 * 3600 * 1000
+
+def email_retention_days() -> int:
+    from littlehive.agent.config import get_config
+    return max(1, int(get_config().get("email_cache_retention_days", 90)))
+
+def _email_retention_ms() -> int:
+    return email_retention_days() * 24 * 3600 * 1000
+
 def cleanup_old_emails():
-    """Removes emails older than 24 hours."""
+    """
+    Removes emails older than the retention window, then evicts the oldest
+    until the cached text fits email_cache_max_mb.
+    """
+    from littlehive.agent.config import get_config
+
     conn = _get_db()
     cursor = conn.cursor()
-    cutoff = int((datetime.now(timezone.utc) - timedelta(hours=24)).timestamp() * 1000)
-    cursor.execute("DELETE FROM cached_emails WHERE timestamp_ms < ?", (cutoff,))
+    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    cursor.execute("DELETE FROM cached_emails WHERE timestamp_ms < ?", (now_ms - _email_retention_ms(),))
+
+    budget = int(get_config().get("email_cache_max_mb", 64) * 1024 * 1024)
+    # Approximate on-disk size: the stored text, counted once more for the
+    # FTS index, plus a fixed per-row overhead for keys and index entries.
+    row_bytes = (
+        "(2 * (length(coalesce(sender, '')) + length(coalesce(recipients, ''))"
+        " + length(coalesce(subject, '')) + length(coalesce(snippet, '')))"
+        " + length(coalesce(labels, '')) + length(coalesce(date, '')) + 200)"
+    )
+    cursor.execute(f"SELECT coalesce(sum({row_bytes}), 0) FROM cached_emails")
+    if cursor.fetchone()[0] > budget:
+        cursor.execute(
+            f"""
+            DELETE FROM cached_emails WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, sum({row_bytes}) OVER (
+                        ORDER BY timestamp_ms DESC, id ROWS UNBOUNDED PRECEDING
+                    ) AS running
+                    FROM cached_emails
+                ) WHERE running > ?
+            )
+            """,
+            (budget,),
+        )
     conn.commit()
     conn.close()
 
-def query_cached_emails(query: str = None, limit: int = 10) -> str:
-    """Read tool replacement for emails."""
+def cached_email_timestamps(message_ids: list) -> dict:
+    """{id: timestamp_ms} for the subset of `message_ids` already cached."""
+    if not message_ids:
+        return {}
     conn = _get_db()
     cursor = conn.cursor()
-    
+    cursor.execute(
+        "SELECT id, timestamp_ms FROM cached_emails WHERE id IN (SELECT value FROM json_each(?))",
+        (json.dumps(list(message_ids)),),
+    )
+    found = {r["id"]: r["timestamp_ms"] for r in cursor.fetchall()}
+    conn.close()
+    return found
+
+def unread_email_ids() -> set:
+    """Ids of every cached message still marked unread."""
+    conn = _get_db()
+    ids = {r["id"] for r in conn.execute("SELECT id FROM cached_emails WHERE is_read = 0")}
+    conn.close()
+    return ids
+
+# --- Email Body Cache ---
+def get_email_body(message_id: str):
+    """Cached {id, sender, subject, body, body_source} for a message, or None."""
+    conn = _get_db()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id, sender, subject, body, body_source FROM email_bodies WHERE id = ?",
+        (message_id,),
+    )
+    row = cursor.fetchone()
+    if row is None:
+        conn.close()
+        return None
+    cursor.execute(
+        "UPDATE email_bodies SET last_access = ? WHERE id = ?",
+        (int(time.time() * 1000), message_id),
+    )
+    conn.commit()
+    conn.close()
+    return {
+        "id": row["id"],
+        "sender": row["sender"],
+        "subject": row["subject"],
+        "body": zlib.decompress(row["body"]).decode("utf-8"),
+        "body_source": row["body_source"],
+    }
+
+def cached_email_body_ids(message_ids: list) -> set:
+    if not message_ids:
+        return set()
+    conn = _get_db()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id FROM email_bodies WHERE id IN (SELECT value FROM json_each(?))",
+        (json.dumps(list(message_ids)),),
+    )
+    found = {r["id"] for r in cursor.fetchall()}
+    conn.close()
+    return found
+
+def store_email_bodies(bodies: list):
+    """
+    Stores [{id, sender, subject, body, body_source}] compressed, then
+    evicts least-recently-read bodies beyond email_body_cache_mb.
+    """
+    from littlehive.agent.config import get_config
+
+    if not bodies:
+        return
+    now_ms = int(time.time() * 1000)
+    rows = []
+    for b in bodies:
+        blob = zlib.compress(b["body"].encode("utf-8"), 6)
+        rows.append((b["id"], b.get("sender"), b.get("subject"), blob, b.get("body_source"), len(blob), now_ms))
+    budget = int(get_config().get("email_body_cache_mb", 32) * 1024 * 1024)
+
+    conn = _get_db()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT OR REPLACE INTO email_bodies (id, sender, subject, body, body_source, size, last_access) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    cursor.execute("SELECT coalesce(sum(size), 0) FROM email_bodies")
+    if cursor.fetchone()[0] > budget:
+        cursor.execute(
+            """
+            DELETE FROM email_bodies WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, sum(size) OVER (
+                        ORDER BY last_access DESC, id ROWS UNBOUNDED PRECEDING
+                    ) AS running
+                    FROM email_bodies
+                ) WHERE running > ?
+            )
+            """,
+            (budget,),
+        )
+    conn.commit()
+    conn.close()
+
+def search_cached_emails(query: str = None, limit: int = 10):
+    """
+    Answers a Gmail search from the cache. Returns a list of email dicts,
+    newest first, or None when the query uses syntax gmail_query cannot
+    translate or reaches back further than the cache is complete: past the
+    retention horizon, or past where the backfill has got to so far.
+    """
+    from littlehive.agent.gmail_query import translate_query
+
+    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    parsed = translate_query(query, now_ms=now_ms)
+    if parsed is None:
+        return None
+    horizon_ms = now_ms - _email_retention_ms()
+    if parsed["until_ms"] is not None and parsed["until_ms"] <= horizon_ms:
+        return None
+    # The cache holds every inbox message from complete_ms on, older ones
+    # only by chance, so an answer reaching past it would be silently short.
+    # With no lower bound the answer is the retention window (search_emails
+    # says so), but only once the backfill has filled it.
+    state = get_sync_state("gmail_backfill")
+    backfilled_ms = (state or {}).get("last_sync_timestamp") or now_ms
+    complete_ms = max(horizon_ms, backfilled_ms)
+    if parsed["since_ms"] is None:
+        if complete_ms > horizon_ms:
+            return None
+    elif parsed["since_ms"] < complete_ms:
+        return None
+
+    where = list(parsed["where"])
+    params = list(parsed["params"])
+    if parsed["match"]:
+        where.insert(0, "rowid IN (SELECT rowid FROM cached_emails_fts WHERE cached_emails_fts MATCH ?)")
+        params.insert(0, parsed["match"])
+
     sql = "SELECT id, thread_id, sender, subject, snippet, date, is_read FROM cached_emails"
-    params = []
-    
-    if query and "is:unread" in query:
-        sql += " WHERE is_read = 0"
-    
+    if where:
+        sql += " WHERE " + " AND ".join(where)
     sql += " ORDER BY timestamp_ms DESC LIMIT ?"
     params.append(limit)
-    
-    cursor.execute(sql, tuple(params))
+
+    conn = _get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, tuple(params))
+    except sqlite3.OperationalError:
+        # FTS5 syntax the phrase quoting did not anticipate
+        conn.close()
+        return None
     rows = cursor.fetchall()
     conn.close()
-    
-    emails = []
-    for r in rows:
-        emails.append({
+
+    return [
+        {
             "id": r["id"],
             "thread_id": r["thread_id"],
             "sender": r["sender"],
             "subject": r["subject"],
             "snippet": r["snippet"],
             "date": r["date"],
-            "is_read": bool(r["is_read"])
-        })
-    
-    return json.dumps({"emails": emails, "source": "local_cache", "message": "Showing emails from the last 24 hours."})
+            "is_read": bool(r["is_read"]),
+        }
+        for r in rows
+    ]
+
+def query_cached_emails(query: str = None, limit: int = 10) -> str:
+    """Read tool replacement for emails. Unsupported queries return the latest emails."""
+    emails = search_cached_emails(query, limit)
+    if emails is None:
+        emails = search_cached_emails(None, limit)
+    return json.dumps({"emails": emails, "source": "local_cache", "message": f"Showing emails from the last {email_retention_days()} days."})
 
 # --- Event Cache ---
+_EVENT_COLUMNS = (
+    "id", "summary", "start_time", "end_time", "description", "attendees", "hangout_link",
+    "start_ts", "end_ts", "all_day",
+)
+# How far the overlap lookups range-scan back from their window; keeps them a
+# bounded index range instead of a scan over everything that started earlier.
+# Longer events come from the partial index migration 10 builds on this
+# predicate, which must match it verbatim.
+MAX_EVENT_SECONDS = 24 * 3600
+_LONG_EVENT = f"end_ts - start_ts > {MAX_EVENT_SECONDS}"
+
+def to_epoch(value) -> int | None:
+    """
+    UTC epoch seconds for an ISO datetime or date string (or datetime).
+    Naive values and bare dates are taken as local time, the way the
+    calendar shows them.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return int(value.astimezone(timezone.utc).timestamp())
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.astimezone()
+    return int(parsed.timestamp())
+
+def _event_span(start: str, end: str) -> tuple:
+    """(start_ts, end_ts, all_day); all-day dates span local midnight to midnight."""
+    all_day = bool(start) and len(start) == 10
+    try:
+        start_ts = to_epoch(start)
+        end_ts = to_epoch(end) if end else start_ts
+    except ValueError:
+        return None, None, int(all_day)
+    return start_ts, end_ts, int(all_day)
+
+def _event_row(evt: dict) -> tuple:
+    return (
+        evt['id'],
+        evt.get('summary'),
+        evt.get('start'),
+        evt.get('end'),
+        evt.get('description'),
+        json.dumps(evt.get('attendees', [])),
+        evt.get('hangout_link'),
+        *_event_span(evt.get('start'), evt.get('end')),
+    )
+
 def replace_cached_events(events: list):
-    """Since we just pull 'Today + 3 Days', we can safely clear and rewrite this window."""
-    conn = _get_db()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM cached_events") # Clear all existing events in the window
-    for evt in events:
-        cursor.execute("""
-            INSERT INTO cached_events (id, summary, start_time, end_time, description, attendees, hangout_link)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            evt['id'], 
-            evt.get('summary'), 
-            evt.get('start'), 
-            evt.get('end'), 
-            evt.get('description'), 
-            json.dumps(evt.get('attendees', [])),
-            evt.get('hangout_link')
-        ))
-    conn.commit()
-    conn.close()
+    """After a full sync of the horizon, the cache holds exactly this list."""
+    _sync_rows("cached_events", _EVENT_COLUMNS, [_event_row(evt) for evt in events])
 
-def query_cached_events(time_min: str = None, time_max: str = None) -> str:
-    """Read tool replacement for events."""
+def apply_event_changes(events: list, deleted_ids: list):
+    """Applies one incremental calendar sync (upserts and cancellations) in a single transaction."""
+    if not events and not deleted_ids:
+        return
     conn = _get_db()
     cursor = conn.cursor()
-    
+    try:
+        cursor.executemany(
+            _upsert_sql("cached_events", _EVENT_COLUMNS, _EVENT_COLUMNS[1:]),
+            [_event_row(evt) for evt in events],
+        )
+        cursor.executemany("DELETE FROM cached_events WHERE id = ?", [(i,) for i in deleted_ids])
+        conn.commit()
+    finally:
+        conn.close()
+
+def _event_dict(r) -> dict:
+    return {
+        "id": r["id"],
+        "summary": r["summary"],
+        "start": r["start_time"],
+        "end": r["end_time"],
+        "description": r["description"],
+        "attendees": json.loads(r["attendees"]) if r["attendees"] else [],
+        "hangout_link": r["hangout_link"]
+    }
+
+def query_cached_events(time_min: str = None, time_max: str = None, limit: int = None) -> str:
+    """
+    Read tool replacement for events: the first `limit` (default all)
+    events starting within [time_min, time_max]. Raises ValueError for a
+    bound that isn't an ISO date or datetime.
+    """
     sql = "SELECT * FROM cached_events"
+    where = []
     params = []
-    
-    if time_min or time_max:
-        sql += " WHERE 1=1"
-        if time_min:
-            sql += " AND start_time >= ?"
-            params.append(time_min)
-        if time_max:
-            sql += " AND start_time <= ?"
-            params.append(time_max)
-            
-    sql += " ORDER BY start_time ASC"
-    
+    if time_min:
+        where.append("start_ts >= ?")
+        params.append(to_epoch(time_min))
+    if time_max:
+        where.append("start_ts <= ?")
+        params.append(to_epoch(time_max))
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY start_ts ASC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    conn = _get_db()
+    cursor = conn.cursor()
     cursor.execute(sql, tuple(params))
     rows = cursor.fetchall()
     conn.close()
     
-    events = []
-    for r in rows:
-        events.append({
-            "id": r["id"],
-            "summary": r["summary"],
-            "start": r["start_time"],
-            "end": r["end_time"],
-            "description": r["description"],
-            "attendees": json.loads(r["attendees"]) if r["attendees"] else [],
-            "hangout_link": r["hangout_link"]
-        })
-    
-    return json.dumps(events)
+    return json.dumps([_event_dict(r) for r in rows])
+
+def count_cached_events(start_ts: int, end_ts: int) -> int:
+    """Number of events starting within [start_ts, end_ts] (epoch seconds)."""
+    conn = _get_db()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT COUNT(*) FROM cached_events WHERE start_ts >= ? AND start_ts <= ?",
+        (start_ts, end_ts),
+    )
+    count = cursor.fetchone()[0]
+    conn.close()
+    return count
+
+def _overlapping(columns: str, start_ts: int, end_ts: int, include_all_day: bool) -> list:
+    """Rows of events overlapping [start_ts, end_ts), by start."""
+    where = "end_ts > :start" + ("" if include_all_day else " AND all_day = 0")
+    conn = _get_db()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT {columns} FROM cached_events "
+        f"WHERE start_ts >= :lookback AND start_ts < :end AND {where} "
+        "UNION ALL "
+        f"SELECT {columns} FROM cached_events "
+        f"WHERE {_LONG_EVENT} AND start_ts < :lookback AND {where} "
+        "ORDER BY start_ts",
+        {"start": start_ts, "end": end_ts, "lookback": start_ts - MAX_EVENT_SECONDS},
+    )
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+def events_in_progress(at_ts: int = None, include_all_day: bool = False) -> list:
+    """Events running at `at_ts` (epoch seconds, default now)."""
+    at_ts = at_ts if at_ts is not None else int(time.time())
+    return [_event_dict(r) for r in _overlapping("*", at_ts, at_ts + 1, include_all_day)]
+
+def busy_intervals(start_ts: int, end_ts: int) -> list:
+    """(start_ts, end_ts) of timed events overlapping [start_ts, end_ts), by start."""
+    rows = _overlapping("start_ts, end_ts", start_ts, end_ts, include_all_day=False)
+    return [(r["start_ts"], r["end_ts"]) for r in rows]
 
 # --- Google Tasks Cache ---
+_TASK_COLUMNS = ("id", "list_id", "title", "notes", "status", "due", "updated")
+
 def replace_cached_tasks(tasks: list):
-    """Clears and rewrites cached tasks."""
+    """Syncs cached tasks to exactly this list."""
+    _sync_rows("cached_tasks", _TASK_COLUMNS, [
+        (
+            t['id'],
+            t.get('list_id'),
+            t.get('title'),
+            t.get('notes'),
+            t.get('status'),
+            t.get('due'),
+            t.get('updated'),
+        )
+        for t in tasks
+    ])
+
+def apply_task_changes(tasks: list, deleted_ids: list, full_lists: dict = None, live_list_ids: list = None):
+    """
+    Applies one tasks sync in a single transaction.
+
+    tasks / deleted_ids: rows to upsert and ids to drop.
+    full_lists: {list_id: [task ids]} for lists that were fetched in full;
+        any other cached task of those lists is gone upstream.
+    live_list_ids: every list that still exists; tasks of other lists are dropped.
+    """
     conn = _get_db()
     cursor = conn.cursor()
-    cursor.execute("DELETE FROM cached_tasks")
-    for t in tasks:
-        cursor.execute("""
-            INSERT INTO cached_tasks (id, list_id, title, notes, status, due, updated)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            t['id'], 
-            t.get('list_id'), 
-            t.get('title'), 
-            t.get('notes'), 
-            t.get('status'), 
-            t.get('due'),
-            t.get('updated')
-        ))
-    conn.commit()
-    conn.close()
+    try:
+        cursor.executemany(
+            _upsert_sql("cached_tasks", _TASK_COLUMNS, _TASK_COLUMNS[1:]),
+            [
+                (
+                    t['id'],
+                    t.get('list_id'),
+                    t.get('title'),
+                    t.get('notes'),
+                    t.get('status'),
+                    t.get('due'),
+                    t.get('updated'),
+                )
+                for t in tasks
+            ],
+        )
+        cursor.executemany("DELETE FROM cached_tasks WHERE id = ?", [(i,) for i in deleted_ids])
+        for list_id, task_ids in (full_lists or {}).items():
+            cursor.execute(
+                "DELETE FROM cached_tasks WHERE list_id = ? AND id NOT IN (SELECT value FROM json_each(?))",
+                (list_id, json.dumps(task_ids)),
+            )
+        if live_list_ids is not None:
+            cursor.execute(
+                "DELETE FROM cached_tasks WHERE list_id NOT IN (SELECT value FROM json_each(?))",
+                (json.dumps(live_list_ids),),
+            )
+        conn.commit()
+    finally:
+        conn.close()
 
 def query_cached_tasks(list_id: str = None, status: str = None) -> str:
     """Read tool replacement for tasks."""
@@ -0,0 +1,244 @@
+"""
+Day-Partitioned Log Store
+Structured logs live in telemetry.db as one table per local calendar day,
+system_logs_YYYYMMDD, each with its own level/module/timestamp indexes and
+an FTS5 index over the message (system_logs_fts_YYYYMMDD). Retention drops
+whole days instead of deleting rows, and a search over a time range only
+opens the days it overlaps.
+
+    ensure_day()    creates a day's table, indexes and FTS index
+    write_rows()    appends rows, routing each to its day
+    log_days()      days present, newest first
+    drop_days()     retention by age and, optionally, total rows
+    query_logs()    filtered, paginated search for /api/logs
+"""
+
+import re
+import sqlite3
+import logging
+from datetime import datetime, timedelta
+
+from littlehive.agent.paths import TELEMETRY_DB_PATH
+from littlehive.agent.db import get_connection
+
+logger = logging.getLogger(__name__)
+
+TABLE_PREFIX = "system_logs_"
+FTS_PREFIX = "system_logs_fts_"
+_DAY_GLOB = TABLE_PREFIX + "[0-9]" * 8
+_PARTITION = re.compile(r"^system_logs_(?:fts_)?\d{8}$")
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Days whose table this process has already created (the writer's cache)
+_ready_days = set()
+
+
+def day_key(timestamp: str) -> str:
+    """'2026-10-19T08:30:00' -> '20261019'."""
+    return timestamp[:10].replace("-", "")
+
+
+def partition_of(name: str):
+    """'system_logs' for a day table or its FTS index, else None."""
+    return "system_logs" if _PARTITION.match(name) else None
+
+
+def ensure_day(cursor, day: str, schema: str = "main"):
+    table = TABLE_PREFIX + day
+    fts = FTS_PREFIX + day
+    # No AUTOINCREMENT: a day table is only ever appended to, then dropped
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {schema}.{table} (
+            id INTEGER PRIMARY KEY,
+            timestamp TEXT,
+            level TEXT,
+            module TEXT,
+            message TEXT,
+            traceback TEXT
+        )
+    """)
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_{table}_timestamp ON {table}(timestamp)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_{table}_level ON {table}(level, timestamp)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_{table}_module ON {table}(module, timestamp)")
+    # Filled by index_messages() rather than a per-row trigger
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {schema}.{fts} USING fts5(
+            message, content='{table}', content_rowid='id'
+        )
+    """)
+
+
+def last_id(cursor, day: str, schema: str = "main") -> int:
+    cursor.execute(f"SELECT IFNULL(MAX(id), 0) FROM {schema}.{TABLE_PREFIX}{day}")
+    return cursor.fetchone()[0]
+
+
+def index_messages(cursor, day: str, after_id: int, schema: str = "main"):
+    """
+    Adds the day's rows past `after_id` to its FTS index in one statement.
+    Run in the same write transaction as the inserts, with `after_id` read
+    inside it. This is several times faster than an AFTER INSERT trigger,
+    which updates the index one row at a time.
+    """
+    cursor.execute(
+        f"INSERT INTO {schema}.{FTS_PREFIX}{day}(rowid, message) "
+        f"SELECT id, message FROM {schema}.{TABLE_PREFIX}{day} WHERE id > ?",
+        (after_id,),
+    )
+
+
+def write_rows(cursor, rows):
+    """
+    Appends (timestamp, level, module, message, traceback) rows to their
+    day tables. The caller holds a write transaction (BEGIN IMMEDIATE) and
+    commits.
+    """
+    by_day = {}
+    for row in rows:
+        by_day.setdefault(day_key(row[0]), []).append(row)
+    for day, day_rows in by_day.items():
+        if day not in _ready_days:
+            ensure_day(cursor, day)
+            _ready_days.add(day)
+        after = last_id(cursor, day)
+        cursor.executemany(
+            f"INSERT INTO {TABLE_PREFIX}{day} (timestamp, level, module, message, traceback) "
+            "VALUES (?, ?, ?, ?, ?)",
+            day_rows,
+        )
+        index_messages(cursor, day, after)
+
+
+def log_days(cursor, schema: str = "main") -> list:
+    cursor.execute(
+        f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table' AND name GLOB ?",
+        (_DAY_GLOB,),
+    )
+    return sorted((row[0][len(TABLE_PREFIX):] for row in cursor.fetchall()), reverse=True)
+
+
+def drop_days(days_to_keep: int, max_records: int = None) -> list:
+    """
+    Drops the day tables older than `days_to_keep` days and, with
+    `max_records`, the oldest days beyond that many rows in total. Today is
+    always kept. Returns the days dropped.
+    """
+    today = datetime.now().strftime("%Y%m%d")
+    cutoff = (datetime.now() - timedelta(days=days_to_keep)).strftime("%Y%m%d")
+    conn = get_connection(path=TELEMETRY_DB_PATH)
+    cursor = conn.cursor()
+    dropped = []
+    try:
+        total = 0
+        for day in log_days(cursor):
+            if day != today:
+                if day < cutoff or (max_records is not None and total >= max_records):
+                    dropped.append(day)
+                    continue
+            cursor.execute(f"SELECT COUNT(*) FROM {TABLE_PREFIX}{day}")
+            total += cursor.fetchone()[0]
+        for day in dropped:
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_PREFIX}{day}")
+            # Takes its indexes with it
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE_PREFIX}{day}")
+            conn.commit()
+            _ready_days.discard(day)
+    finally:
+        conn.close()
+    if dropped:
+        logger.info(f"[Logs] Dropped {len(dropped)} day(s) of logs, oldest {dropped[-1]}.")
+    return dropped
+
+
+def _fts_query(text: str) -> str:
+    # Every word must appear; each is quoted so FTS5 syntax is taken literally
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+def _check_timestamp(name: str, value: str):
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO timestamp or date, got {value!r}") from None
+
+
+def query_logs(level=None, module=None, since=None, until=None, q=None,
+               limit=DEFAULT_PAGE_SIZE, cursor=None) -> dict:
+    """
+    Newest-first search across the day tables. `level` and `module` take a
+    comma-separated list, `since`/`until` ISO timestamps (or dates), and `q`
+    words that must all appear in the message. Pass the returned
+    next_cursor back as `cursor` for the following page. Raises ValueError
+    for a malformed limit, timestamp or cursor.
+    """
+    try:
+        limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    except ValueError:
+        raise ValueError(f"limit must be an integer, got {limit!r}") from None
+    for name, value in (("since", since), ("until", until)):
+        if value:
+            _check_timestamp(name, value)
+    if cursor:
+        after_ts, _, after_id = cursor.rpartition("|")
+        if not after_id.isdigit():
+            raise ValueError(f"malformed cursor {cursor!r}")
+        _check_timestamp("cursor", after_ts)
+    where, params = [], []
+    if level:
+        levels = [lvl.strip().upper() for lvl in level.split(",") if lvl.strip()]
+        where.append(f"level IN ({', '.join('?' * len(levels))})")
+        params.extend(levels)
+    if module:
+        modules = [m.strip() for m in module.split(",") if m.strip()]
+        where.append(f"module IN ({', '.join('?' * len(modules))})")
+        params.extend(modules)
+    if since:
+        where.append("timestamp >= ?")
+        params.append(since)
+    if until:
+        if len(until) == 10:
+            # A bare date covers the whole day
+            where.append("timestamp < ?")
+            params.append((datetime.fromisoformat(until) + timedelta(days=1)).date().isoformat())
+        else:
+            where.append("timestamp <= ?")
+            params.append(until)
+
+    first_day = day_key(since) if since else None
+    last_day = day_key(until) if until else None
+    if cursor:
+        where.append("(timestamp < ? OR (timestamp = ? AND id < ?))")
+        params.extend([after_ts, after_ts, int(after_id)])
+        last_day = min(last_day or "99999999", day_key(after_ts))
+
+    conn = get_connection(readonly=True, path=TELEMETRY_DB_PATH)
+    conn.row_factory = sqlite3.Row
+    db = conn.cursor()
+    rows = []
+    try:
+        for day in log_days(db):
+            if (last_day and day > last_day) or (first_day and day < first_day):
+                continue
+            day_where, day_params = list(where), list(params)
+            if q:
+                fts = FTS_PREFIX + day
+                day_where.insert(0, f"id IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)")
+                day_params.insert(0, _fts_query(q))
+            sql = f"SELECT id, timestamp, level, module, message, traceback FROM {TABLE_PREFIX}{day}"
+            if day_where:
+                sql += " WHERE " + " AND ".join(day_where)
+            sql += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+            db.execute(sql, day_params + [limit + 1 - len(rows)])
+            rows.extend(dict(row) for row in db.fetchall())
+            if len(rows) > limit:
+                break
+    finally:
+        conn.close()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = f"{rows[-1]['timestamp']}|{rows[-1]['id']}"
+    return {"logs": rows, "next_cursor": next_cursor}
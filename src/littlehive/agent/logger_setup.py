@@ -1,9 +1,24 @@
 import logging
-import sqlite3
 import queue
+import time
 from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
-from littlehive.agent.paths import DB_PATH
+from littlehive.agent.paths import TELEMETRY_DB_PATH
+from littlehive.agent.db import get_connection
+from littlehive.agent.log_store import ensure_day, day_key, write_rows, drop_days
+
+# A batch is written when it reaches BATCH_SIZE records or its oldest record
+# has waited FLUSH_INTERVAL_SECONDS, whichever comes first
+BATCH_SIZE = 200
+FLUSH_INTERVAL_SECONDS = 0.5
+# Past BACKLOG_HIGH_WATER queued records the writer is falling behind: DEBUG
+# records are thinned to one in DEBUG_SAMPLE_RATE until the backlog is back
+# under BACKLOG_LOW_WATER
+BACKLOG_HIGH_WATER = 5000
+BACKLOG_LOW_WATER = 500
+DEBUG_SAMPLE_RATE = 10
+
+_EMPTY = object()
 
 
 class SQLiteHandler(logging.Handler):
@@ -13,45 +28,126 @@ class SQLiteHandler(logging.Handler):
         self._init_db()
 
     def _init_db(self):
-        # Initialize the table synchronously when the handler is created
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS system_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                level TEXT,
-                module TEXT,
-                message TEXT,
-                traceback TEXT
-            )
-        """)
+        # Create the file and today's log table synchronously when the
+        # handler is created, so readers can attach it straight away
+        conn = get_connection(path=self.db_path)
+        ensure_day(conn.cursor(), day_key(datetime.now().isoformat()))
         conn.commit()
         conn.close()
 
+    def _row(self, record):
+        # We want isoformat strings for easier sorting
+        return (
+            datetime.fromtimestamp(record.created).isoformat(),
+            record.levelname,
+            record.module,
+            self.format(record),
+            record.exc_text if record.exc_text else "",
+        )
+
     def emit(self, record):
+        self.emit_batch([record])
+
+    def emit_batch(self, records):
+        """Writes records with one executemany per day table and a single commit."""
+        rows = []
+        for record in records:
+            try:
+                rows.append(self._row(record))
+            except Exception:
+                self.handleError(record)
+        if not rows:
+            return
         try:
-            # We want isoformat strings for easier sorting
-            timestamp = datetime.fromtimestamp(record.created).isoformat()
-            level = record.levelname
-            module = record.module
-            message = self.format(record)
-            traceback = record.exc_text if record.exc_text else ""
-
-            # Open a short-lived connection per emit
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO system_logs (timestamp, level, module, message, traceback)
-                VALUES (?, ?, ?, ?, ?)
-            """,
-                (timestamp, level, module, message, traceback),
-            )
-            conn.commit()
-            conn.close()
+            # The listener thread reuses its pooled connection across batches
+            conn = get_connection(path=self.db_path)
+            try:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                write_rows(cursor, rows)
+                conn.commit()
+            finally:
+                conn.close()
         except Exception:
-            self.handleError(record)
+            self.handleError(records[-1])
+
+
+class BatchingQueueListener(QueueListener):
+    """
+    QueueListener that drains the queue in chunks and hands each chunk to
+    the handler's emit_batch(), so the writer thread pays for one
+    transaction per batch instead of one per record.
+    """
+
+    def __init__(self, queue, handler, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL_SECONDS):
+        super().__init__(queue, handler, respect_handler_level=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._debug_seen = 0
+        self._behind = False
+
+    def _keep(self, record) -> bool:
+        if record.levelno > logging.DEBUG or not self._behind:
+            return True
+        self._debug_seen += 1
+        if self._debug_seen % DEBUG_SAMPLE_RATE == 0:
+            return True
+        self.dropped += 1
+        return False
+
+    def _flush(self, batch):
+        for handler in self.handlers:
+            records = [r for r in batch if r.levelno >= handler.level and handler.filter(r)]
+            if records:
+                handler.emit_batch(records)
+
+    def _monitor(self):
+        q = self.queue
+        has_task_done = hasattr(q, "task_done")
+        batch = []
+        deadline = None
+        dropped_before = 0
+        stopping = False
+        while not stopping:
+            timeout = None if not batch else max(0.0, deadline - time.monotonic())
+            try:
+                record = q.get(True, timeout)
+            except queue.Empty:
+                record = _EMPTY
+            backlog = q.qsize()
+            if backlog > BACKLOG_HIGH_WATER and not self._behind:
+                self._behind = True
+                dropped_before = self.dropped
+            elif backlog < BACKLOG_LOW_WATER and self._behind:
+                self._behind = False
+                # Reported once the backlog has cleared, so the warning itself
+                # isn't stuck behind the records it is about
+                if self.dropped > dropped_before:
+                    logging.getLogger("littlehive").warning(
+                        f"[Logger] Dropped {self.dropped - dropped_before} DEBUG records while the log writer was behind."
+                    )
+            # Not None: that is the listener's own stop sentinel
+            while record is not _EMPTY:
+                if has_task_done:
+                    q.task_done()
+                if record is self._sentinel:
+                    stopping = True
+                    break
+                if self._keep(record):
+                    if not batch:
+                        deadline = time.monotonic() + self.flush_interval
+                    batch.append(record)
+                    if len(batch) >= self.batch_size:
+                        break
+                try:
+                    record = q.get_nowait()
+                except queue.Empty:
+                    record = _EMPTY
+
+            if batch and (stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
 
 
 def setup_logger():
@@ -62,8 +158,9 @@ def setup_logger():
 
     # We only add handlers if they aren't already added (avoid duplicate logs)
     if not logger.handlers:
-        # 1. Create the SQLite handler (writes to DB)
-        sqlite_handler = SQLiteHandler(DB_PATH)
+        # 1. Create the SQLite handler (writes to the telemetry DB, so log
+        # bursts never hold the main database's write lock)
+        sqlite_handler = SQLiteHandler(TELEMETRY_DB_PATH)
         formatter = logging.Formatter("%(message)s")
         sqlite_handler.setFormatter(formatter)
 
@@ -72,9 +169,10 @@ def setup_logger():
         log_queue = queue.Queue(-1)
         queue_handler = QueueHandler(log_queue)
 
-        # 3. Create a QueueListener that reads from the queue and writes via sqlite_handler
-        # It runs in its own background thread automatically
-        listener = QueueListener(log_queue, sqlite_handler)
+        # 3. Create a listener that drains the queue in batches and writes them
+        # via sqlite_handler. It runs in its own background thread; stop()
+        # flushes whatever is still pending.
+        listener = BatchingQueueListener(log_queue, sqlite_handler)
         listener.start()
 
         # 4. Attach the queue_handler to the logger
@@ -96,29 +194,13 @@ def setup_logger():
     return logger
 
 
-def prune_logs(days_to_keep=7, max_records=10000):
+def prune_logs(days_to_keep=7, max_records=None):
     """
-    Background job to prune logs older than `days_to_keep` or keep only `max_records`.
+    Background job to drop logs older than `days_to_keep` days, and the
+    oldest whole days beyond `max_records` rows if given.
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        # Delete by count (keep only top N latest)
-        cursor.execute(
-            """
-            DELETE FROM system_logs 
-            WHERE id NOT IN (
-                SELECT id FROM system_logs 
-                ORDER BY id DESC 
-                LIMIT ?
-            )
-        """,
-            (max_records,),
-        )
-
-        conn.commit()
-        conn.close()
+        drop_days(days_to_keep, max_records)
     except Exception as e:
         # Fallback to standard print if DB pruning fails
         print(f"[Prune Error] Failed to prune logs: {e}")
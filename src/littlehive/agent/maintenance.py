@@ -0,0 +1,320 @@
+"""
+Online Database Maintenance
+Keeps littlehive.db compact and its query plans fresh without stalling the
+brain: every step is short and commits on its own, so other writers only
+ever wait for one step (well under busy_timeout), never for a whole pass.
+
+    optimize()              PRAGMA optimize (cheap; hourly)
+    analyze()               ANALYZE with a sampling limit
+    incremental_vacuum()    frees pages a few hundred at a time
+    merge_fts()             incremental FTS5 merges, one bounded step at a time
+    prune_telemetry()       retention for the telemetry database
+    run_maintenance()       the nightly pass over all of the above
+    table_sizes()           per-table rows and bytes, for the dashboard
+
+Each step covers both database files: main and the attached telemetry DB.
+Incremental vacuum needs auto_vacuum=INCREMENTAL, which db.py sets on new
+database files. Older files are converted once, by a full VACUUM during
+the nightly pass (it runs inside the DND window). A VACUUM holds the write
+lock throughout, so files over db_vacuum_convert_max_mb are left for
+`lhive db vacuum`, run with the agent stopped.
+"""
+
+import os
+import time
+import logging
+from datetime import datetime
+
+from littlehive.agent.paths import DB_PATH, TELEMETRY_DB_PATH
+from littlehive.agent.db import get_connection, TELEMETRY_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+# 1 MB per step at the default 4 KB page size
+VACUUM_STEP_PAGES = 256
+FTS_MERGE_PAGES = 200
+# Gap between steps, so queued writers get the lock
+STEP_PAUSE_SECONDS = 0.05
+# Rows ANALYZE samples per index; keeps it to milliseconds on large tables
+ANALYSIS_LIMIT = 1000
+FTS_TABLES = ("cached_emails_fts", "chat_archive")
+
+AUTO_VACUUM_INCREMENTAL = 2
+DATABASES = {"main": DB_PATH, TELEMETRY_SCHEMA: TELEMETRY_DB_PATH}
+
+# Outcome of the latest nightly pass, for /api/db-stats
+last_maintenance = {}
+
+
+def optimize():
+    conn = get_connection()
+    conn.execute("PRAGMA optimize")
+    conn.close()
+
+
+def analyze():
+    conn = get_connection()
+    conn.execute(f"PRAGMA analysis_limit={ANALYSIS_LIMIT}")
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+
+def _pragma(conn, name: str, schema: str = "main") -> int:
+    return conn.execute(f"PRAGMA {schema}.{name}").fetchone()[0]
+
+
+def _attached(conn) -> list:
+    """Schemas of DATABASES actually open on this connection."""
+    return [row[1] for row in conn.execute("PRAGMA database_list").fetchall() if row[1] in DATABASES]
+
+
+def _checkpoint(conn):
+    # Vacuumed pages pass through the WAL; truncate it so the space is
+    # returned to the filesystem too
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+
+def enable_incremental_vacuum(max_bytes: int = None) -> list:
+    """
+    Converts database files created before auto_vacuum=INCREMENTAL was set.
+    This is a full VACUUM of each and holds its write lock until it
+    finishes, so files larger than `max_bytes` are skipped with a warning.
+    Returns the schemas that were converted.
+    """
+    from littlehive.agent.local_cache import rebuild_email_index
+
+    conn = get_connection()
+    converted = []
+    try:
+        for schema in _attached(conn):
+            if _pragma(conn, "auto_vacuum", schema) == AUTO_VACUUM_INCREMENTAL:
+                continue
+            size = _file_bytes(DATABASES[schema])
+            if max_bytes is not None and size > max_bytes:
+                logger.warning(
+                    f"[Maintenance] {schema} database ({size // 2**20} MB) is too large to convert "
+                    f"to incremental auto-vacuum online; stop the agent and run: lhive db vacuum"
+                )
+                continue
+            logger.info(f"[Maintenance] Converting {schema} database to incremental auto-vacuum (one-off VACUUM).")
+            conn.execute(f"PRAGMA {schema}.auto_vacuum=INCREMENTAL")
+            conn.execute(f"VACUUM {schema}")
+            converted.append(schema)
+        if converted:
+            _checkpoint(conn)
+    finally:
+        conn.close()
+    if "main" in converted:
+        # VACUUM may renumber the implicit rowids the email FTS index is keyed by
+        rebuild_email_index()
+    return converted
+
+
+def incremental_vacuum(budget_seconds: float) -> int:
+    """Frees pages in VACUUM_STEP_PAGES steps until done or out of time. Returns pages freed."""
+    conn = get_connection()
+    freed = 0
+    try:
+        deadline = time.monotonic() + budget_seconds
+        for schema in _attached(conn):
+            if _pragma(conn, "auto_vacuum", schema) != AUTO_VACUUM_INCREMENTAL:
+                continue
+            while time.monotonic() < deadline:
+                before = _pragma(conn, "freelist_count", schema)
+                if before == 0:
+                    break
+                # executescript steps the pragma to completion; execute() stops
+                # after the first page since it returns no rows
+                conn.executescript(f"PRAGMA {schema}.incremental_vacuum({VACUUM_STEP_PAGES});")
+                freed += before - _pragma(conn, "freelist_count", schema)
+                time.sleep(STEP_PAUSE_SECONDS)
+        if freed:
+            _checkpoint(conn)
+    finally:
+        conn.close()
+    return freed
+
+
+def prune_telemetry():
+    """
+    Retention for the telemetry tables: log_retention_days for the system
+    logs (whole day tables are dropped), telemetry_retention_days for the
+    rest (user_actions never drops below the anticipation mining lookback).
+    tool_failure_memory keeps its own cleanup in self_healing.
+    """
+    from littlehive.agent.config import get_config
+    from littlehive.agent.log_store import drop_days
+
+    config = get_config()
+    log_days = config.get("log_retention_days", 7)
+    days = config.get("telemetry_retention_days", 90)
+    action_days = max(days, config.get("anticipation_mining_lookback_days", 30))
+    drop_days(log_days)
+    conn = get_connection()
+    cursor = conn.cursor()
+    for table, column, keep in (
+        ("user_actions", "timestamp", action_days),
+        ("shell_audit_log", "executed_at", days),
+        ("anticipation_log", "suggested_at", days),
+    ):
+        cursor.execute(
+            f"DELETE FROM {table} WHERE datetime({column}) <= datetime('now', 'localtime', ?)",
+            (f"-{keep} days",),
+        )
+    conn.commit()
+    conn.close()
+
+
+def merge_fts(budget_seconds: float) -> dict:
+    """
+    Merges FTS5 index segments a bounded number of pages at a time (the
+    incremental form of 'optimize'). A step that leaves the segment count
+    unchanged means the index is fully merged. Returns {table: steps run}.
+    """
+    conn = get_connection()
+    steps = {}
+    try:
+        deadline = time.monotonic() + budget_seconds
+        for table in FTS_TABLES:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)
+            ).fetchone()
+            if not exists:
+                continue
+            steps[table] = 0
+            count_sql = f"SELECT COUNT(*) FROM {table}_data"
+            segments = conn.execute(count_sql).fetchone()[0]
+            while time.monotonic() < deadline:
+                # Negative: merge even when below the automerge threshold
+                conn.execute(
+                    f"INSERT INTO {table}({table}, rank) VALUES ('merge', ?)",
+                    (-FTS_MERGE_PAGES,),
+                )
+                conn.commit()
+                steps[table] += 1
+                remaining = conn.execute(count_sql).fetchone()[0]
+                if remaining == segments:
+                    break
+                segments = remaining
+                time.sleep(STEP_PAUSE_SECONDS)
+    finally:
+        conn.close()
+    return steps
+
+
+def run_maintenance(budget_seconds: float = None) -> dict:
+    """Nightly pass: stats, FTS merges and reclaiming free pages, within roughly `budget_seconds`."""
+    from littlehive.agent.config import get_config
+
+    config = get_config()
+    if budget_seconds is None:
+        budget_seconds = config.get("db_maintenance_seconds", 20)
+    start = time.monotonic()
+    size_before = _file_bytes()
+    result = {"started_at": datetime.now().isoformat(timespec="seconds")}
+
+    result["converted"] = enable_incremental_vacuum(config.get("db_vacuum_convert_max_mb", 64) * 2**20)
+    analyze()
+    result["fts_merge_steps"] = merge_fts(budget_seconds / 2)
+    remaining = max(0.0, budget_seconds - (time.monotonic() - start))
+    result["pages_freed"] = incremental_vacuum(remaining)
+    optimize()
+
+    result["duration_ms"] = round((time.monotonic() - start) * 1000, 1)
+    result["bytes_before"] = size_before
+    result["bytes_after"] = _file_bytes()
+    last_maintenance.clear()
+    last_maintenance.update(result)
+    logger.info(
+        f"[Maintenance] DB maintenance done in {result['duration_ms']} ms: "
+        f"{result['pages_freed']} pages freed, "
+        f"{size_before - result['bytes_after']} bytes reclaimed."
+    )
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Size telemetry
+# ---------------------------------------------------------------------------
+
+def _file_bytes(path: str = None) -> int:
+    total = 0
+    for db_path in ([path] if path else DATABASES.values()):
+        for suffix in ("", "-wal"):
+            try:
+                total += os.path.getsize(db_path + suffix)
+            except OSError:
+                pass
+    return total
+
+
+def table_sizes() -> dict:
+    """
+    Row counts and on-disk bytes per table, for each database file. Index
+    bytes are folded into their table, FTS shadow tables into their virtual
+    table, and the day tables of the system logs into one "system_logs"
+    entry. Bytes are None when SQLite was built without the dbstat table.
+    """
+    from littlehive.agent.log_store import FTS_PREFIX, partition_of
+
+    conn = get_connection(readonly=True)
+    databases = {}
+    tables = []
+    try:
+        cursor = conn.cursor()
+        for db in _attached(conn):
+            cursor.execute(f"SELECT type, name, tbl_name, sql FROM {db}.sqlite_master")
+            schema = cursor.fetchall()
+            virtual = [name for kind, name, _, sql in schema
+                       if kind == "table" and (sql or "").upper().startswith("CREATE VIRTUAL")]
+            owner = {}
+            for kind, name, tbl_name, _ in schema:
+                if kind not in ("table", "index"):
+                    continue
+                parent = tbl_name
+                for vt in virtual:
+                    if parent.startswith(vt + "_"):
+                        parent = vt
+                        break
+                owner[name] = partition_of(parent) or parent
+
+            sizes = {}
+            for name, parent in owner.items():
+                if parent != (partition_of(name) or name):
+                    continue
+                entry = sizes.setdefault(parent, {"name": parent, "database": db, "rows": None, "bytes": None})
+                if name.startswith(FTS_PREFIX):
+                    # Counted through its day table
+                    continue
+                try:
+                    cursor.execute(f'SELECT COUNT(*) FROM {db}."{name}"')
+                    entry["rows"] = (entry["rows"] or 0) + cursor.fetchone()[0]
+                except Exception:
+                    pass
+
+            try:
+                cursor.execute("SELECT name, pgsize FROM dbstat(?) WHERE aggregate = TRUE", (db,))
+                for name, size in cursor.fetchall():
+                    parent = owner.get(name, name)
+                    if parent in sizes:
+                        sizes[parent]["bytes"] = (sizes[parent]["bytes"] or 0) + size
+            except Exception:
+                pass
+            tables.extend(sizes.values())
+
+            page_size = _pragma(conn, "page_size", db)
+            databases[db] = {
+                "file_bytes": _file_bytes(DATABASES[db]),
+                "page_size": page_size,
+                "page_count": _pragma(conn, "page_count", db),
+                "free_bytes": _pragma(conn, "freelist_count", db) * page_size,
+                "auto_vacuum": {0: "none", 1: "full", 2: "incremental"}.get(
+                    _pragma(conn, "auto_vacuum", db)
+                ),
+            }
+    finally:
+        conn.close()
+
+    tables.sort(key=lambda t: t["bytes"] or 0, reverse=True)
+    return {"databases": databases, "tables": tables}
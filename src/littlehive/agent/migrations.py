@@ -0,0 +1,651 @@
+"""
+Schema Migrations
+Owns the schema of the shared database. Each migration is applied once, in
+version order, inside its own IMMEDIATE transaction, and recorded in the
+schema_version table, so a concurrent process waits instead of applying it
+twice.
+
+Modules that use the database call run_migrations() where they used to
+create their own tables; after the first call in a process it is a set
+lookup.
+
+Databases created before this runner existed start at version 0 in
+whatever state the old per-module initializers left them, so migration 1
+only uses CREATE ... IF NOT EXISTS and tolerant ALTERs. Later migrations
+can assume the schema of the version before them.
+
+To change the schema, append a function to MIGRATIONS; never edit one that
+has shipped. Migrations don't call into the modules that own the tables:
+any logic they need is copied here as it was when the migration shipped,
+so later changes to those modules can't change what an old migration does.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+from littlehive.agent.paths import DB_PATH
+from littlehive.agent.db import get_connection
+
+logger = logging.getLogger(__name__)
+
+_migrated = set()
+_lock = threading.Lock()
+
+
+def _add_columns(cursor, table: str, columns: tuple):
+    """ALTER TABLE ADD COLUMN, skipping columns that already exist."""
+    for column in columns:
+        try:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+        except sqlite3.OperationalError:
+            pass
+
+
+# ---------------------------------------------------------------------------
+# Migrations
+# ---------------------------------------------------------------------------
+
+def _m001_baseline(cursor):
+    """Every table the per-module initializers used to create."""
+    # --- Memory ---
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS core_memory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fact_text TEXT NOT NULL,
+            timestamp DATETIME DEFAULT (datetime('now', 'localtime'))
+        )
+    """)
+    # Archival memory for chat history (FTS5 for fast search)
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS chat_archive USING fts5(
+            role,
+            content,
+            timestamp UNINDEXED
+        )
+    """)
+
+    # --- Reminders, bills, contacts, task queue ---
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task TEXT NOT NULL,
+            deadline TEXT NOT NULL,
+            next_notification TEXT NOT NULL,
+            status TEXT DEFAULT 'pending'
+        )
+    """)
+    _add_columns(cursor, "reminders", ("priority TEXT DEFAULT 'normal'",))
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS bills (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            vendor TEXT NOT NULL,
+            amount REAL NOT NULL,
+            due_date TEXT,
+            invoice_number TEXT,
+            status TEXT DEFAULT 'pending',
+            date_added TEXT
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stakeholders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            alias TEXT,
+            email TEXT,
+            phone TEXT,
+            telegram TEXT,
+            relationship TEXT,
+            preferences TEXT,
+            date_added TEXT
+        )
+    """)
+    _add_columns(cursor, "stakeholders", ("auto_respond INTEGER DEFAULT 0",))
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pending_tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tool_name TEXT NOT NULL,
+            arguments TEXT NOT NULL,
+            status TEXT DEFAULT 'queued',
+            retry_count INTEGER DEFAULT 0,
+            next_run_at DATETIME,
+            created_at DATETIME DEFAULT (datetime('now', 'localtime')),
+            error_message TEXT
+        )
+    """)
+
+    # --- API cache ---
+    # Cached Emails (email_cache_retention_days of headers and snippets)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cached_emails (
+            id TEXT PRIMARY KEY,
+            thread_id TEXT,
+            sender TEXT,
+            subject TEXT,
+            snippet TEXT,
+            date TEXT,
+            is_read BOOLEAN,
+            timestamp_ms INTEGER
+        )
+    """)
+    _add_columns(
+        cursor, "cached_emails",
+        ("recipients TEXT", "labels TEXT", "has_attachment INTEGER DEFAULT 0"),
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cached_emails_timestamp ON cached_emails(timestamp_ms)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cached_emails_thread ON cached_emails(thread_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cached_emails_sender ON cached_emails(sender)")
+
+    # Full bodies of emails that were read or prefetched, zlib-compressed.
+    # Message content never changes for a given ID, so entries are only
+    # ever evicted (least recently read first), never invalidated.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS email_bodies (
+            id TEXT PRIMARY KEY,
+            sender TEXT,
+            subject TEXT,
+            body BLOB,
+            body_source TEXT,
+            size INTEGER,
+            last_access INTEGER
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_bodies_access ON email_bodies(last_access)")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cached_events (
+            id TEXT PRIMARY KEY,
+            summary TEXT,
+            start_time TEXT,
+            end_time TEXT,
+            description TEXT,
+            attendees TEXT,
+            hangout_link TEXT
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cached_tasks (
+            id TEXT PRIMARY KEY,
+            list_id TEXT,
+            title TEXT,
+            notes TEXT,
+            status TEXT,
+            due TEXT,
+            updated TEXT
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_state (
+            service TEXT PRIMARY KEY,
+            last_sync_timestamp INTEGER,
+            last_history_id TEXT
+        )
+    """)
+
+    # --- Tools ---
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS custom_apis (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            url TEXT NOT NULL,
+            method TEXT DEFAULT 'GET',
+            headers TEXT DEFAULT '{}',
+            body_template TEXT DEFAULT '',
+            description TEXT DEFAULT '',
+            created_at DATETIME DEFAULT (datetime('now', 'localtime'))
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS shell_audit_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            command TEXT NOT NULL,
+            working_dir TEXT DEFAULT '',
+            status TEXT NOT NULL,
+            output_summary TEXT DEFAULT '',
+            executed_at DATETIME DEFAULT (datetime('now', 'localtime'))
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS internal_todos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            notes TEXT DEFAULT '',
+            status TEXT DEFAULT 'needsAction',
+            due TEXT DEFAULT '',
+            created_at DATETIME DEFAULT (datetime('now', 'localtime')),
+            updated_at DATETIME DEFAULT (datetime('now', 'localtime'))
+        )
+    """)
+
+    # --- Anticipation engine ---
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_actions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME DEFAULT (datetime('now', 'localtime')),
+            hour INTEGER,
+            minute INTEGER,
+            day_of_week INTEGER,
+            day_of_month INTEGER,
+            tool_name TEXT NOT NULL,
+            action_category TEXT,
+            entities TEXT DEFAULT '[]',
+            turn_id TEXT,
+            session_position INTEGER DEFAULT 0,
+            source TEXT DEFAULT 'web'
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS action_patterns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pattern_type TEXT NOT NULL,
+            pattern_key TEXT NOT NULL UNIQUE,
+            description TEXT,
+            frequency INTEGER DEFAULT 1,
+            total_opportunities INTEGER DEFAULT 1,
+            confidence REAL DEFAULT 0.0,
+            last_matched DATETIME,
+            first_seen DATETIME DEFAULT (datetime('now', 'localtime')),
+            predicted_action TEXT,
+            trigger_conditions TEXT,
+            is_active BOOLEAN DEFAULT 1,
+            user_confirmed BOOLEAN DEFAULT 0
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS anticipation_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pattern_id INTEGER,
+            suggestion_text TEXT,
+            confidence REAL,
+            suggested_at DATETIME DEFAULT (datetime('now', 'localtime')),
+            user_response TEXT DEFAULT 'pending',
+            FOREIGN KEY (pattern_id) REFERENCES action_patterns(id)
+        )
+    """)
+
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_user_actions_timestamp ON user_actions(timestamp)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_user_actions_category ON user_actions(action_category, day_of_week, hour)"
+    )
+
+    # --- Self-healing engine ---
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tool_failure_memory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tool_name TEXT NOT NULL,
+            error_type TEXT,
+            error_signature TEXT,
+            args_hash TEXT,
+            occurrence_count INTEGER DEFAULT 1,
+            first_seen DATETIME DEFAULT (datetime('now', 'localtime')),
+            last_seen DATETIME DEFAULT (datetime('now', 'localtime')),
+            resolution TEXT,
+            is_recurring BOOLEAN DEFAULT 0
+        )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_failure_memory_tool ON tool_failure_memory(tool_name, args_hash)"
+    )
+
+
+def _m002_email_fts(cursor):
+    """Full-text index over the searchable email headers (see gmail_query.py)."""
+    # External content: the text lives once, in cached_emails, and the
+    # triggers keep the index in step. It is keyed by the implicit rowid,
+    # which a full VACUUM may renumber, so run rebuild_email_index() after one.
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS cached_emails_fts USING fts5(
+            sender, recipients, subject, snippet,
+            content='cached_emails', content_rowid='rowid'
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS cached_emails_fts_insert AFTER INSERT ON cached_emails BEGIN
+            INSERT INTO cached_emails_fts(rowid, sender, recipients, subject, snippet)
+            VALUES (new.rowid, new.sender, new.recipients, new.subject, new.snippet);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS cached_emails_fts_delete AFTER DELETE ON cached_emails BEGIN
+            INSERT INTO cached_emails_fts(cached_emails_fts, rowid, sender, recipients, subject, snippet)
+            VALUES ('delete', old.rowid, old.sender, old.recipients, old.subject, old.snippet);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS cached_emails_fts_update
+        AFTER UPDATE OF sender, recipients, subject, snippet ON cached_emails BEGIN
+            INSERT INTO cached_emails_fts(cached_emails_fts, rowid, sender, recipients, subject, snippet)
+            VALUES ('delete', old.rowid, old.sender, old.recipients, old.subject, old.snippet);
+            INSERT INTO cached_emails_fts(rowid, sender, recipients, subject, snippet)
+            VALUES (new.rowid, new.sender, new.recipients, new.subject, new.snippet);
+        END
+    """)
+    cursor.execute("INSERT INTO cached_emails_fts(cached_emails_fts) VALUES ('rebuild')")
+
+
+def _m003_epoch(value: str) -> int:
+    """local_cache.to_epoch() as of migration 3."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.astimezone()
+    return int(parsed.timestamp())
+
+
+def _m003_event_span(start: str, end: str) -> tuple:
+    """local_cache._event_span() as of migration 3: (start_ts, end_ts, all_day)."""
+    all_day = bool(start) and len(start) == 10
+    try:
+        start_ts = _m003_epoch(start) if start else None
+        end_ts = _m003_epoch(end) if end else start_ts
+    except ValueError:
+        return None, None, int(all_day)
+    return start_ts, end_ts, int(all_day)
+
+
+def _m003_event_epochs(cursor):
+    """UTC epoch start/end for cached events, backfilled, behind a range index."""
+    # The raw start/end strings mix offsets, "Z" and all-day dates, so they
+    # neither compare correctly nor use an index
+    _add_columns(
+        cursor, "cached_events",
+        ("start_ts INTEGER", "end_ts INTEGER", "all_day INTEGER DEFAULT 0"),
+    )
+    cursor.execute("SELECT id, start_time, end_time FROM cached_events WHERE start_ts IS NULL")
+    stale = cursor.fetchall()
+    if stale:
+        cursor.executemany(
+            "UPDATE cached_events SET start_ts = ?, end_ts = ?, all_day = ? WHERE id = ?",
+            [(*_m003_event_span(r["start_time"], r["end_time"]), r["id"]) for r in stale],
+        )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cached_events_span ON cached_events(start_ts, end_ts)")
+
+
+def _m004_hot_query_indexes(cursor):
+    """Indexes for the queries the scheduler and tools run on every poll."""
+    # poll_due_reminders compares datetime(next_notification): reminder
+    # times keep the offset they were set with, so the raw text does not
+    # sort chronologically. Index the same expression the query uses.
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_reminders_due "
+        "ON reminders(status, datetime(next_notification))"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_pending_tasks_due ON pending_tasks(status, next_run_at)"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_bills_status_due ON bills(status, due_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cached_tasks_updated ON cached_tasks(updated)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_anticipation_log_pattern "
+        "ON anticipation_log(pattern_id, suggested_at)"
+    )
+
+
+# High-churn tables that live in telemetry.db (attached as "telemetry")
+TELEMETRY_TABLES = (
+    "system_logs",
+    "user_actions",
+    "shell_audit_log",
+    "tool_failure_memory",
+    "anticipation_log",
+)
+
+_CREATE_PREFIX = re.compile(
+    r"^\s*CREATE\s+(UNIQUE\s+)?(TABLE|INDEX)\s+(?:IF\s+NOT\s+EXISTS\s+)?", re.I
+)
+
+
+def _in_schema(sql: str, schema: str) -> str:
+    """Rewrites a stored CREATE TABLE/INDEX statement to target `schema`."""
+    return _CREATE_PREFIX.sub(
+        lambda m: f"CREATE {m.group(1) or ''}{m.group(2).upper()} IF NOT EXISTS {schema}.",
+        sql,
+        count=1,
+    )
+
+
+def _m005_split_telemetry(cursor):
+    """Moves logs and action history out of the main database file."""
+    from littlehive.agent.db import TELEMETRY_SCHEMA
+
+    for table in TELEMETRY_TABLES:
+        cursor.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,))
+        row = cursor.fetchone()
+        if row is None:
+            continue
+        cursor.execute(
+            "SELECT sql FROM main.sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table,),
+        )
+        indexes = [r[0] for r in cursor.fetchall()]
+
+        cursor.execute(
+            f"SELECT 1 FROM {TELEMETRY_SCHEMA}.sqlite_master WHERE type = 'table' AND name = ?",
+            (table,),
+        )
+        if cursor.fetchone():
+            # Already created there (the log handler makes system_logs on
+            # startup): append the old rows under new ids
+            cursor.execute(f"PRAGMA main.table_info({table})")
+            columns = ", ".join(r["name"] for r in cursor.fetchall() if r["name"] != "id")
+            cursor.execute(
+                f"INSERT INTO {TELEMETRY_SCHEMA}.{table} ({columns}) "
+                f"SELECT {columns} FROM main.{table} ORDER BY id"
+            )
+        else:
+            cursor.execute(_in_schema(row["sql"], TELEMETRY_SCHEMA))
+            cursor.execute(f"INSERT INTO {TELEMETRY_SCHEMA}.{table} SELECT * FROM main.{table}")
+
+        cursor.execute(f"DROP TABLE main.{table}")
+        for sql in indexes:
+            cursor.execute(_in_schema(sql, TELEMETRY_SCHEMA))
+
+
+def _m006_ensure_day(cursor, schema: str, day: str):
+    """log_store.ensure_day() as of migration 6."""
+    table = f"system_logs_{day}"
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {schema}.{table} (
+            id INTEGER PRIMARY KEY,
+            timestamp TEXT,
+            level TEXT,
+            module TEXT,
+            message TEXT,
+            traceback TEXT
+        )
+    """)
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_{table}_timestamp ON {table}(timestamp)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_{table}_level ON {table}(level, timestamp)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_{table}_module ON {table}(module, timestamp)")
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {schema}.system_logs_fts_{day} USING fts5(
+            message, content='{table}', content_rowid='id'
+        )
+    """)
+
+
+def _m006_log_partitions(cursor):
+    """Splits telemetry.system_logs into day tables (see log_store.py)."""
+    from littlehive.agent.db import TELEMETRY_SCHEMA
+
+    cursor.execute(
+        f"SELECT 1 FROM {TELEMETRY_SCHEMA}.sqlite_master WHERE type = 'table' AND name = 'system_logs'"
+    )
+    if not cursor.fetchone():
+        return
+    # Rows without a parseable date have no day to go to and are dropped
+    cursor.execute(
+        f"SELECT DISTINCT substr(timestamp, 1, 10) FROM {TELEMETRY_SCHEMA}.system_logs "
+        "WHERE timestamp GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'"
+    )
+    for (date,) in cursor.fetchall():
+        day = date.replace("-", "")
+        table = f"{TELEMETRY_SCHEMA}.system_logs_{day}"
+        _m006_ensure_day(cursor, TELEMETRY_SCHEMA, day)
+        # The writer may already have started this day's table: append under new ids
+        cursor.execute(f"SELECT IFNULL(MAX(id), 0) FROM {table}")
+        after = cursor.fetchone()[0]
+        cursor.execute(
+            f"INSERT INTO {table} (timestamp, level, module, message, traceback) "
+            f"SELECT timestamp, level, module, message, traceback FROM {TELEMETRY_SCHEMA}.system_logs "
+            "WHERE substr(timestamp, 1, 10) = ? ORDER BY id",
+            (date,),
+        )
+        cursor.execute(
+            f"INSERT INTO {TELEMETRY_SCHEMA}.system_logs_fts_{day}(rowid, message) "
+            f"SELECT id, message FROM {table} WHERE id > ?",
+            (after,),
+        )
+    cursor.execute(f"DROP TABLE {TELEMETRY_SCHEMA}.system_logs")
+
+
+def _m007_fact_embeddings(cursor):
+    """Stored core_memory embeddings (see memory_tools.save_core_fact)."""
+    # Normalized float16 vector, or NULL until memory_tools backfills it
+    _add_columns(cursor, "core_memory", ("embedding BLOB",))
+    # Editing a fact (the dashboard does) invalidates its vector
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS core_memory_embedding_stale
+        AFTER UPDATE OF fact_text ON core_memory
+        BEGIN
+            UPDATE core_memory SET embedding = NULL WHERE id = new.id;
+        END
+    """)
+
+
+def _m008_archive_vectors(cursor):
+    """Chunk embeddings of chat_archive messages (see archive_index.py)."""
+    # message_id is the chat_archive rowid; embedding is int8, unit vector * 127
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS chat_archive_vectors (
+            id INTEGER PRIMARY KEY,
+            message_id INTEGER NOT NULL,
+            chunk INTEGER NOT NULL,
+            embedding BLOB NOT NULL,
+            UNIQUE (message_id, chunk)
+        )
+    """)
+
+
+def _m009_archive_hash(role: str, content: str) -> bytes:
+    """archive_index.archive_hash() as of migration 9."""
+    return hashlib.sha1(f"{role}\0{content}".encode("utf-8", "surrogatepass")).digest()
+
+
+def _m009_archive_hashes(cursor):
+    """Content hashes of chat_archive messages, for archive_messages dedup."""
+    # FTS5 columns have no B-tree index; this makes "already archived?" a lookup
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS chat_archive_hashes (hash BLOB PRIMARY KEY) WITHOUT ROWID"
+    )
+    cursor.execute("SELECT role, content FROM chat_archive")
+    cursor.executemany(
+        "INSERT OR IGNORE INTO chat_archive_hashes (hash) VALUES (?)",
+        ((_m009_archive_hash(role, content),) for role, content in cursor.fetchall()),
+    )
+
+
+def _m010_long_events(cursor):
+    """Partial index over events longer than a day (see local_cache.MAX_EVENT_SECONDS)."""
+    # The overlap lookups only range-scan a day back from their window;
+    # the rare longer events (conferences, multi-day all-day blocks) are
+    # found through this index instead. Queries must repeat the predicate
+    # verbatim for SQLite to use it.
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_cached_events_long ON cached_events(start_ts) "
+        "WHERE end_ts - start_ts > 86400"
+    )
+
+
+MIGRATIONS = [
+    (1, "baseline schema", _m001_baseline),
+    (2, "email full-text index", _m002_email_fts),
+    (3, "calendar epoch columns", _m003_event_epochs),
+    (4, "hot query indexes", _m004_hot_query_indexes),
+    (5, "telemetry tables to telemetry.db", _m005_split_telemetry),
+    (6, "day-partitioned system logs", _m006_log_partitions),
+    (7, "core fact embeddings", _m007_fact_embeddings),
+    (8, "chat archive vectors", _m008_archive_vectors),
+    (9, "chat archive content hashes", _m009_archive_hashes),
+    (10, "long event index", _m010_long_events),
+]
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def schema_version(path: str = None) -> int:
+    """Highest migration applied to the database at `path` (0 if none)."""
+    conn = get_connection(path=path)
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    finally:
+        conn.close()
+    return row[0] or 0
+
+
+def run_migrations(path: str = None) -> int:
+    """
+    Applies any pending migrations to the database at `path` (the main
+    database by default) and returns the resulting schema version.
+    """
+    path = path or DB_PATH
+    if path in _migrated:
+        return MIGRATIONS[-1][0]
+
+    with _lock:
+        if path in _migrated:
+            return MIGRATIONS[-1][0]
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = get_connection(path=path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT,
+                    applied_at DATETIME DEFAULT (datetime('now', 'localtime'))
+                )
+            """)
+            cursor.execute("SELECT MAX(version) FROM schema_version")
+            current = cursor.fetchone()[0] or 0
+
+            for version, description, migrate in MIGRATIONS:
+                if version <= current:
+                    continue
+                cursor.execute("BEGIN IMMEDIATE")
+                # Another process may have applied it while we waited for the lock
+                cursor.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,))
+                if cursor.fetchone():
+                    conn.rollback()
+                    continue
+                migrate(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                    (version, description),
+                )
+                conn.commit()
+                logger.info(f"[DB] Applied migration {version}: {description}")
+        finally:
+            conn.close()
+
+        _migrated.add(path)
+    return MIGRATIONS[-1][0]
@@ -1,176 +1,271 @@
+"""
+Single-pass parser for Mistral [TOOL_CALLS] output.
+
+Handles both formats the model emits:
+- JSON array:  [TOOL_CALLS][{"name": "...", "arguments": {...}}]
+- [ARGS] form: [TOOL_CALLS]func_name[ARGS]{...}  (repeatable, with or without
+  a fresh [TOOL_CALLS] marker per call)
+
+The output is walked once by a regex tokenizer that only stops on structural
+characters. String literals, escapes included, are consumed in a single match,
+so a long email body costs one C-level step instead of one Python iteration
+per character. While scanning, the open-container stack, trailing commas and
+the last complete member of each container are recorded, which is everything
+needed to repair sloppy or truncated JSON without re-reading the text. Each
+argument blob then reaches json.loads at most twice.
+
+A truncated generation is repaired only where the cut falls between two
+complete arguments. A call whose argument value was itself cut off is
+dropped: running it with a partial attendee list, or an email without its
+body, is worse than not running it.
+"""
+
 import json
 import re
 
 from littlehive.agent.logger_setup import logger
 
+TOOL_CALLS_MARKER = "[TOOL_CALLS]"
+ARGS_MARKER = "[ARGS]"
 
-def _repair_json(text: str) -> dict | None:
-    """Attempt to repair common JSON issues from LLM output."""
-    text = text.strip()
+# Inside a JSON value: a closed string literal (markers inside it are just
+# text), else an unterminated one in group 1, which the model cut off
+# mid-string; it is bounded by the next marker so that a stray quote cannot
+# swallow the calls that follow it.
+_VALUE_TOKEN = re.compile(
+    r'"[^"\\]*+(?:\\.[^"\\]*+)*+"'
+    r'|("(?:[^"\\\[]++|\\.|\[(?!TOOL_CALLS\]|ARGS\]))*+)'
+    r'|\[TOOL_CALLS\]|\[ARGS\]|[{}\[\],]',
+    re.S,
+)
+# Outside a value only markers matter; quotes there are junk, not strings.
+_MARKER = re.compile(r"\[(?:TOOL_CALLS|ARGS)\]")
+_ARGS_START = re.compile(r"\{|\[(?:TOOL_CALLS|ARGS)\]")
+_NAME = re.compile(r"[a-zA-Z0-9_-]+")
+_SPACE = re.compile(r"\s*")
+_NAME_CHARS = frozenset(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-"
+)
+_CLOSERS = {"{": "}", "[": "]"}
+# What may follow the last structural token of a cut-off container for its
+# last member to count as complete: nothing, or a literal that can't be the
+# prefix of a longer one (a trailing number might have lost digits).
+_COMPLETE_TAIL = re.compile(r"\s*(?::\s*(?:true|false|null)\s*)?")
 
-    # Strip trailing incomplete content (truncated generation)
-    if text.count('"') % 2 != 0:
-        last_quote = text.rfind('"')
-        text = text[:last_quote + 1]
-
-    # Try to close unclosed braces/brackets
-    open_braces = text.count("{") - text.count("}")
-    open_brackets = text.count("[") - text.count("]")
-    text += "}" * max(0, open_braces)
-    text += "]" * max(0, open_brackets)
-
-    # Remove trailing commas before closing braces
-    text = re.sub(r',\s*}', '}', text)
-    text = re.sub(r',\s*]', ']', text)
 
+def _loads(text: str):
     try:
         return json.loads(text)
-    except json.JSONDecodeError:
+    except (ValueError, RecursionError):
         return None
 
 
-def _extract_first_json_object(text: str) -> str | None:
-    """Extract the first balanced JSON object from a string."""
-    start = text.find("{")
-    if start == -1:
-        return None
+def _splice(text: str, start: int, end: int, excise: list) -> str:
+    """Return text[start:end] with the characters at `excise` positions removed."""
+    if not excise:
+        return text[start:end]
+    parts = []
+    for pos in excise:
+        if pos >= end:
+            break
+        parts.append(text[start:pos])
+        start = pos + 1
+    parts.append(text[start:end])
+    return "".join(parts)
 
-    depth = 0
-    in_string = False
-    escape = False
 
-    for i in range(start, len(text)):
-        ch = text[i]
+def _name_start(text: str, lo: int, hi: int) -> int:
+    """Walk back from `hi` over identifier characters, never past `lo`."""
+    i = hi
+    while i > lo and text[i - 1] in _NAME_CHARS:
+        i -= 1
+    return i
 
-        if in_string:
-            if escape:
-                escape = False
-            elif ch == "\\":
-                escape = True
-            elif ch == '"':
-                in_string = False
-            continue
 
-        if ch == '"':
-            in_string = True
-            continue
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                return text[start : i + 1]
+def _function_name(text: str, head: int, marker_start: int) -> str | None:
+    """Resolve the function name written before an [ARGS] marker."""
+    i = _name_start(text, head, marker_start)
+    if i < marker_start:
+        return text[i:marker_start]
+    # "func_name [ARGS]{...}" — whitespace between the name and the marker
+    name = text[head:marker_start].strip()
+    return name if _NAME.fullmatch(name) else None
 
-    return None
 
+def _scan_value(text: str, start: int, calls: bool = False):
+    """
+    Consume the JSON container whose opening bracket is at `start`.
 
-def _parse_args_dict(func_name: str, args_str: str) -> dict | None:
-    """Parse function args into a dict, with repair/extraction fallbacks."""
-    args_str = args_str.strip()
+    Returns (value, end): the decoded container (None if it cannot be
+    recovered) and the offset where scanning stopped. A value cut short by a
+    marker ends before that marker (and before the function name, for
+    [ARGS]) so the caller picks the next call up from there.
+
+    A cut-off argument object is only closed when the cut falls between two
+    of its members; a value that was itself cut off, a nested list or object
+    included, rejects the whole object rather than being dropped silently.
+    With `calls` the container is a JSON-format call list (or a single
+    call): the same holds for each call's arguments, and a list keeps the
+    calls before the one that was cut.
+    """
+    stack = [text[start]]
+    # Per open container: offset of the last member-separating comma, i.e.
+    # where a rollback can cut to keep only complete members.
+    commas = [None]
+    excise = []
+    prev = "{"
+    prev_end = start + 1
+    truncated_string = False
+    end = len(text)
+
+    for m in _VALUE_TOKEN.finditer(text, start + 1):
+        tok = m.group()
+        c = tok[0]
+        if c == '"':
+            if m.group(1) is not None:
+                truncated_string = True
+                end = m.end()
+                break
+        elif c == "{" or (c == "[" and len(tok) == 1):
+            stack.append(c)
+            commas.append(None)
+        elif c == ",":
+            commas[-1] = m.start()
+        elif c == "[":
+            # Marker before the value closed
+            end = m.start()
+            if tok == ARGS_MARKER:
+                end = _name_start(text, start, end)
+            break
+        else:
+            if prev == "," and not text[prev_end : m.start()].strip():
+                excise.append(prev_end - 1)
+            stack.pop()
+            commas.pop()
+            if not stack:
+                end = m.end()
+                return _loads(_splice(text, start, end, excise)), end
+        prev = c
+        prev_end = m.end()
+
+    # Containers a cut may close: the argument object, or the call list, the
+    # call and its arguments
+    closable = 1 if not calls else 3 if stack[0] == "[" else 2
+    if not truncated_string and len(stack) <= closable and _COMPLETE_TAIL.fullmatch(text, prev_end, end):
+        closers = "".join(_CLOSERS[o] for o in reversed(stack))
+        value = _loads(_splice(text, start, end, excise).rstrip().rstrip(",") + closers)
+        if value is not None:
+            return value, end
+    if calls and stack[0] == "[" and commas[0] is not None:
+        return _loads(_splice(text, start, commas[0], excise) + "]"), end
+    return None, end
 
-    # Best case: proper JSON object string
-    try:
-        parsed = json.loads(args_str)
-        if isinstance(parsed, dict):
-            return parsed
-    except json.JSONDecodeError:
-        pass
-
-    # Try repaired JSON directly
-    repaired = _repair_json(args_str)
-    if isinstance(repaired, dict):
-        return repaired
-
-    # Try extracting the first balanced object and parsing that
-    extracted = _extract_first_json_object(args_str)
-    if extracted:
-        try:
-            parsed = json.loads(extracted)
-            if isinstance(parsed, dict):
-                return parsed
-        except json.JSONDecodeError:
-            repaired = _repair_json(extracted)
-            if isinstance(repaired, dict):
-                return repaired
 
-    logger.warning(
-        f"[Parser] Failed to parse args for '{func_name}': {args_str[:200]}"
-    )
-    return None
+def _parse_args(text: str, pos: int, func_name: str | None):
+    """
+    Decode the argument object starting at `pos` (just after an [ARGS]
+    marker, or the start of a string-encoded "arguments" value). Leading junk
+    before the first `{` is skipped.
+
+    Returns (args_dict_or_None, end).
+    """
+    m = _ARGS_START.search(text, pos)
+    if m is not None and m.group() == "{":
+        value, end = _scan_value(text, m.start())
+        if isinstance(value, dict):
+            return value, end
+        # Misaligned quotes can make a broken value run over the calls after
+        # it; if a marker fell inside the span, resume just before it.
+        marker = _MARKER.search(text, m.end(), end)
+        resume = m.end() if marker is not None else end
+    else:
+        # No value at all: leave a name written before the next marker to
+        # the call that follows.
+        end = m.start() if m is not None else len(text)
+        resume = pos
+    if func_name:
+        logger.warning(
+            f"[Parser] Failed to parse args for '{func_name}': {text[pos:end].strip()[:200]}"
+        )
+    return None, resume
+
+
+def _parse_args_text(func_name: str, args_text: str) -> dict | None:
+    args, _ = _parse_args(args_text, 0, func_name)
+    return args
+
+
+def _collect_json_calls(value, calls: list):
+    """Append calls from the JSON-array format (a bare object is accepted too)."""
+    items = value if isinstance(value, list) else [value]
+    for item in items:
+        if isinstance(item, dict) and "name" in item:
+            args = item.get("arguments", {})
+            if isinstance(args, str):
+                parsed_args = _parse_args_text(item["name"], args)
+                args = parsed_args if parsed_args is not None else {}
+            calls.append({"name": item["name"], "arguments": args})
+
+
+def _parse_block(text: str, pos: int, calls: list) -> int:
+    """
+    Parse one block that follows a [TOOL_CALLS] marker ending at `pos`.
+    Appends any calls found and returns the offset of the next [TOOL_CALLS]
+    marker, or -1 at the end of the output.
+    """
+    first = _SPACE.match(text, pos).end()
+    if first < len(text) and text[first] in "[{":
+        # Format 1: JSON array of {"name", "arguments"} objects. Anything
+        # after it up to the next marker is ignored.
+        value, end = _scan_value(text, first, calls=True)
+        found = len(calls)
+        _collect_json_calls(value, calls)
+        if len(calls) > found:
+            return text.find(TOOL_CALLS_MARKER, end)
+        # Not a call list after all, e.g. a stray "{" before "name[ARGS]"
+
+    head = pos
+    named = False
+    pending = None
+    m = _MARKER.search(text, head)
+    while m is not None and m.group() == ARGS_MARKER:
+        named = True
+        # "name[ARGS][ARGS]{...}": a marker without a name repeats the last one
+        func_name = _function_name(text, head, m.start()) or pending
+        args, end = _parse_args(text, m.end(), func_name)
+        if func_name and args is not None:
+            calls.append({"name": func_name, "arguments": args})
+        pending = func_name if args is None and end == m.end() else None
+        head = end
+        m = _MARKER.search(text, head)
+
+    if not named:
+        # Parameterless tool call: the whole block is just the function name
+        func_name = text[pos : m.start() if m is not None else len(text)].strip()
+        if _NAME.fullmatch(func_name):
+            calls.append({"name": func_name, "arguments": {}})
+    return m.start() if m is not None else -1
 
 
 def parse_mistral_tool_calls(response_text):
     """
     Standard parser for Mistral [TOOL_CALLS] output.
-    Handles both [ARGS]-separated format and JSON array format.
+    Handles both [ARGS]-separated format and JSON array format, repairing
+    trailing commas, unclosed containers and truncated generations.
     """
-    if "[TOOL_CALLS]" not in response_text:
+    if TOOL_CALLS_MARKER not in response_text:
         return []
 
-    clean_text = response_text.replace("</s>", "").strip()
-    blocks = clean_text.split("[TOOL_CALLS]")
+    text = response_text.replace("</s>", "")
     calls = []
 
-    for block in blocks[1:]:
-        block = block.strip()
-        if not block:
-            continue
-
+    pos = text.find(TOOL_CALLS_MARKER)
+    while pos != -1:
+        block = pos + len(TOOL_CALLS_MARKER)
         try:
-            # Format 1: JSON array — [{"name": "...", "arguments": {...}}]
-            if block.startswith("["):
-                parsed = _repair_json(block)
-                if parsed is None:
-                    parsed = json.loads(block)
-                if isinstance(parsed, list):
-                    for item in parsed:
-                        if isinstance(item, dict) and "name" in item:
-                            args = item.get("arguments", {})
-                            if isinstance(args, str):
-                                parsed_args = _parse_args_dict(item["name"], args)
-                                args = parsed_args if parsed_args is not None else {}
-                            calls.append({"name": item["name"], "arguments": args})
-                    continue
-
-            # Format 2: func_name[ARGS]{...}
-            if "[ARGS]" in block:
-                markers = list(re.finditer(r"([a-zA-Z0-9_-]+)\[ARGS\]", block))
-                if markers:
-                    for i, marker in enumerate(markers):
-                        func_name = marker.group(1).strip()
-                        if not re.match(r"^[a-zA-Z0-9_-]+$", func_name):
-                            continue
-
-                        args_start = marker.end()
-                        args_end = (
-                            markers[i + 1].start()
-                            if i + 1 < len(markers)
-                            else len(block)
-                        )
-                        args_str = block[args_start:args_end].strip()
-                        args_dict = _parse_args_dict(func_name, args_str)
-                        if args_dict is None:
-                            continue
-
-                        calls.append({"name": func_name, "arguments": args_dict})
-                else:
-                    # Fallback to single split behavior
-                    func_name, args_str = block.split("[ARGS]", 1)
-                    func_name = func_name.strip()
-                    args_str = args_str.strip()
-                    if not re.match(r"^[a-zA-Z0-9_-]+$", func_name):
-                        continue
-                    args_dict = _parse_args_dict(func_name, args_str)
-                    if args_dict is None:
-                        continue
-                    calls.append({"name": func_name, "arguments": args_dict})
-            else:
-                # Parameterless tool call
-                func_name = block.strip()
-                if re.match(r"^[a-zA-Z0-9_-]+$", func_name):
-                    calls.append({"name": func_name, "arguments": {}})
+            pos = _parse_block(text, block, calls)
         except Exception as e:
             logger.warning(f"[Parser] Exception parsing tool call block: {e}")
-            continue
+            pos = text.find(TOOL_CALLS_MARKER, block)
 
     return calls
@@ -7,6 +7,10 @@ DB_DIR = os.path.join(LITTLEHIVE_DIR, "db")
 CONFIG_DIR = os.path.join(LITTLEHIVE_DIR, "config")
 
 DB_PATH = os.path.join(DB_DIR, "littlehive.db")
+# High-churn logs and telemetry; attached to every main-database connection
+TELEMETRY_DB_PATH = os.path.join(DB_DIR, "telemetry.db")
+# Finished traces, OTLP JSON lines (see agent/tracing.py)
+TRACE_PATH = os.path.join(LITTLEHIVE_DIR, "logs", "traces.jsonl")
 CONFIG_PATH = os.path.join(CONFIG_DIR, "config.json")
 TOKEN_PATH = os.path.join(CONFIG_DIR, "token.json")
 CREDENTIALS_PATH = os.path.join(CONFIG_DIR, "credentials.json")
@@ -3,7 +3,7 @@ import sqlite3
 import logging
 from mlx_lm import generate
 
-from littlehive.agent.paths import DB_PATH
+from littlehive.agent.db import get_connection
 from littlehive.tools.memory_tools import save_core_fact
 
 logger = logging.getLogger(__name__)
@@ -16,7 +16,7 @@ def run_memory_extraction(model, tokenizer):
     """
     try:
         logger.info("[Scheduled: Memory] Starting nightly memory extraction...")
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute(
             "SELECT role, content FROM chat_archive WHERE datetime(timestamp) >= datetime('now', '-1 day')"
@@ -84,7 +84,7 @@ def run_morning_brief(model, tokenizer, inbox_queue, chat_id):
     """
     try:
         logger.info("[Scheduled: Brief] Starting Morning Intelligence Brief...")
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -1,11 +1,14 @@
 import json
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 from datetime import datetime, timedelta, timezone
 
 from apscheduler.schedulers.background import BackgroundScheduler
 
 from littlehive.agent.config import get_config
 from littlehive.agent.logger_setup import logger
+from littlehive.agent.tracing import traced_job, bind, span
 
 logging.getLogger("apscheduler").setLevel(logging.ERROR)
 
@@ -18,6 +21,21 @@ _get_active_chat_id = None
 
 notified_email_ids = set()
 notified_event_ids = set()
+# Unread mail received before the scheduler started counts as already seen,
+# even when the startup sync that fetched it only finishes in a later poll
+_notify_emails_after_ms = 0
+
+# Per-service budget in seconds for one API sync; the api_sync_timeouts
+# config key overrides individual entries.
+SYNC_TIMEOUTS = {"gmail": 60, "calendar": 60, "tasks": 90}
+# Long-lived so every worker keeps its per-thread Google API clients
+_sync_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="api-sync")
+_sync_inflight = {}
+# Services whose last sync outlived its timeout; its result is picked up
+# by the next poll, so mail it fetched still gets notified
+_sync_overdue = set()
+# service -> outcome of its latest sync (status, mode, rows, duration_ms, finished_at)
+sync_stats = {}
 
 
 def inject_proactive_update(updates_found):
@@ -49,7 +67,7 @@ def inject_proactive_update(updates_found):
 
 
 def is_user_busy():
-    from littlehive.tools.calendar_tools import get_events
+    from littlehive.agent.local_cache import events_in_progress
 
     config = get_config()
     dnd_start = config.get("dnd_start", 23)
@@ -66,20 +84,15 @@ def is_user_busy():
             return True
 
     try:
-        now = datetime.now(timezone.utc)
-        res_str = get_events(
-            time_min=(now - timedelta(minutes=1)).isoformat(),
-            time_max=(now + timedelta(minutes=1)).isoformat(),
-        )
-        if isinstance(res_str, str):
-            res = json.loads(res_str)
-            if isinstance(res, list) and len(res) > 0:
-                return True
+        # Timed events only: an all-day birthday or OOO marker is not a meeting
+        if events_in_progress():
+            return True
     except Exception as e:
         logger.warning(f"[Proactive] Calendar busy-check failed: {e}")
     return False
 
 
+@traced_job
 def check_reminders_job():
     from littlehive.tools.reminder_tools import poll_due_reminders
 
@@ -97,90 +110,168 @@ def check_reminders_job():
         inject_proactive_update(updates)
 
 
+def _events_starting_soon(now: datetime) -> list:
+    """Cached events starting within the next hour."""
+    from littlehive.agent.local_cache import query_cached_events
+
+    return json.loads(
+        query_cached_events(time_min=now.isoformat(), time_max=(now + timedelta(hours=1)).isoformat())
+    )
+
+
+def _run_api_syncs() -> dict:
+    """
+    Runs the Gmail, Calendar and Tasks syncs concurrently, each bounded by
+    its timeout, and starts the Gmail backfill alongside without waiting
+    for it. Returns {service: result} for the syncs that finished in time;
+    timings and row counts land in sync_stats either way. A sync still
+    running from an earlier poll is not started again; once it finishes,
+    its result is merged into the next poll's (it has already advanced the
+    sync state past what it fetched).
+    """
+    from littlehive.tools.email_tools import sync_emails, backfill_emails
+    from littlehive.tools.calendar_tools import sync_events
+    from littlehive.tools.google_tasks import sync_tasks
+
+    syncs = {
+        "gmail": sync_emails,
+        "calendar": sync_events,
+        "tasks": sync_tasks,
+    }
+    timeouts = {**SYNC_TIMEOUTS, **get_config().get("api_sync_timeouts", {})}
+
+    started = time.monotonic()
+    late = {}
+    futures = {}
+    for service, func in syncs.items():
+        previous = _sync_inflight.get(service)
+        if previous is not None and not previous.done():
+            logger.warning(f"[Proactive] {service} sync from the last poll still running; skipping.")
+            continue
+        if service in _sync_overdue:
+            _sync_overdue.discard(service)
+            try:
+                late[service] = previous.result()
+            except Exception as e:
+                logger.warning(f"[Proactive] Overdue {service} sync failed: {e}")
+        # bind(): the sync's spans belong to the job that started it
+        futures[service] = _sync_inflight[service] = _sync_pool.submit(bind(_traced_sync), service, func)
+
+    # Older mail for search only; never feeds notifications, so nothing
+    # waits for it. Its outcome is in sync_stats.
+    backfill = _sync_inflight.get("gmail_backfill")
+    if backfill is None or backfill.done():
+        _sync_inflight["gmail_backfill"] = _sync_pool.submit(bind(_traced_sync), "gmail_backfill", backfill_emails)
+
+    results = {}
+    for service, future in futures.items():
+        remaining = timeouts.get(service, 60) - (time.monotonic() - started)
+        try:
+            results[service] = future.result(timeout=max(remaining, 0))
+        except FuturesTimeout:
+            _sync_overdue.add(service)
+            sync_stats[service] = {**sync_stats.get(service, {}), "status": "timeout"}
+            logger.warning(f"[Proactive] {service} sync exceeded {timeouts.get(service, 60)}s; using cached data.")
+        except Exception as e:
+            logger.warning(f"[Proactive] {service} sync failed: {e}")
+
+    for service, result in late.items():
+        results[service] = _merge_sync_results(result, results.get(service, {}))
+    return results
+
+
+def _merge_sync_results(earlier: dict, later: dict) -> dict:
+    merged = {**earlier, **later}
+    for key in ("emails", "events", "tasks", "removed"):
+        if key in earlier or key in later:
+            merged[key] = earlier.get(key, []) + later.get(key, [])
+    return merged
+
+
+def _timed_sync(service: str, func) -> dict:
+    start = time.perf_counter()
+    try:
+        result = func()
+    except Exception as e:
+        sync_stats[service] = {
+            "status": "error",
+            "error": str(e),
+            "duration_ms": round((time.perf_counter() - start) * 1000),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        raise
+    duration_ms = round((time.perf_counter() - start) * 1000)
+    if "error" in result:
+        status = "error"
+        rows = 0
+    else:
+        status = "ok"
+        changed = next(
+            (result[k] for k in ("emails", "events", "tasks") if k in result), []
+        )
+        rows = len(changed) + len(result.get("removed", []))
+    sync_stats[service] = {
+        "status": status,
+        "error": result.get("error"),
+        "mode": result.get("mode"),
+        "rows": rows,
+        "duration_ms": duration_ms,
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    logger.info(f"[Proactive] {service} sync: {status}, {rows} rows in {duration_ms} ms")
+    return result
+
+
+def _traced_sync(service: str, func) -> dict:
+    with span(f"sync {service}"):
+        return _timed_sync(service, func)
+
+
+@traced_job
 def check_apis_job():
     global notified_email_ids, notified_event_ids
-    from littlehive.tools.email_tools import _live_search_emails
-    from littlehive.tools.calendar_tools import _live_get_events
-    from littlehive.agent.local_cache import upsert_emails, cleanup_old_emails, replace_cached_events
+    from littlehive.agent.local_cache import cleanup_old_emails
 
     updates = []
+    results = _run_api_syncs()
 
-    # 1. Sync Emails (Last 24h)
+    # 1. New unread emails (only those the sync fetched this round)
     try:
-        email_res_str = _live_search_emails(query="newer_than:1d -in:sent", max_results=100)
-        email_res = json.loads(email_res_str)
+        email_res = results.get("gmail", {})
         if "emails" in email_res:
             emails = email_res["emails"]
-            upsert_emails(emails)
             cleanup_old_emails()
             
             # Check for new unread emails for proactive notification
             for email in emails:
                 if not email["is_read"] and email["id"] not in notified_email_ids:
                     notified_email_ids.add(email["id"])
+                    if (email.get("timestamp_ms") or 0) < _notify_emails_after_ms:
+                        continue
                     updates.append(
                         f"📧 New Email (ID: {email['id']}): '{email['subject']}' from {email['sender']}"
                     )
     except Exception as e:
-        logger.warning(f"[Proactive] Email sync/check failed: {e}")
+        logger.warning(f"[Proactive] Email check failed: {e}")
 
-    # 2. Sync Events (Now to Now + 3 days)
+    # 2. Events starting within the hour. Read from the cache, so a slow or
+    # failed calendar sync still leaves the last known schedule to check.
     try:
-        now = datetime.now(timezone.utc)
-        sync_end = now + timedelta(days=3)
-        
-        event_res_str = _live_get_events(
-            time_min=now.isoformat(), time_max=sync_end.isoformat(), max_results=50
-        )
-        event_res = json.loads(event_res_str)
-
-        if isinstance(event_res, list):
-            replace_cached_events(event_res)
-            
-            # Check for upcoming events in the next hour for proactive notification
-            next_hour = now + timedelta(hours=1)
-            for event in event_res:
-                try:
-                    event_start = datetime.fromisoformat(event["start"].replace('Z', '+00:00'))
-                    if now <= event_start <= next_hour:
-                        if event["id"] not in notified_event_ids:
-                            notified_event_ids.add(event["id"])
-                            attendees = event.get("attendees", [])
-                            is_personal = len(attendees) <= 1
-                            event_type = (
-                                "Personal Block"
-                                if is_personal
-                                else f"Meeting with {len(attendees)} attendees"
-                            )
-                            updates.append(
-                                f"📅 {event_type}: '{event['summary']}' at {event['start']}"
-                            )
-                except Exception:
-                    pass
-    except Exception as e:
-        logger.warning(f"[Proactive] Calendar sync/check failed: {e}")
-
-    # 3. Sync Google Tasks (All lists)
-    try:
-        from littlehive.tools.google_tasks import get_task_lists, _live_get_tasks
-        from littlehive.agent.local_cache import replace_cached_tasks
-        
-        task_lists_str = get_task_lists()
-        task_lists = json.loads(task_lists_str)
-        
-        all_tasks = []
-        if isinstance(task_lists, list):
-            for tlist in task_lists:
-                list_id = tlist["id"]
-                tasks_str = _live_get_tasks(tasklist_id=list_id)
-                tasks = json.loads(tasks_str)
-                if isinstance(tasks, list):
-                    all_tasks.extend(tasks)
-        
-        if all_tasks:
-            replace_cached_tasks(all_tasks)
+        for event in _events_starting_soon(datetime.now(timezone.utc)):
+            if event["id"] not in notified_event_ids:
+                notified_event_ids.add(event["id"])
+                attendees = event.get("attendees", [])
+                is_personal = len(attendees) <= 1
+                event_type = (
+                    "Personal Block"
+                    if is_personal
+                    else f"Meeting with {len(attendees)} attendees"
+                )
+                updates.append(
+                    f"📅 {event_type}: '{event['summary']}' at {event['start']}"
+                )
     except Exception as e:
-        logger.warning(f"[Proactive] Tasks sync failed: {e}")
+        logger.warning(f"[Proactive] Calendar check failed: {e}")
 
     if updates:
         inject_proactive_update(updates)
@@ -194,7 +285,7 @@ def _check_auto_respond_emails():
     for each new unread email from them."""
     try:
         from littlehive.tools.stakeholder_tools import get_auto_respond_contacts, pick_fun_fact
-        from littlehive.agent.local_cache import _get_db
+        from littlehive.agent.local_cache import _get_db, RECENT_EMAIL_MS
 
         contacts = get_auto_respond_contacts()
         if not contacts:
@@ -211,8 +302,11 @@ def _check_auto_respond_emails():
 
         conn = _get_db()
         cur = conn.cursor()
+        # Only the recent slice: the cache also holds weeks of older mail
+        recent_ms = int(datetime.now(timezone.utc).timestamp() * 1000) - RECENT_EMAIL_MS
         cur.execute(
-            "SELECT id, sender, subject, snippet FROM cached_emails WHERE is_read = 0"
+            "SELECT id, sender, subject, snippet FROM cached_emails WHERE is_read = 0 AND timestamp_ms >= ?",
+            (recent_ms,),
         )
         rows = cur.fetchall()
         conn.close()
@@ -273,6 +367,7 @@ def _extract_email(sender: str) -> str:
     return ""
 
 
+@traced_job
 def run_pattern_mining_job():
     """Nightly job: mine behavioral patterns from action history."""
     from littlehive.agent.anticipation import run_pattern_mining
@@ -282,6 +377,7 @@ def run_pattern_mining_job():
     run_pattern_mining(lookback_days=lookback, min_frequency=min_freq)
 
 
+@traced_job
 def check_anticipations_job():
     """Periodic job: check if any learned patterns match the current moment."""
     from littlehive.agent.anticipation import get_matching_predictions, log_anticipation
@@ -313,22 +409,20 @@ def check_anticipations_job():
     )
 
 
+@traced_job
 def process_feedback_job():
     """Hourly job: process feedback on past anticipation suggestions."""
     from littlehive.agent.anticipation import process_anticipation_feedback
     process_anticipation_feedback()
 
 
+@traced_job
 def nightly_db_cleanup():
-    import sqlite3
-    from littlehive.agent.paths import DB_PATH
+    from littlehive.agent.db import get_connection
 
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         cursor = conn.cursor()
-        cursor.execute(
-            "DELETE FROM system_logs WHERE datetime(timestamp) <= datetime('now', '-7 days')"
-        )
         cursor.execute(
             "DELETE FROM pending_tasks WHERE status IN ('completed', 'failed') AND datetime(created_at) <= datetime('now', '-2 days')"
         )
@@ -348,7 +442,26 @@ def nightly_db_cleanup():
     except Exception as e:
         logger.debug(f"[Maintenance] Failure memory cleanup skipped: {e}")
 
+    # Logs and action history, then reclaim the space freed above and
+    # refresh planner statistics
+    try:
+        from littlehive.agent.maintenance import prune_telemetry, run_maintenance
+        prune_telemetry()
+        run_maintenance()
+    except Exception as e:
+        logger.error(f"[Maintenance Error] DB maintenance: {e}")
+
+
+@traced_job
+def db_optimize_job():
+    try:
+        from littlehive.agent.maintenance import optimize
+        optimize()
+    except Exception as e:
+        logger.debug(f"[Maintenance] PRAGMA optimize skipped: {e}")
+
 
+@traced_job
 def trigger_nightly_memory():
     logger.info("[Maintenance] Triggering nightly memory extraction.")
     _inbox.put(
@@ -359,6 +472,7 @@ def trigger_nightly_memory():
         }
     )
 
+@traced_job
 def trigger_morning_brief():
     logger.info("[Maintenance] Triggering morning intelligence brief.")
     _inbox.put(
@@ -370,6 +484,7 @@ def trigger_morning_brief():
     )
 
 
+@traced_job
 def process_pending_tasks_job():
     from littlehive.tools.task_queue import _get_db
     from littlehive.tools.email_tools import (
@@ -502,7 +617,7 @@ def process_pending_tasks_job():
 def start_proactive_scheduler(inbox, outbox_web, outbox_telegram, get_active_chat_id):
     """Wire up queue references and start the background scheduler."""
     global _inbox, _outbox_web, _outbox_telegram, _get_active_chat_id
-    global notified_email_ids, notified_event_ids
+    global notified_email_ids, notified_event_ids, _notify_emails_after_ms
 
     _inbox = inbox
     _outbox_web = outbox_web
@@ -514,10 +629,8 @@ def start_proactive_scheduler(inbox, outbox_web, outbox_telegram, get_active_cha
     # Initialize local cache database
     from littlehive.agent.local_cache import (
         init_cache_db, 
-        upsert_emails, 
-        replace_cached_events, 
         cleanup_old_emails, 
-        replace_cached_tasks
+        unread_email_ids,
     )
     try:
         init_cache_db()
@@ -525,52 +638,19 @@ def start_proactive_scheduler(inbox, outbox_web, outbox_telegram, get_active_cha
         logger.error(f"[Proactive] DB Init Failed: {e}")
 
     # Pre-fetch current state to prevent notification spam on startup & seed cache
+    _notify_emails_after_ms = int(time.time() * 1000)
     try:
-        from littlehive.tools.email_tools import _live_search_emails
-        from littlehive.tools.calendar_tools import _live_get_events
-        from littlehive.tools.google_tasks import get_task_lists, _live_get_tasks
-        
-        # Emails
-        email_res_str = _live_search_emails(query="newer_than:1d -in:sent", max_results=100)
-        email_res = json.loads(email_res_str)
-        if "emails" in email_res:
-            upsert_emails(email_res["emails"])
+        results = _run_api_syncs()
+
+        # Emails: whatever is unread in the cache now, whether this sync
+        # fetched it or an earlier run did
+        if "emails" in results.get("gmail", {}):
             cleanup_old_emails()
-            for email in email_res["emails"]:
-                if not email["is_read"]:
-                    notified_email_ids.add(email["id"])
+        notified_email_ids |= unread_email_ids()
 
         # Calendar
-        now = datetime.now(timezone.utc)
-        sync_end = now + timedelta(days=3)
-        event_res_str = _live_get_events(
-            time_min=now.isoformat(), time_max=sync_end.isoformat(), max_results=50
-        )
-        event_res = json.loads(event_res_str)
-        if isinstance(event_res, list):
-            replace_cached_events(event_res)
-            next_hour = now + timedelta(hours=1)
-            for event in event_res:
-                try:
-                    event_start = datetime.fromisoformat(event["start"].replace('Z', '+00:00'))
-                    if now <= event_start <= next_hour:
-                        notified_event_ids.add(event["id"])
-                except Exception:
-                    pass
-        
-        # Google Tasks
-        task_lists_str = get_task_lists()
-        task_lists = json.loads(task_lists_str)
-        all_tasks = []
-        if isinstance(task_lists, list):
-            for tlist in task_lists:
-                list_id = tlist["id"]
-                tasks_str = _live_get_tasks(tasklist_id=list_id)
-                tasks = json.loads(tasks_str)
-                if isinstance(tasks, list):
-                    all_tasks.extend(tasks)
-        if all_tasks:
-            replace_cached_tasks(all_tasks)
+        for event in _events_starting_soon(datetime.now(timezone.utc)):
+            notified_event_ids.add(event["id"])
 
     except Exception as e:
         logger.warning(f"[Proactive] Scheduler pre-fetch failed: {e}")
@@ -618,6 +698,14 @@ def start_proactive_scheduler(inbox, outbox_web, outbox_telegram, get_active_cha
         except Exception:
             scheduler.add_job(nightly_db_cleanup, "cron", hour=3, minute=0)
 
+    # Cheap: only re-analyzes tables whose statistics have drifted
+    scheduler.add_job(
+        db_optimize_job,
+        "interval",
+        minutes=60,
+        next_run_time=datetime.now() + timedelta(minutes=10),
+    )
+
     if config.get("nightly_memory_enabled", True):
         time_str = config.get("nightly_memory_time", "03:15")
         try:
@@ -18,7 +18,8 @@ import logging
 import threading
 from datetime import datetime, timedelta
 
-from littlehive.agent.paths import DB_PATH
+from littlehive.agent import tracing
+from littlehive.agent.db import get_connection
 
 logger = logging.getLogger(__name__)
 
@@ -241,7 +242,7 @@ def classify_error(tool_result):
 # ---------------------------------------------------------------------------
 
 def _get_db():
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection()
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -414,9 +415,12 @@ def resilient_dispatch_tool(dispatch_fn, tool_name, tool_args, max_retries=2):
     """
     service = TOOL_SERVICE_MAP.get(tool_name, "local")
     breaker = _get_breaker(service)
+    span = tracing.current_span() or tracing.NOOP
+    span.set("tool.service", service)
 
     # Circuit breaker check
     if service != "local" and breaker.is_open():
+        span.set("tool.circuit_open", True)
         logger.warning(f"[SelfHealing] Circuit open for {service}, failing fast for {tool_name}")
         return json.dumps({
             "error": f"The {service} service is temporarily unavailable (circuit breaker open).",
@@ -444,6 +448,7 @@ def resilient_dispatch_tool(dispatch_fn, tool_name, tool_args, max_retries=2):
             result = json.dumps({"error": f"Internal exception: {str(e)}"})
 
         error_info = classify_error(result)
+        span.set("tool.attempts", attempt + 1)
 
         if error_info is None:
             # Success
@@ -468,7 +473,8 @@ def resilient_dispatch_tool(dispatch_fn, tool_name, tool_args, max_retries=2):
             f"[SelfHealing] {tool_name} transient error on attempt {attempt + 1}, "
             f"retrying in {delay:.1f}s: {error_info['message'][:80]}"
         )
-        time.sleep(delay)
+        with tracing.span("tool.retry_backoff", {"attempt": attempt + 1, "error.type": error_info["type"]}):
+            time.sleep(delay)
 
     # All attempts exhausted or non-retryable error
     total_attempts = min(attempt + 1, max_retries + 1)
@@ -476,6 +482,7 @@ def resilient_dispatch_tool(dispatch_fn, tool_name, tool_args, max_retries=2):
     if service != "local":
         breaker.record_failure()
 
+    span.set("tool.error_type", last_error_info["type"])
     log_failure(tool_name, tool_args, last_error_info, attempts=total_attempts)
 
     logger.warning(
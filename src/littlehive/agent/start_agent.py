@@ -29,8 +29,10 @@ from mlx_lm.sample_utils import make_sampler
 from littlehive.agent.tool_registry import dispatch_tool, EA_PERSONA_TOOLS
 from littlehive.agent.self_healing import resilient_dispatch_tool
 from littlehive.agent.locks import mlx_lock
+from littlehive.agent import tracing
+from littlehive.agent import embeddings
 from littlehive.agent.parser import parse_mistral_tool_calls
-from littlehive.tools.memory_tools import archive_messages
+from littlehive.tools.memory_tools import archive_messages, recall_core_facts, format_recalled_facts
 from littlehive.agent.anticipation import log_action, _make_turn_id
 from littlehive.agent.slash_commands import try_slash_command
 
@@ -240,9 +242,16 @@ def get_system_prompt():
         template = "You are an AI assistant. (Fallback prompt due to error)\n### RUNTIME CONTEXT\n### CORE FACTS ABOUT THE PRINCIPAL\n{core_facts}\n{dynamic_context}"
 
     try:
-        from littlehive.tools.memory_tools import get_all_core_facts
-        facts_list = get_all_core_facts()
+        from littlehive.tools.memory_tools import get_pinned_core_facts, RECALL_OPEN
+        # Only a fixed, budgeted set here; the rest are recalled per message
+        # so the cached prefix doesn't grow with memory
+        facts_list, unpinned = get_pinned_core_facts()
         core_facts_str = "\n".join([f"- {fact}" for fact in facts_list]) if facts_list else "No specific core facts loaded."
+        if unpinned:
+            core_facts_str += (
+                f"\n({unpinned} more facts are in memory. Those relevant to a message "
+                f"appear after it under {RECALL_OPEN}.)"
+            )
     except Exception as e:
         logger.error(f"Failed to load core facts: {e}")
         core_facts_str = "Memory subsystem unavailable."
@@ -285,6 +294,9 @@ def get_system_prompt():
 
 def main():
     config = get_config()
+    tracing.instrument_http()
+    # Loads alongside the LLM; memory dedup, recall and archive search share it
+    embeddings.warm_up()
     model_path = config.get(
         "model_path", "mlx-community/mistralai_Ministral-3-14B-Instruct-2512-MLX-MXFP4"
     )
@@ -323,6 +335,10 @@ def main():
         prompt_cache = make_prompt_cache(model)
 
         messages = [{"role": "system", "content": get_system_prompt()}]
+        # messages[:archived_count] have been handed to archive_messages
+        archived_count = 0
+        # Core facts already recalled into this conversation
+        recalled_fact_ids = set()
         historically_active_tools = list(all_possible_tools)
 
         logger.info("Pre-warming prompt cache with System Prompt + Tool Schemas...")
@@ -355,6 +371,17 @@ def main():
         logger.error(f"❌ [Error] Model Initialization Failed: {e}")
         sys.exit(1)
 
+    # Vocabulary index for grammar-constrained tool calls (opt-in)
+    tool_vocab = None
+    if config.get("constrained_tool_calls", False):
+        try:
+            from littlehive.agent.tool_grammar import TokenVocabulary
+
+            tool_vocab = TokenVocabulary.from_tokenizer(tokenizer)
+            logger.info(f"[Brain] Constrained tool calls enabled ({len(tool_vocab.texts)} tokens indexed).")
+        except Exception as e:
+            logger.warning(f"[Brain] Constrained tool calls unavailable, continuing without: {e}")
+
     # Start the Peripheral Senses AFTER Model and Cache are ready
     logger.info("🚀 Starting Web Dashboard and Telegram Bot...")
     from littlehive.dashboard.server import start_dashboard_server
@@ -391,7 +418,7 @@ def main():
 
                 parts = []
 
-                emails_str = query_cached_emails("is:unread", limit=5)
+                emails_str = query_cached_emails("is:unread newer_than:1d", limit=5)
                 emails_data = _json.loads(emails_str)
                 unread = emails_data.get("emails", [])
                 if unread:
@@ -491,6 +518,8 @@ def main():
         cmd = user_input.strip().lower()
         if cmd in ["/reset", "/new"]:
             messages = [{"role": "system", "content": get_system_prompt()}]
+            archived_count = 0
+            recalled_fact_ids = set()
             historically_active_tools = list(all_possible_tools)
             prompt_cache = make_prompt_cache(model)
             previous_prompt_tokens = warm_cache(messages, prompt_cache, historically_active_tools)
@@ -555,6 +584,18 @@ def main():
         # It confuses the LLM into thinking the user is asking ABOUT Telegram.
         context_input = f"[Current Time: {current_time_str}] {user_input}"
         
+        # Relevant core facts not in the system prompt ride along with the
+        # message, each at most once per session. Appending them keeps every
+        # earlier token (and so the prompt cache) unchanged.
+        try:
+            recalled = recall_core_facts(user_input, exclude=recalled_fact_ids)
+        except Exception as e:
+            logger.warning(f"[Brain] Core fact recall failed: {e}")
+            recalled = []
+        if recalled:
+            recalled_fact_ids.update(f["id"] for f in recalled)
+            context_input += format_recalled_facts(recalled)
+
         # Save the clean, short message to persistent history
         messages.append({"role": "user", "content": context_input})
 
@@ -581,6 +622,9 @@ def main():
         turn_id = _make_turn_id(user_input)
         tool_chain_idx = 0
         logger.info(f"🧠 [Brain] Beginning thought process for: {user_input[:30]}...")
+        turn_span = tracing.start_trace(
+            "turn", turn_id=turn_id, attributes={"source": source, "input_chars": len(user_input)}
+        ).activate()
 
         try:
             tool_call_prefix = re.compile(r"^\s*(?:</s>\s*)?\[TOOL_CALLS\]")
@@ -609,6 +653,13 @@ def main():
 
                 temp = get_config().get("temperature", 0.35)
                 sampler = make_sampler(temp=temp)
+                logits_processors = None
+                if tool_vocab is not None and historically_active_tools:
+                    from littlehive.agent.tool_grammar import make_tool_call_processor
+
+                    logits_processors = [
+                        make_tool_call_processor(tool_vocab, historically_active_tools)
+                    ]
 
                 logger.info(f"  -> Starting stream_generate with {len(prompt_tokens)} new tokens...")
                 
@@ -616,22 +667,29 @@ def main():
                 full_response = ""
                 first_token_received = False
                 
-                with mlx_lock:
-                    for response in stream_generate(
-                        model,
-                        tokenizer,
-                        prompt=prompt_tokens,
-                        prompt_cache=prompt_cache,
-                        max_tokens=2048,
-                        sampler=sampler,
-                    ):
-                        if not first_token_received:
-                            first_token_received = True
-                        
-                        full_response += response.text
-                        
-                        if tool_call_prefix.match(full_response):
-                            is_tool_call = True
+                generate_start = time.perf_counter()
+                with tracing.span("llm.generate", {"prompt_tokens": len(prompt_tokens)}) as generate_span:
+                    with mlx_lock:
+                        for response in stream_generate(
+                            model,
+                            tokenizer,
+                            prompt=prompt_tokens,
+                            prompt_cache=prompt_cache,
+                            max_tokens=2048,
+                            sampler=sampler,
+                            logits_processors=logits_processors,
+                        ):
+                            if not first_token_received:
+                                first_token_received = True
+                                generate_span.set(
+                                    "first_token_ms", round((time.perf_counter() - generate_start) * 1000, 1)
+                                )
+
+                            full_response += response.text
+
+                            if tool_call_prefix.match(full_response):
+                                is_tool_call = True
+                    generate_span.set("response_chars", len(full_response))
 
                 # Handle mid-response tool calls: the model sometimes emits
                 # explanation text before [TOOL_CALLS]. Strip the preamble so
@@ -687,8 +745,10 @@ def main():
                         )
                         outbox.put({"type": MSG_TYPE_DONE, "content": budget_warn})
 
-                    import copy
-                    threading.Thread(target=archive_messages, args=(copy.deepcopy(messages),), daemon=True).start()
+                    # Only what this session added since the last archive; the
+                    # message dicts are never mutated once appended
+                    threading.Thread(target=archive_messages, args=(messages[archived_count:],), daemon=True).start()
+                    archived_count = len(messages)
                     break
 
                 # --- Tools Triggered ---
@@ -747,13 +807,14 @@ def main():
                     func_name = tc["name"]
                     func_args = tc["arguments"]
 
-                    if get_config().get("self_healing_enabled", True):
-                        max_retries = get_config().get("self_healing_max_retries", 2)
-                        tool_result = resilient_dispatch_tool(
-                            dispatch_tool, func_name, func_args, max_retries=max_retries
-                        )
-                    else:
-                        tool_result = dispatch_tool(func_name, func_args)
+                    with tracing.span("tool.call", {"tool.name": func_name, "tool.position": tool_chain_idx}):
+                        if get_config().get("self_healing_enabled", True):
+                            max_retries = get_config().get("self_healing_max_retries", 2)
+                            tool_result = resilient_dispatch_tool(
+                                dispatch_tool, func_name, func_args, max_retries=max_retries
+                            )
+                        else:
+                            tool_result = dispatch_tool(func_name, func_args)
 
                     log_action(func_name, func_args, source=source, turn_id=turn_id, session_position=tool_chain_idx)
                     tool_chain_idx += 1
@@ -766,12 +827,16 @@ def main():
 
         except Exception as e:
             err_msg = str(e)
+            turn_span.error(e)
             outbox.put({"type": MSG_TYPE_ERROR, "content": err_msg})
             messages.append(
                 {"role": "assistant", "content": f"Internal Error: {err_msg}"}
             )
             prompt_cache = make_prompt_cache(model)
             previous_prompt_tokens = []
+        finally:
+            turn_span.set("tool_calls", tool_chain_idx)
+            turn_span.end()
 
 
 if __name__ == "__main__":
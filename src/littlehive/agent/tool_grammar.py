@@ -0,0 +1,496 @@
+"""
+Grammar-Constrained Tool Calls
+Once the model emits [TOOL_CALLS], restricts sampling to the Mistral call
+format  name[ARGS]{...}  with names from the active tool registry and
+arguments matching each tool's JSON parameter schema.
+
+The grammar is a character-level pushdown recognizer, and token masks are
+computed against the decoded tokenizer vocabulary, so everything except the
+final mask application is plain Python and can be exercised with a toy
+vocabulary on CPU. Text before [TOOL_CALLS] is never constrained.
+"""
+
+import bisect
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+TOOL_CALLS_MARKER = "[TOOL_CALLS]"
+ARGS_MARKER = "[ARGS]"
+
+_NAME_CHARS = frozenset(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-"
+)
+_DIGITS = frozenset("0123456789")
+_HEX = frozenset("0123456789abcdefABCDEF")
+_ESCAPES = frozenset('"\\/bfnrt')
+_ALL_TYPES = frozenset(("string", "integer", "number", "boolean", "array", "object", "null"))
+# Number phases that may end the literal
+_NUMBER_DONE = frozenset(("0", "i", "f", "x"))
+
+
+# ---------------------------------------------------------------------------
+# Schema compilation
+# ---------------------------------------------------------------------------
+
+class _Schema:
+    """Compiled JSON schema node (hashable by identity, so it can sit in states)."""
+
+    __slots__ = ("types", "enum", "properties", "required", "items")
+
+    def __init__(self, spec=None):
+        spec = spec if isinstance(spec, dict) else {}
+        declared = spec.get("type")
+        if isinstance(declared, str):
+            declared = [declared]
+        types = frozenset(t for t in declared or () if t in _ALL_TYPES)
+        self.types = types or _ALL_TYPES
+
+        enum = spec.get("enum")
+        if enum and all(isinstance(v, str) for v in enum):
+            self.enum = tuple(enum)
+        else:
+            self.enum = None
+
+        props = spec.get("properties")
+        if isinstance(props, dict):
+            self.properties = {k: _Schema(v) for k, v in props.items()}
+        else:
+            self.properties = None
+        self.required = frozenset(spec.get("required") or ())
+        self.items = _Schema(spec.get("items")) if "items" in spec else None
+
+
+_ANY = _Schema()
+
+
+# ---------------------------------------------------------------------------
+# Grammar
+# ---------------------------------------------------------------------------
+#
+# A state is a tuple of frames, innermost last; frames are tuples tagged by
+# their first element:
+#   ("F", tail)                    free text before [TOOL_CALLS]
+#   ("N", buf)                     tool name being written
+#   ("A", name)                    after [ARGS], expecting the argument object
+#   ("D",)                         call complete: EOS or another [TOOL_CALLS]
+#   ("l", rest, then)              literal (true/false/null or a marker)
+#   ("s", role, options, buf, esc) string; role "k" for keys, "v" for values
+#   ("n", integer, phase)          number
+#   ("o", schema, seen, phase, current_value_schema)
+#   ("r", item_schema, phase)
+
+class ToolCallGrammar:
+    """Call-format grammar over a list of OpenAI-style tool schemas."""
+
+    def __init__(self, tools):
+        self.schemas = {}
+        for tool in tools:
+            fn = tool.get("function", {})
+            if fn.get("name"):
+                self.schemas[fn["name"]] = _Schema(fn.get("parameters") or {"type": "object"})
+        self._name_prefixes = {
+            name[:i] for name in self.schemas for i in range(len(name) + 1)
+        }
+        self._allowed_cache = {}
+
+    def initial(self):
+        return (("F", ""),)
+
+    def is_free(self, state) -> bool:
+        return state[0][0] == "F"
+
+    def accepts_eos(self, state) -> bool:
+        return len(state) == 1 and state[0][0] in ("F", "D")
+
+    # -- transitions -------------------------------------------------------
+
+    def step(self, state, ch):
+        """Advance `state` by one character; returns the new state or None."""
+        frame = state[-1]
+        kind = frame[0]
+
+        if kind == "s":
+            _, role, options, buf, esc = frame
+            if esc:
+                if esc < 0:
+                    if ch == "u":
+                        return state[:-1] + (("s", role, options, buf, 4),)
+                    if ch in _ESCAPES:
+                        return state[:-1] + (("s", role, options, buf, 0),)
+                    return None
+                if ch in _HEX:
+                    return state[:-1] + (("s", role, options, buf, esc - 1),)
+                return None
+            if ch == '"':
+                if options is not None and buf not in options:
+                    return None
+                if role == "k":
+                    return self._key_done(state[:-1], buf)
+                return self._value_done(state[:-1])
+            if ch < " ":
+                return None
+            if ch == "\\":
+                if options is not None:
+                    return None
+                return state[:-1] + (("s", role, options, buf, -1),)
+            if options is None:
+                return state
+            buf += ch
+            if not any(o.startswith(buf) for o in options):
+                return None
+            return state[:-1] + (("s", role, options, buf, 0),)
+
+        if kind == "o":
+            _, schema, seen, phase, current = frame
+            if phase == "v" or phase == "v_":
+                if ch == " " and phase == "v":
+                    return state[:-1] + (("o", schema, seen, "v_", current),)
+                return self._start_value(state, current, ch)
+            if phase == ":":
+                if ch == ":":
+                    return state[:-1] + (("o", schema, seen, "v", current),)
+                return None
+            if ch == "}" and phase in ("{", ","):
+                if not schema.required <= seen:
+                    return None
+                return self._value_done(state[:-1])
+            if phase == ",":
+                if ch == "," and (schema.properties is None or len(seen) < len(schema.properties)):
+                    return state[:-1] + (("o", schema, seen, "k", None),)
+                return None
+            if ch == " " and phase == "k":
+                return state[:-1] + (("o", schema, seen, "k_", None),)
+            if ch == '"':
+                if schema.properties is None:
+                    keys = None
+                else:
+                    keys = tuple(k for k in schema.properties if k not in seen)
+                    if not keys:
+                        return None
+                return state + (("s", "k", keys, "", 0),)
+            return None
+
+        if kind == "r":
+            _, items, phase = frame
+            if phase == ",":
+                if ch == ",":
+                    return state[:-1] + (("r", items, "n"),)
+                if ch == "]":
+                    return self._value_done(state[:-1])
+                return None
+            if ch == "]" and phase == "[":
+                return self._value_done(state[:-1])
+            if ch == " " and phase == "n":
+                return state[:-1] + (("r", items, "n_"),)
+            return self._start_value(state, items or _ANY, ch)
+
+        if kind == "n":
+            _, integer, phase = frame
+            nxt = None
+            if ch in _DIGITS:
+                if phase == "-":
+                    nxt = "0" if ch == "0" else "i"
+                elif phase in ("i", "f", "x"):
+                    nxt = phase
+                elif phase == ".":
+                    nxt = "f"
+                elif phase in ("e", "es"):
+                    nxt = "x"
+            elif ch == "." and not integer and phase in ("0", "i"):
+                nxt = "."
+            elif ch in "eE" and not integer and phase in ("0", "i", "f"):
+                nxt = "e"
+            elif ch in "+-" and phase == "e":
+                nxt = "es"
+            if nxt is not None:
+                return state[:-1] + (("n", integer, nxt),)
+            if phase not in _NUMBER_DONE:
+                return None
+            # The character ends the number and belongs to the parent
+            parent = self._value_done(state[:-1])
+            return self.step(parent, ch) if parent is not None else None
+
+        if kind == "l":
+            _, rest, then = frame
+            if ch != rest[0]:
+                return None
+            if len(rest) > 1:
+                return state[:-1] + (("l", rest[1:], then),)
+            if then is None:
+                return self._value_done(state[:-1])
+            return state[:-1] + (then,)
+
+        if kind == "N":
+            buf = frame[1] + ch
+            if ch in _NAME_CHARS and buf in self._name_prefixes:
+                return (("N", buf),)
+            if ch == "[" and frame[1] in self.schemas:
+                return (("l", ARGS_MARKER[1:], ("A", frame[1])),)
+            return None
+
+        if kind == "A":
+            if ch == "{":
+                return (frame, ("o", self.schemas[frame[1]], frozenset(), "{", None))
+            return None
+
+        if kind == "D":
+            if ch == "[":
+                return (("l", TOOL_CALLS_MARKER[1:], ("N", "")),)
+            return None
+
+        if kind == "F":
+            tail = (frame[1] + ch)[-len(TOOL_CALLS_MARKER):]
+            if tail == TOOL_CALLS_MARKER:
+                return (("N", ""),)
+            return (("F", tail),)
+
+        return None
+
+    def _start_value(self, state, schema, ch):
+        types = schema.types
+        if ch == '"' and "string" in types:
+            return state + (("s", "v", schema.enum, "", 0),)
+        if ch == "{" and "object" in types:
+            return state + (("o", schema, frozenset(), "{", None),)
+        if ch == "[" and "array" in types:
+            return state + (("r", schema.items, "["),)
+        if (ch == "-" or ch in _DIGITS) and ("integer" in types or "number" in types):
+            integer = "number" not in types
+            phase = "-" if ch == "-" else "0" if ch == "0" else "i"
+            return state + (("n", integer, phase),)
+        if ch == "t" and "boolean" in types:
+            return state + (("l", "rue", None),)
+        if ch == "f" and "boolean" in types:
+            return state + (("l", "alse", None),)
+        if ch == "n" and "null" in types:
+            return state + (("l", "ull", None),)
+        return None
+
+    def _key_done(self, state, key):
+        _, schema, seen, _, _ = state[-1]
+        current = schema.properties.get(key, _ANY) if schema.properties else _ANY
+        return state[:-1] + (("o", schema, seen | {key}, ":", current),)
+
+    def _value_done(self, state):
+        parent = state[-1]
+        kind = parent[0]
+        if kind == "o":
+            return state[:-1] + (("o", parent[1], parent[2], ",", None),)
+        if kind == "r":
+            return state[:-1] + (("r", parent[1], ","),)
+        if kind == "A":
+            return (("D",),)
+        return None
+
+    def feed(self, state, text):
+        for ch in text:
+            state = self.step(state, ch)
+            if state is None:
+                return None
+        return state
+
+
+# ---------------------------------------------------------------------------
+# Vocabulary
+# ---------------------------------------------------------------------------
+
+class TokenVocabulary:
+    """
+    Decoded token texts indexed for fast grammar masking.
+
+    Tokens are kept sorted by text so that a dead prefix prunes every token
+    sharing it with one bisect, and the states reached by a shared prefix are
+    reused by the next token. Inside an unconstrained JSON string any token
+    free of quotes, backslashes and control characters leaves the state
+    unchanged, so that (large) set is precomputed and only the remaining
+    tokens are walked.
+    """
+
+    def __init__(self, texts, eos_ids):
+        self.texts = list(texts)
+        self.eos_ids = frozenset(eos_ids)
+        ordered = sorted(
+            (t, i) for i, t in enumerate(self.texts) if t and i not in self.eos_ids
+        )
+        self._texts = [t for t, _ in ordered]
+        self._ids = [i for _, i in ordered]
+
+        string_safe = []
+        unsafe = []
+        for t, i in ordered:
+            if '"' in t or "\\" in t or min(t) < " ":
+                unsafe.append((t, i))
+            else:
+                string_safe.append(i)
+        self.string_safe = string_safe
+        self._unsafe_texts = [t for t, _ in unsafe]
+        self._unsafe_ids = [i for _, i in unsafe]
+
+    @classmethod
+    def from_tokenizer(cls, tokenizer):
+        vocab = tokenizer.get_vocab()
+        size = max(vocab.values()) + 1
+        texts = tokenizer.batch_decode([[i] for i in range(size)])
+        # SentencePiece drops the word-boundary space when a token is decoded
+        # on its own; put it back so whitespace in the grammar lines up.
+        for piece, i in vocab.items():
+            if piece.startswith("▁") and not texts[i].startswith(" "):
+                texts[i] = " " + texts[i]
+        eos_ids = getattr(tokenizer, "eos_token_ids", None) or [tokenizer.eos_token_id]
+        return cls(texts, eos_ids)
+
+    def allowed(self, grammar, state):
+        """Token ids that keep `state` alive (EOS included when legal), unordered."""
+        in_string, extra = self.allowed_parts(grammar, state)
+        return self.string_safe + extra if in_string else extra
+
+    def allowed_parts(self, grammar, state):
+        """
+        Returns (in_string, ids): when in_string is True the allowed set is
+        `string_safe` plus `ids`, otherwise just `ids`.
+        """
+        cached = grammar._allowed_cache.get(state)
+        if cached is not None:
+            return cached
+
+        top = state[-1]
+        in_string = top[0] == "s" and top[2] is None and top[4] == 0
+        if in_string:
+            ids = _walk(grammar, state, self._unsafe_texts, self._unsafe_ids)
+        else:
+            ids = _walk(grammar, state, self._texts, self._ids)
+        if grammar.accepts_eos(state):
+            ids.extend(self.eos_ids)
+
+        if len(grammar._allowed_cache) > 4096:
+            grammar._allowed_cache.clear()
+        grammar._allowed_cache[state] = (in_string, ids)
+        return in_string, ids
+
+
+def _walk(grammar, state, texts, ids):
+    allowed = []
+    states = [state]  # states[d]: state after the first d chars of `prev`
+    prev = ""
+    i = 0
+    n = len(texts)
+    while i < n:
+        text = texts[i]
+        d = 0
+        limit = min(len(prev), len(text), len(states) - 1)
+        while d < limit and text[d] == prev[d]:
+            d += 1
+        del states[d + 1:]
+        st = states[d]
+        while d < len(text):
+            st = grammar.step(st, text[d])
+            if st is None:
+                break
+            d += 1
+            states.append(st)
+        prev = text
+        if st is None:
+            # Every later token starting with text[:d + 1] dies the same way
+            i = bisect.bisect_left(texts, text[: d + 1] + "\U0010ffff", i + 1)
+            continue
+        allowed.append(ids[i])
+        i += 1
+    return allowed
+
+
+# ---------------------------------------------------------------------------
+# Logits processor
+# ---------------------------------------------------------------------------
+
+_grammar_cache = {}
+
+
+def _grammar_for(tools):
+    # Keyed on the full schemas: a tool whose parameters change under the
+    # same name must not keep the old argument grammar
+    key = hashlib.sha1(json.dumps(tools, sort_keys=True).encode("utf-8")).digest()
+    grammar = _grammar_cache.get(key)
+    if grammar is None:
+        _grammar_cache.clear()
+        grammar = _grammar_cache[key] = ToolCallGrammar(tools)
+    return grammar
+
+
+class ToolCallLogitsProcessor:
+    """
+    mlx_lm logits processor: called with the token history and the next-token
+    logits, returns the logits with grammar-violating tokens set to -inf.
+    One instance per generation.
+    """
+
+    def __init__(self, vocab, grammar):
+        self.vocab = vocab
+        self.grammar = grammar
+        self.state = grammar.initial()
+        self._seen = None
+        self._masks = {}
+        self._string_base = None
+
+    def feed_token(self, token_id):
+        if self.state is None:
+            return
+        if token_id in self.vocab.eos_ids or token_id >= len(self.vocab.texts):
+            return
+        state = self.grammar.feed(self.state, self.vocab.texts[token_id])
+        if state is None:
+            logger.debug(
+                f"[ToolGrammar] Token {token_id!r} left the grammar; constraint disabled for this turn"
+            )
+        self.state = state
+
+    def __call__(self, tokens, logits):
+        import mlx.core as mx
+
+        if self._seen is None:
+            # First call sees the prompt; only sampled tokens are fed
+            self._seen = tokens.size
+        elif tokens.size > self._seen:
+            for token_id in tokens[self._seen:].tolist():
+                self.feed_token(token_id)
+            self._seen = tokens.size
+
+        if self.state is None or self.grammar.is_free(self.state):
+            return logits
+
+        in_string, ids = self.vocab.allowed_parts(self.grammar, self.state)
+        if not in_string and not ids:
+            return logits
+        vocab_size = logits.shape[-1]
+        key = (self.state, vocab_size)
+        mask = self._masks.get(key)
+        if mask is None:
+            if in_string:
+                mask = self._string_mask(vocab_size)
+            else:
+                mask = mx.full((vocab_size,), float("-inf"))
+            ids = [i for i in ids if i < vocab_size]
+            if ids:
+                mask[mx.array(ids)] = 0.0
+            if len(self._masks) > 256:
+                self._masks.clear()
+            self._masks[key] = mask
+        return logits + mask
+
+    def _string_mask(self, vocab_size):
+        import mlx.core as mx
+
+        base = self._string_base
+        if base is None or base.shape[0] != vocab_size:
+            base = mx.full((vocab_size,), float("-inf"))
+            base[mx.array([i for i in self.vocab.string_safe if i < vocab_size])] = 0.0
+            self._string_base = base
+        # Copy so the extra ids do not leak into the shared base
+        return mx.array(base)
+
+
+def make_tool_call_processor(vocab, tools):
+    """Build a fresh processor constraining calls to the given tool schemas."""
+    return ToolCallLogitsProcessor(vocab, _grammar_for(tools))
@@ -1,6 +1,8 @@
 import json
 from typing import Dict, Any, List
 
+from littlehive.agent import tracing
+
 # --- Import tool modules here ---
 from littlehive.tools.calendar_tools import (
     CALENDAR_TOOLS_SCHEMA,
@@ -256,6 +258,14 @@ def dispatch_tool(tool_name: str, tool_args: Dict[str, Any]) -> str:
     """
     Global executor that checks all tools and runs the correct one.
     """
+    with tracing.span("tool.execute", {"tool.name": tool_name}) as span:
+        result = _dispatch(tool_name, tool_args)
+        if isinstance(result, str):
+            span.set("tool.result_chars", len(result))
+        return result
+
+
+def _dispatch(tool_name: str, tool_args: Dict[str, Any]) -> str:
     # 1. Calendar tools
     calendar_tool_names = [t["function"]["name"] for t in CALENDAR_TOOLS_SCHEMA]
     if tool_name in calendar_tool_names:
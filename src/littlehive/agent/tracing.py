@@ -0,0 +1,468 @@
+"""
+Lightweight Tracing
+Spans for one user turn or scheduler run, propagated through a ContextVar
+so nested code (tool dispatch, retries, SQLite statements, outbound HTTP)
+attaches to the right trace without threading anything through call
+signatures.
+
+    start_trace()   opens a root span (a brain turn, a scheduler job)
+    span()          opens a child of the current span; a no-op outside a trace
+    record()        adds an already-timed child (used by db.py per statement)
+    traced_job      decorator: each run of a scheduler job is its own trace
+    bind()          carries the current trace into a thread pool task
+    instrument_http() adds client spans to requests, urllib and httplib2
+
+A finished trace is appended to logs/traces.jsonl as one line in the OTLP
+JSON file format (a resourceSpans export request), rotated by size, so an
+OpenTelemetry collector's otlpjsonfile receiver can read it as is.
+load_trace() and recent_traces() read it back for the dashboard.
+"""
+
+import os
+import json
+import time
+import secrets
+import logging
+import functools
+import threading
+import contextvars
+from logging.handlers import RotatingFileHandler
+
+from littlehive.agent.paths import TRACE_PATH
+
+# OTLP span kinds and status codes
+KIND_INTERNAL = 1
+KIND_CLIENT = 3
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+TRACE_BACKUPS = 3
+# Spans beyond this in one trace are counted, not kept
+MAX_SPANS_PER_TRACE = 1000
+
+_current = contextvars.ContextVar("littlehive_span", default=None)
+_pending = {}
+_pending_lock = threading.Lock()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+class Span:
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns",
+        "attributes", "status", "status_message", "turn_id", "min_ns", "_token",
+    )
+
+    def __init__(self, name, parent=None, kind=KIND_INTERNAL, attributes=None):
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.turn_id = parent.turn_id if parent else None
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes) if attributes else {}
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self.min_ns = 0
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self._token = None
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def error(self, exc):
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(exc).__name__}: {exc}" if isinstance(exc, BaseException) else str(exc)
+
+    def activate(self):
+        """Makes this the current span; end() restores the previous one."""
+        self._token = _current.set(self)
+        return self
+
+    def end(self):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+        _finish(self)
+
+    def __enter__(self):
+        return self.activate()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.error(exc)
+        self.end()
+        return False
+
+
+class _NoopSpan:
+    """Stands in for a span when there is no trace to attach it to."""
+
+    __slots__ = ()
+
+    def set(self, key, value):
+        pass
+
+    def error(self, exc):
+        pass
+
+    def activate(self):
+        return self
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP = _NoopSpan()
+
+
+def current_span():
+    return _current.get()
+
+
+def _enabled() -> bool:
+    from littlehive.agent.config import get_config
+
+    return get_config().get("tracing_enabled", True)
+
+
+def start_trace(name: str, turn_id: str = None, attributes: dict = None, min_ms: float = 0):
+    """
+    Root span of a new trace. Traces shorter than `min_ms` are discarded when
+    they end, which keeps frequent no-op scheduler runs out of the file.
+    """
+    if not _enabled():
+        return NOOP
+    root = Span(name, attributes=attributes)
+    root.turn_id = turn_id or root.trace_id[:12]
+    root.min_ns = int(min_ms * 1_000_000)
+    with _pending_lock:
+        _pending[root.trace_id] = [[], 0]
+    return root
+
+
+def span(name: str, attributes: dict = None, kind: int = KIND_INTERNAL):
+    parent = _current.get()
+    if parent is None:
+        return NOOP
+    return Span(name, parent, kind, attributes)
+
+
+def record(name: str, elapsed_seconds: float, attributes: dict = None, kind: int = KIND_INTERNAL):
+    """Adds a child span that ended just now and took `elapsed_seconds`."""
+    parent = _current.get()
+    if parent is None:
+        return
+    child = Span(name, parent, kind, attributes)
+    child.end_ns = time.time_ns()
+    child.start_ns = child.end_ns - int(elapsed_seconds * 1_000_000_000)
+    _finish(child)
+
+
+def traced_job(func):
+    """Runs each call of a scheduler job as its own trace, named after the function."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        from littlehive.agent.config import get_config
+
+        min_ms = get_config().get("trace_job_min_ms", 100)
+        with start_trace(f"job {func.__name__}", min_ms=min_ms):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def bind(func):
+    """
+    Returns `func` bound to a copy of the current context. Threads do not
+    inherit context variables, so wrap work handed to a pool with this.
+    """
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+def _finish(s: Span):
+    with _pending_lock:
+        entry = _pending.get(s.trace_id)
+        if s.parent_id is not None and entry is not None:
+            # Root still open: held until it ends, so a trace is one line
+            if len(entry[0]) < MAX_SPANS_PER_TRACE:
+                entry[0].append(s)
+            else:
+                entry[1] += 1
+            return
+        if s.parent_id is None:
+            spans, dropped = _pending.pop(s.trace_id, ([], 0))
+            if s.end_ns - s.start_ns < s.min_ns and s.status != STATUS_ERROR:
+                return
+            if dropped:
+                s.set("littlehive.dropped_spans", dropped)
+            spans = [s] + spans
+        else:
+            # Outlived its root (e.g. a sync that ran past its timeout)
+            spans = [s]
+    try:
+        _write(spans)
+    except Exception:
+        pass
+
+
+def _value(v) -> dict:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    return {"stringValue": str(v)}
+
+
+def _otlp(s: Span) -> dict:
+    attributes = [{"key": "littlehive.turn_id", "value": {"stringValue": s.turn_id}}]
+    attributes.extend({"key": k, "value": _value(v)} for k, v in s.attributes.items())
+    status = {"code": s.status}
+    if s.status_message:
+        status["message"] = s.status_message
+    return {
+        "traceId": s.trace_id,
+        "spanId": s.span_id,
+        "parentSpanId": s.parent_id or "",
+        "name": s.name,
+        "kind": s.kind,
+        "startTimeUnixNano": str(s.start_ns),
+        "endTimeUnixNano": str(s.end_ns),
+        "attributes": attributes,
+        "status": status,
+    }
+
+
+def _get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                from littlehive.agent.config import get_config
+
+                max_mb = get_config().get("trace_file_mb", 10)
+                handler = RotatingFileHandler(
+                    TRACE_PATH, maxBytes=int(max_mb * 1024 * 1024), backupCount=TRACE_BACKUPS,
+                    encoding="utf-8",
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                _writer = handler
+    return _writer
+
+
+def _write(spans: list):
+    line = json.dumps({
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "littlehive"}}]},
+            "scopeSpans": [{"scope": {"name": "littlehive.tracing"}, "spans": [_otlp(s) for s in spans]}],
+        }]
+    }, separators=(",", ":"))
+    _get_writer().handle(logging.makeLogRecord({"msg": line, "levelno": logging.INFO}))
+
+
+# ---------------------------------------------------------------------------
+# Reading traces back
+# ---------------------------------------------------------------------------
+
+def _trace_files() -> list:
+    """Newest first: traces.jsonl, then traces.jsonl.1 ..."""
+    paths = [TRACE_PATH] + [f"{TRACE_PATH}.{i}" for i in range(1, TRACE_BACKUPS + 1)]
+    return [p for p in paths if os.path.exists(p)]
+
+
+def _spans_of(line: str) -> list:
+    spans = []
+    for resource in json.loads(line).get("resourceSpans", []):
+        for scope in resource.get("scopeSpans", []):
+            spans.extend(scope.get("spans", []))
+    return spans
+
+
+def _attributes(otlp_span: dict) -> dict:
+    attributes = {}
+    for a in otlp_span.get("attributes", []):
+        kind, value = next(iter(a["value"].items()), (None, None))
+        # OTLP JSON carries 64-bit ints as strings
+        attributes[a["key"]] = int(value) if kind == "intValue" else value
+    return attributes
+
+
+def load_trace(key: str) -> dict:
+    """
+    The most recent trace whose turn id or trace id is `key`, as a
+    waterfall: spans in start order with depth, offset and duration in ms.
+    Returns None if it is not in the trace files.
+    """
+    trace_id = None
+    spans = []
+    for path in _trace_files():
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()
+        for line in reversed(lines):
+            if (trace_id or key) not in line:
+                continue
+            for s in _spans_of(line):
+                if trace_id is None and key in (s["traceId"], _attributes(s).get("littlehive.turn_id")):
+                    trace_id = s["traceId"]
+                if s["traceId"] == trace_id:
+                    spans.append(s)
+    if not spans:
+        return None
+
+    spans.sort(key=lambda s: int(s["startTimeUnixNano"]))
+    by_id = {s["spanId"]: s for s in spans}
+    t0 = int(spans[0]["startTimeUnixNano"])
+    end = max(int(s["endTimeUnixNano"]) for s in spans)
+
+    def depth(s):
+        d = 0
+        while s["parentSpanId"] in by_id:
+            s = by_id[s["parentSpanId"]]
+            d += 1
+        return d
+
+    root_attrs = _attributes(spans[0])
+    return {
+        "trace_id": trace_id,
+        "turn_id": root_attrs.get("littlehive.turn_id"),
+        "name": spans[0]["name"],
+        "duration_ms": round((end - t0) / 1e6, 2),
+        "spans": [
+            {
+                "name": s["name"],
+                "span_id": s["spanId"],
+                "parent_id": s["parentSpanId"] or None,
+                "depth": depth(s),
+                "offset_ms": round((int(s["startTimeUnixNano"]) - t0) / 1e6, 2),
+                "duration_ms": round((int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"])) / 1e6, 2),
+                "error": s["status"].get("message") if s["status"].get("code") == STATUS_ERROR else None,
+                "attributes": {k: v for k, v in _attributes(s).items() if k != "littlehive.turn_id"},
+            }
+            for s in spans
+        ],
+    }
+
+
+def recent_traces(limit: int = 50) -> list:
+    """Root spans of the latest traces, newest first."""
+    roots = []
+    for path in _trace_files():
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()
+        for line in reversed(lines):
+            for s in _spans_of(line):
+                if s["parentSpanId"]:
+                    continue
+                start = int(s["startTimeUnixNano"])
+                roots.append({
+                    "trace_id": s["traceId"],
+                    "turn_id": _attributes(s).get("littlehive.turn_id"),
+                    "name": s["name"],
+                    "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(start / 1e9)),
+                    "duration_ms": round((int(s["endTimeUnixNano"]) - start) / 1e6, 2),
+                    "error": s["status"].get("code") == STATUS_ERROR,
+                })
+            if len(roots) >= limit:
+                return roots[:limit]
+    return roots
+
+
+# ---------------------------------------------------------------------------
+# Outbound HTTP
+# ---------------------------------------------------------------------------
+
+_http_instrumented = False
+
+
+def _http_span(method: str, url: str):
+    # Query strings can carry tokens; keep scheme, host and path only
+    return span(
+        f"HTTP {method}",
+        {"http.method": method, "http.url": str(url).split("?", 1)[0]},
+        KIND_CLIENT,
+    )
+
+
+def instrument_http():
+    """
+    Wraps the HTTP clients the tools use so each request made inside a
+    trace becomes a client span. Requests made outside a trace go straight
+    through. Safe to call more than once.
+    """
+    global _http_instrumented
+    if _http_instrumented:
+        return
+    _http_instrumented = True
+
+    try:
+        import requests
+
+        send = requests.Session.send
+
+        @functools.wraps(send)
+        def traced_send(self, request, **kwargs):
+            if _current.get() is None:
+                return send(self, request, **kwargs)
+            with _http_span(request.method, request.url) as s:
+                response = send(self, request, **kwargs)
+                s.set("http.status_code", response.status_code)
+                return response
+
+        requests.Session.send = traced_send
+    except ImportError:
+        pass
+
+    import urllib.request
+
+    open_url = urllib.request.OpenerDirector.open
+
+    @functools.wraps(open_url)
+    def traced_open(self, fullurl, *args, **kwargs):
+        if _current.get() is None:
+            return open_url(self, fullurl, *args, **kwargs)
+        if isinstance(fullurl, str):
+            method, url = ("POST" if (args and args[0]) or kwargs.get("data") else "GET"), fullurl
+        else:
+            method, url = fullurl.get_method(), fullurl.full_url
+        with _http_span(method, url) as s:
+            response = open_url(self, fullurl, *args, **kwargs)
+            s.set("http.status_code", getattr(response, "status", 0))
+            return response
+
+    urllib.request.OpenerDirector.open = traced_open
+
+    try:
+        # Transport of the Google API client
+        import httplib2
+
+        http_request = httplib2.Http.request
+
+        @functools.wraps(http_request)
+        def traced_request(self, uri, method="GET", *args, **kwargs):
+            if _current.get() is None:
+                return http_request(self, uri, method, *args, **kwargs)
+            with _http_span(method, uri) as s:
+                response, content = http_request(self, uri, method, *args, **kwargs)
+                s.set("http.status_code", response.status)
+                return response, content
+
+        httplib2.Http.request = traced_request
+    except ImportError:
+        pass
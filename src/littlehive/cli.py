@@ -411,6 +411,24 @@ def stop():
     print("  Agent stopped.")
 
 
+def db_vacuum():
+    """One-off conversion of older database files to incremental auto-vacuum."""
+    from littlehive.agent.maintenance import enable_incremental_vacuum
+    from littlehive.agent.migrations import run_migrations
+
+    if is_running(get_pid()):
+        print("  Stop the agent first (lhive stop): the VACUUM locks the database until it finishes.")
+        sys.exit(1)
+    ensure_paths()
+    run_migrations()
+    print("  Converting database files (full VACUUM)...")
+    converted = enable_incremental_vacuum()
+    if converted:
+        print(f"  Converted: {', '.join(converted)}")
+    else:
+        print("  Nothing to convert.")
+
+
 def version():
     """Print current version."""
     print(f"LittleHive v{__version__}")
@@ -477,6 +495,7 @@ def main():
         print("  update         Check for and install updates from PyPI")
         print("  version        Show current version")
         print("  auth google    Re-run Google OAuth flow")
+        print("  db vacuum      Convert older database files to incremental auto-vacuum")
         sys.exit(1)
 
     cmd = sys.argv[1].lower()
@@ -503,6 +522,12 @@ def main():
         else:
             print("Usage: lhive auth google")
             sys.exit(1)
+    elif cmd == "db":
+        if len(sys.argv) >= 3 and sys.argv[2].lower() == "vacuum":
+            db_vacuum()
+        else:
+            print("Usage: lhive db vacuum")
+            sys.exit(1)
     else:
         print(f"Unknown command: {cmd}")
         print("Run 'lhive' without arguments to see available commands.")
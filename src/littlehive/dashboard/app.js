@@ -28,6 +28,7 @@ const toolFriendlyNames = {
     reply_to_email:       "Drafting a reply",
     manage_email:         "Managing your inbox",
     get_events:           "Browsing your calendar",
+    find_free_slots:      "Finding a free slot",
     create_event:         "Creating a calendar event",
     delete_event:         "Removing a calendar event",
     set_reminder:         "Setting a reminder",
@@ -2,7 +2,6 @@ import http.server
 from littlehive.agent.logger_setup import logger
 import socketserver
 import json
-import sqlite3
 import os
 import threading
 import webbrowser
@@ -10,7 +9,8 @@ import time
 import queue
 
 # Resolve paths
-from littlehive.agent.paths import DB_PATH, CONFIG_PATH, TOKEN_PATH
+from littlehive.agent.paths import CONFIG_PATH, TOKEN_PATH
+from littlehive.agent.db import get_connection
 
 DASHBOARD_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -53,7 +53,7 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
     def do_GET(self):
         if self.path == "/api/dashboard":
             try:
-                conn = sqlite3.connect(DB_PATH)
+                conn = get_connection(readonly=True)
                 conn.row_factory = dict_factory
                 cursor = conn.cursor()
 
@@ -97,16 +97,17 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
                 )
                 if cursor.fetchone():
                     from datetime import datetime, timedelta
-                    today_str = datetime.now().strftime("%Y-%m-%d")
-                    tomorrow_str = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+                    today = datetime.now().astimezone().replace(hour=0, minute=0, second=0, microsecond=0)
+                    today_ts = int(today.timestamp())
+                    tomorrow_ts = int((today + timedelta(days=1)).timestamp())
                     cursor.execute(
-                        "SELECT * FROM cached_events WHERE start_time >= ? ORDER BY start_time ASC LIMIT 10",
-                        (today_str,)
+                        "SELECT * FROM cached_events WHERE start_ts >= ? ORDER BY start_ts ASC LIMIT 10",
+                        (today_ts,)
                     )
                     events = cursor.fetchall()
                     cursor.execute(
-                        "SELECT COUNT(*) as cnt FROM cached_events WHERE start_time >= ? AND start_time < ?",
-                        (today_str, tomorrow_str)
+                        "SELECT COUNT(*) as cnt FROM cached_events WHERE start_ts >= ? AND start_ts < ?",
+                        (today_ts, tomorrow_ts)
                     )
                     today_event_count = cursor.fetchone()["cnt"]
                 else:
@@ -221,7 +222,7 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
 
         elif self.path == "/api/memories":
             try:
-                conn = sqlite3.connect(DB_PATH)
+                conn = get_connection(readonly=True)
                 conn.row_factory = dict_factory
                 cursor = conn.cursor()
 
@@ -250,7 +251,7 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
 
         elif self.path == "/api/contacts":
             try:
-                conn = sqlite3.connect(DB_PATH)
+                conn = get_connection(readonly=True)
                 conn.row_factory = dict_factory
                 cursor = conn.cursor()
 
@@ -302,7 +303,7 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
 
         elif self.path == "/api/custom-apis":
             try:
-                conn = sqlite3.connect(DB_PATH)
+                conn = get_connection(readonly=True)
                 conn.row_factory = dict_factory
                 cursor = conn.cursor()
                 cursor.execute(
@@ -346,7 +347,7 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
 
         elif self.path == "/api/shell-audit":
             try:
-                conn = sqlite3.connect(DB_PATH)
+                conn = get_connection(readonly=True)
                 conn.row_factory = dict_factory
                 cursor = conn.cursor()
                 cursor.execute(
@@ -431,6 +432,87 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
             self.wfile.write(response_data)
             return
 
+        elif self.path == "/api/db-stats":
+            try:
+                from littlehive.agent.maintenance import table_sizes, last_maintenance
+                stats = table_sizes()
+                stats["maintenance"] = last_maintenance
+                response_data = json.dumps(stats).encode("utf-8")
+            except Exception as e:
+                response_data = json.dumps({"error": str(e)}).encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-type", "application/json")
+            self.send_header("Content-Length", str(len(response_data)))
+            self.end_headers()
+            self.wfile.write(response_data)
+            return
+
+        elif self.path.startswith("/api/logs"):
+            from urllib.parse import urlparse, parse_qs
+            params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            status = 200
+            try:
+                from littlehive.agent.log_store import query_logs
+                result = query_logs(
+                    level=params.get("level"),
+                    module=params.get("module"),
+                    since=params.get("since"),
+                    until=params.get("until"),
+                    q=params.get("q"),
+                    limit=params.get("limit"),
+                    cursor=params.get("cursor"),
+                )
+                response_data = json.dumps(result).encode("utf-8")
+            except ValueError as e:
+                # Malformed limit, since/until or cursor
+                status = 400
+                response_data = json.dumps({"error": str(e), "logs": []}).encode("utf-8")
+            except Exception as e:
+                response_data = json.dumps({"error": str(e), "logs": []}).encode("utf-8")
+
+            self.send_response(status)
+            self.send_header("Content-type", "application/json")
+            self.send_header("Content-Length", str(len(response_data)))
+            self.end_headers()
+            self.wfile.write(response_data)
+            return
+
+        elif self.path == "/api/traces" or self.path.startswith("/api/traces/"):
+            # /api/traces lists recent turns and job runs; /api/traces/<turn_id
+            # or trace_id> returns that trace as a waterfall
+            from littlehive.agent.tracing import load_trace, recent_traces
+            key = self.path[len("/api/traces/"):].split("?")[0]
+            status = 200
+            try:
+                if key:
+                    result = load_trace(key)
+                    if result is None:
+                        status = 404
+                        result = {"error": f"No trace found for '{key}'."}
+                else:
+                    result = {"traces": recent_traces()}
+                response_data = json.dumps(result).encode("utf-8")
+            except Exception as e:
+                response_data = json.dumps({"error": str(e)}).encode("utf-8")
+
+            self.send_response(status)
+            self.send_header("Content-type", "application/json")
+            self.send_header("Content-Length", str(len(response_data)))
+            self.end_headers()
+            self.wfile.write(response_data)
+            return
+
+        elif self.path == "/api/sync-stats":
+            from littlehive.agent.scheduler import sync_stats
+            response_data = json.dumps(sync_stats).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-type", "application/json")
+            self.send_header("Content-Length", str(len(response_data)))
+            self.end_headers()
+            self.wfile.write(response_data)
+            return
+
         return super().do_GET()
 
     def do_POST(self):
@@ -577,7 +659,7 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
             try:
                 data = json.loads(post_data.decode("utf-8"))
                 target = data.get("target", "")
-                conn = sqlite3.connect(DB_PATH)
+                conn = get_connection()
                 cursor = conn.cursor()
                 msg = "Unknown target"
 
@@ -683,7 +765,7 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
                 data = json.loads(post_data.decode("utf-8"))
                 new_fact = data.get("fact_text", "")
                 
-                conn = sqlite3.connect(DB_PATH)
+                conn = get_connection()
                 cursor = conn.cursor()
                 cursor.execute("UPDATE core_memory SET fact_text = ? WHERE id = ?", (new_fact, memory_id))
                 conn.commit()
@@ -753,7 +835,7 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
         if self.path.startswith("/api/memories/"):
             try:
                 memory_id = int(self.path.split("/")[-1])
-                conn = sqlite3.connect(DB_PATH)
+                conn = get_connection()
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM core_memory WHERE id = ?", (memory_id,))
                 conn.commit()
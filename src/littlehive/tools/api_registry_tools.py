@@ -3,13 +3,13 @@ import re
 
 import requests
 from littlehive.agent.logger_setup import logger
-from littlehive.agent.paths import DB_PATH
+from littlehive.agent.db import get_connection
 
 import sqlite3
 
 
 def _get_db():
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection()
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -1,17 +1,24 @@
 import json
 import datetime
-from googleapiclient.discovery import build
-from littlehive.tools.google_auth import get_credentials
+from googleapiclient.errors import HttpError
+from littlehive.tools.google_auth import get_service
+from littlehive.agent.logger_setup import logger
 
 
 def get_calendar_service():
-    creds = get_credentials()
-    if not creds:
-        return None
-    try:
-        return build("calendar", "v3", credentials=creds)
-    except Exception:
-        return None
+    return get_service("calendar", "v3")
+
+
+def _event_summary(e: dict) -> dict:
+    return {
+        "id": e["id"],
+        "summary": e.get("summary", "No Title"),
+        "start": e["start"].get("dateTime", e["start"].get("date")),
+        "end": e["end"].get("dateTime", e["end"].get("date")),
+        "description": e.get("description", ""),
+        "attendees": [a.get("email") for a in e.get("attendees", [])],
+        "hangout_link": e.get("hangoutLink", "")
+    }
 
 
 def _live_get_events(
@@ -35,29 +42,301 @@ def _live_get_events(
             kwargs["timeMax"] = time_max
         events_result = service.events().list(**kwargs).execute()
         events = events_result.get("items", [])
-        return json.dumps(
-            [
-                {
-                    "id": e["id"],
-                    "summary": e.get("summary", "No Title"),
-                    "start": e["start"].get("dateTime", e["start"].get("date")),
-                    "end": e["end"].get("dateTime", e["end"].get("date")),
-                    "description": e.get("description", ""),
-                    "attendees": [a.get("email") for a in e.get("attendees", [])],
-                    "hangout_link": e.get("hangoutLink", "")
-                }
-                for e in events
-            ]
-        )
+        return json.dumps([_event_summary(e) for e in events])
     except Exception as e:
         return json.dumps({"error": str(e)})
 
+
+# --- Incremental Sync ---
+
+_SYNC_PAGE_SIZE = 250
+_SYNC_FIELDS = (
+    "items(id,status,summary,start,end,description,attendees/email,hangoutLink),"
+    "nextPageToken,nextSyncToken"
+)
+
+
+def _sync_horizon():
+    from littlehive.agent.config import get_config
+
+    config = get_config()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    start = now - datetime.timedelta(days=config.get("calendar_sync_days_back", 30))
+    end = now + datetime.timedelta(days=config.get("calendar_sync_days_ahead", 60))
+    return start, end
+
+
+def _event_time(value: str) -> datetime.datetime:
+    """dateTime or all-day date from the API as an aware datetime."""
+    parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed
+
+
+def _list_event_pages(service, **kwargs):
+    """Yields every page of events.list; the last one carries nextSyncToken."""
+    page_token = None
+    while True:
+        page = (
+            service.events()
+            .list(
+                calendarId="primary",
+                singleEvents=True,
+                maxResults=_SYNC_PAGE_SIZE,
+                pageToken=page_token,
+                fields=_SYNC_FIELDS,
+                **kwargs,
+            )
+            .execute()
+        )
+        yield page
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            return
+
+
+def _full_event_resync(service) -> dict:
+    from littlehive.agent.local_cache import replace_cached_events, update_sync_state
+
+    start, end = _sync_horizon()
+    events = []
+    sync_token = None
+    for page in _list_event_pages(
+        service, timeMin=start.isoformat(), timeMax=end.isoformat()
+    ):
+        events.extend(_event_summary(e) for e in page.get("items", []) if e.get("status") != "cancelled")
+        sync_token = page.get("nextSyncToken", sync_token)
+
+    replace_cached_events(events)
+    # last_sync_timestamp marks the last *full* sync for calendar; it decides
+    # when the horizon has drifted far enough to list it again.
+    update_sync_state(
+        "calendar",
+        timestamp_ms=int(datetime.datetime.now(datetime.timezone.utc).timestamp() * 1000),
+        history_id=sync_token,
+    )
+    return {"events": events, "removed": [], "mode": "full"}
+
+
+def sync_events() -> dict:
+    """
+    Bring cached_events up to date with the primary calendar.
+
+    The first run lists the configured horizon (calendar_sync_days_back /
+    calendar_sync_days_ahead) and stores the nextSyncToken in sync_state.
+    Later runs send only that token and receive the events changed since,
+    which are upserted or, when cancelled or moved outside the horizon,
+    deleted from the cache. Google rejects timeMin/timeMax alongside a sync
+    token, so events that simply age into the forward edge of the horizon
+    are picked up by a full relist every calendar_full_sync_hours, or
+    immediately when the token expires (410 Gone).
+
+    Returns {"events": [changed events in the horizon], "removed": [ids],
+    "mode": "incremental" | "full"}, or {"error": ...}.
+    """
+    from littlehive.agent.config import get_config
+    from littlehive.agent.local_cache import (
+        get_sync_state,
+        update_sync_state,
+        apply_event_changes,
+    )
+
+    service = get_calendar_service()
+    if not service:
+        return {"error": "Auth failed"}
+
+    state = get_sync_state("calendar")
+    sync_token = state.get("last_history_id") if state else None
+    full_sync_ms = get_config().get("calendar_full_sync_hours", 24) * 3600 * 1000
+    now_ms = int(datetime.datetime.now(datetime.timezone.utc).timestamp() * 1000)
+    if not sync_token or now_ms - (state.get("last_sync_timestamp") or 0) >= full_sync_ms:
+        return _full_event_resync(service)
+
+    start, end = _sync_horizon()
+    changed = {}
+    removed = set()
+    try:
+        for page in _list_event_pages(service, syncToken=sync_token):
+            for e in page.get("items", []):
+                if e.get("status") == "cancelled":
+                    changed.pop(e["id"], None)
+                    removed.add(e["id"])
+                    continue
+                event = _event_summary(e)
+                try:
+                    in_horizon = (
+                        _event_time(event["end"]) >= start and _event_time(event["start"]) <= end
+                    )
+                except (TypeError, ValueError):
+                    in_horizon = True
+                if in_horizon:
+                    changed[e["id"]] = event
+                    removed.discard(e["id"])
+                else:
+                    changed.pop(e["id"], None)
+                    removed.add(e["id"])
+            sync_token = page.get("nextSyncToken", sync_token)
+    except HttpError as e:
+        if e.resp.status == 410:
+            logger.info("[Calendar Sync] Sync token expired; falling back to a full resync.")
+            return _full_event_resync(service)
+        raise
+
+    apply_event_changes(list(changed.values()), list(removed))
+    update_sync_state("calendar", history_id=sync_token)
+    return {"events": list(changed.values()), "removed": sorted(removed), "mode": "incremental"}
+
+
 def get_events(
     time_min: str = None, time_max: str = None, max_results: int = 10
 ) -> str:
     """Fetch events from local cache."""
     from littlehive.agent.local_cache import query_cached_events
-    return query_cached_events(time_min=time_min, time_max=time_max)
+    if not time_min:
+        # The cache spans weeks on either side of today; default to upcoming
+        # events like the live API call did.
+        time_min = datetime.datetime.utcnow().isoformat() + "Z"
+    try:
+        # The cache holds ~90 days; never hand the model more than it asked for
+        return query_cached_events(time_min=time_min, time_max=time_max, limit=max_results or 10)
+    except ValueError as e:
+        return json.dumps({"error": f"Invalid time_min/time_max (expected ISO 8601): {e}"})
+
+
+# --- Free/busy ---
+# Slot starts are rounded up to this step so "now" never yields 14:07
+SLOT_STEP_SECONDS = 15 * 60
+DEFAULT_SEARCH_DAYS = 7
+
+
+def _local_hour(day: datetime.date, hour: int) -> int:
+    """Epoch seconds of `hour` o'clock local time on `day` (hour may be 24)."""
+    moment = datetime.datetime.combine(day, datetime.time()) + datetime.timedelta(hours=hour)
+    return int(moment.astimezone().timestamp())
+
+
+def _dnd_blocks(first_day: datetime.date, last_day: datetime.date, config: dict) -> list:
+    """Quiet hours as busy intervals, one per day (overnight spans roll into the next day)."""
+    dnd_start = config.get("dnd_start", 23)
+    dnd_end = config.get("dnd_end", 7)
+    if dnd_start == dnd_end:
+        return []
+    blocks = []
+    day = first_day - datetime.timedelta(days=1)
+    while day <= last_day:
+        if dnd_start > dnd_end:
+            blocks.append((_local_hour(day, dnd_start), _local_hour(day, 24 + dnd_end)))
+        else:
+            blocks.append((_local_hour(day, dnd_start), _local_hour(day, dnd_end)))
+        day += datetime.timedelta(days=1)
+    return blocks
+
+
+def _search_windows(start_ts: int, end_ts: int, working_hours_only: bool, config: dict) -> list:
+    """Per-day windows to search in, clipped to [start_ts, end_ts)."""
+    if not working_hours_only:
+        return [(start_ts, end_ts)]
+    work_start = config.get("work_hours_start", 9)
+    work_end = config.get("work_hours_end", 18)
+    work_days = set(config.get("work_days", [0, 1, 2, 3, 4]))
+    windows = []
+    day = datetime.datetime.fromtimestamp(start_ts).date()
+    last_day = datetime.datetime.fromtimestamp(end_ts).date()
+    while day <= last_day:
+        if day.weekday() in work_days:
+            lo = max(start_ts, _local_hour(day, work_start))
+            hi = min(end_ts, _local_hour(day, work_end))
+            if lo < hi:
+                windows.append((lo, hi))
+        day += datetime.timedelta(days=1)
+    return windows
+
+
+def _merge_intervals(intervals: list) -> list:
+    """Union of (start, end) intervals, sorted and non-overlapping."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def free_intervals(windows: list, busy: list, min_seconds: int) -> list:
+    """
+    Gaps of at least `min_seconds` inside `windows` that no `busy` interval
+    covers. Both inputs are (start, end) epoch pairs; windows must be sorted
+    and disjoint. One sweep over the merged busy list.
+    """
+    busy = _merge_intervals(busy)
+    free = []
+    i = 0
+    for lo, hi in windows:
+        while i < len(busy) and busy[i][1] <= lo:
+            i += 1
+        cursor = lo
+        j = i
+        while j < len(busy) and busy[j][0] < hi:
+            if busy[j][0] > cursor:
+                free.append((cursor, busy[j][0]))
+            cursor = max(cursor, busy[j][1])
+            j += 1
+        if cursor < hi:
+            free.append((cursor, hi))
+    slots = []
+    for start, end in free:
+        start = -(-start // SLOT_STEP_SECONDS) * SLOT_STEP_SECONDS
+        if end - start >= min_seconds:
+            slots.append((start, end))
+    return slots
+
+
+def find_free_slots(
+    time_min: str = None,
+    time_max: str = None,
+    duration_minutes: int = 30,
+    working_hours_only: bool = True,
+    max_results: int = 10,
+) -> str:
+    """Free windows long enough for a meeting, computed from the local event cache."""
+    from littlehive.agent.config import get_config
+    from littlehive.agent.local_cache import busy_intervals, to_epoch
+
+    try:
+        now = int(datetime.datetime.now().timestamp())
+        start_ts = max(to_epoch(time_min), now) if time_min else now
+        end_ts = (
+            to_epoch(time_max) if time_max
+            else start_ts + DEFAULT_SEARCH_DAYS * 86400
+        )
+        if end_ts <= start_ts:
+            return json.dumps({"error": "time_max must be after time_min (and in the future)"})
+        config = get_config()
+
+        windows = _search_windows(start_ts, end_ts, working_hours_only, config)
+        busy = busy_intervals(start_ts, end_ts) + _dnd_blocks(
+            datetime.datetime.fromtimestamp(start_ts).date(),
+            datetime.datetime.fromtimestamp(end_ts).date(),
+            config,
+        )
+        slots = free_intervals(windows, busy, int(duration_minutes) * 60)
+
+        def _iso(ts):
+            return datetime.datetime.fromtimestamp(ts).astimezone().isoformat()
+
+        return json.dumps({
+            "duration_minutes": duration_minutes,
+            "slots": [
+                {"start": _iso(s), "end": _iso(e), "free_minutes": (e - s) // 60}
+                for s, e in slots[:max_results]
+            ],
+            "more": len(slots) > max_results,
+        })
+    except Exception as e:
+        return json.dumps({"error": str(e)})
 
 
 def _actual_create_event(
@@ -179,6 +458,33 @@ CALENDAR_TOOLS_SCHEMA = [
             },
         },
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "find_free_slots",
+            "description": "Find free time for a meeting of a given length. Use this for 'when am I free' questions instead of reading get_events. Respects working hours and quiet hours.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "time_min": {
+                        "type": "string",
+                        "description": "Start of the search, ISO 8601 (default: now)",
+                    },
+                    "time_max": {
+                        "type": "string",
+                        "description": "End of the search, ISO 8601 (default: a week from time_min)",
+                    },
+                    "duration_minutes": {"type": "integer"},
+                    "working_hours_only": {
+                        "type": "boolean",
+                        "description": "Default true. Set false for personal plans outside work hours.",
+                    },
+                    "max_results": {"type": "integer"},
+                },
+                "required": ["duration_minutes"],
+            },
+        },
+    },
     {
         "type": "function",
         "function": {
@@ -308,6 +614,7 @@ def execute_tool(name: str, args: dict) -> str:
 
     funcs = {
         "get_events": get_events,
+        "find_free_slots": find_free_slots,
         "create_event": create_event,
         "update_event": update_event,
         "delete_event": delete_event,
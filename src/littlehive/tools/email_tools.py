@@ -1,11 +1,14 @@
 import re
 import json
+import time
+import datetime
 import markdown
 from littlehive.agent.logger_setup import logger
 import base64
 from email.message import EmailMessage
-from googleapiclient.discovery import build
-from littlehive.tools.google_auth import get_credentials
+from html.parser import HTMLParser
+from googleapiclient.errors import HttpError
+from littlehive.tools.google_auth import get_service
 
 
 _EMAIL_CSS = (
@@ -26,13 +29,101 @@ def _md_to_html(body: str) -> str:
 
 
 def get_gmail_service():
-    creds = get_credentials()
-    if not creds:
-        return None
-    try:
-        return build("gmail", "v1", credentials=creds)
-    except Exception:
-        return None
+    return get_service("gmail", "v1")
+
+
+# Gmail accepts up to 100 calls per HTTP batch but starts rate-limiting
+# well before that; 50 keeps a full page of results to two round trips.
+_BATCH_SIZE = 50
+
+
+def _fetch_email_summaries(service, message_ids: list) -> list:
+    """Fetch header summaries for the given message IDs using batched metadata gets."""
+    email_list = []
+
+    def batch_callback(request_id, response, exception):
+        if exception is not None:
+            logger.error(f"[Email Batch Error] {exception}")
+            return
+
+        headers = response.get("payload", {}).get("headers", [])
+        subject = next(
+            (h["value"] for h in headers if h["name"].lower() == "subject"),
+            "No Subject",
+        )
+        sender = next(
+            (h["value"] for h in headers if h["name"].lower() == "from"),
+            "Unknown Sender",
+        )
+        date = next(
+            (h["value"] for h in headers if h["name"].lower() == "date"),
+            "Unknown Date",
+        )
+        recipients = ", ".join(
+            h["value"] for h in headers if h["name"].lower() in ("to", "cc")
+        )
+
+        # Extract internal date for cache ordering
+        internal_date = int(response.get("internalDate", "0"))
+
+        # Check for one-click unsubscribe links
+        unsubscribe_header = next(
+            (
+                h["value"]
+                for h in headers
+                if h["name"].lower() == "list-unsubscribe"
+            ),
+            None,
+        )
+        unsubscribe_link = None
+        if unsubscribe_header:
+            match = re.search(r"<(https?://[^>]+)>", unsubscribe_header)
+            if match:
+                unsubscribe_link = match.group(1)
+
+        # Determine if unread based on labels
+        label_ids = response.get("labelIds", [])
+        is_read = "UNREAD" not in label_ids
+
+        email_info = {
+            "id": response["id"],
+            "thread_id": response["threadId"],
+            "sender": sender,
+            "subject": subject,
+            "date": date,
+            "snippet": response.get("snippet", ""),
+            "is_read": is_read,
+            "timestamp_ms": internal_date,
+            "recipients": recipients,
+            "label_ids": label_ids,
+            # Metadata responses carry no parts; a multipart/mixed root is
+            # how attachments are sent in practice.
+            "has_attachment": response.get("payload", {}).get("mimeType") == "multipart/mixed",
+        }
+        if unsubscribe_link:
+            email_info["unsubscribe_link"] = unsubscribe_link
+
+        email_list.append(email_info)
+
+    for i in range(0, len(message_ids), _BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=batch_callback)
+        for msg_id in message_ids[i : i + _BATCH_SIZE]:
+            # Use fields mask to severely restrict the payload size returned by Google
+            req = (
+                service.users()
+                .messages()
+                .get(
+                    userId="me",
+                    id=msg_id,
+                    format="metadata",
+                    metadataHeaders=["From", "To", "Cc", "Subject", "Date", "List-Unsubscribe"],
+                    fields="id,threadId,snippet,payload(headers,mimeType),internalDate,labelIds",
+                )
+            )
+            batch.add(req)
+        batch.execute()
+
+    return email_list
 
 
 def _live_search_emails(query: str = "is:unread", max_results: int = 10) -> str:
@@ -59,95 +150,401 @@ def _live_search_emails(query: str = "is:unread", max_results: int = 10) -> str:
                 {"emails": [], "message": "No emails found matching query."}
             )
 
-        email_list = []
+        email_list = _fetch_email_summaries(service, [m["id"] for m in messages])
+        return json.dumps({"emails": email_list})
+    except Exception as e:
+        return json.dumps({"error": str(e)})
+
 
-        def batch_callback(request_id, response, exception):
-            if exception is not None:
-                logger.error(f"[Email Batch Error] {exception}")
-                return
+# --- Incremental Sync ---
 
-            headers = response.get("payload", {}).get("headers", [])
-            subject = next(
-                (h["value"] for h in headers if h["name"].lower() == "subject"),
-                "No Subject",
-            )
-            sender = next(
-                (h["value"] for h in headers if h["name"].lower() == "from"),
-                "Unknown Sender",
+# The cache holds inbox mail only: archiving drops a message from it (see
+# manage_email), so the sync and the backfill never list archived mail either
+SYNC_QUERY = "newer_than:1d in:inbox -in:sent"
+_HISTORY_TYPES = ["messageAdded", "messageDeleted", "labelAdded", "labelRemoved"]
+_HISTORY_FIELDS = (
+    "history(messagesAdded/message(id,labelIds),messagesDeleted/message/id,"
+    "labelsAdded(labelIds,message(id,labelIds)),labelsRemoved(labelIds,message(id,labelIds))),"
+    "nextPageToken,historyId"
+)
+_SKIP_LABELS = {"SENT", "DRAFT"}
+_DROP_LABELS = {"TRASH", "SPAM"}
+
+
+def _prefetch_unread(service, emails: list):
+    unread = sorted(
+        (e for e in emails if not e["is_read"]),
+        key=lambda e: e.get("timestamp_ms") or 0,
+        reverse=True,
+    )
+    try:
+        prefetch_email_bodies(service, [e["id"] for e in unread])
+    except Exception as e:
+        # A missed prefetch only costs a live fetch on first read
+        logger.warning(f"[Email Prefetch] Failed: {e}")
+
+
+def _full_email_resync(service, max_results: int) -> dict:
+    """List the sync window from scratch and record the mailbox history ID."""
+    from littlehive.agent.local_cache import upsert_emails, update_sync_state
+
+    # Read the history ID first: anything that changes while we list is
+    # replayed by the next incremental sync instead of being lost.
+    history_id = (
+        service.users().getProfile(userId="me", fields="historyId").execute()["historyId"]
+    )
+    message_ids = []
+    page_token = None
+    while len(message_ids) < max_results:
+        results = (
+            service.users()
+            .messages()
+            .list(
+                userId="me",
+                q=SYNC_QUERY,
+                maxResults=min(100, max_results - len(message_ids)),
+                pageToken=page_token,
+                fields="messages(id),nextPageToken",
             )
-            date = next(
-                (h["value"] for h in headers if h["name"].lower() == "date"),
-                "Unknown Date",
+            .execute()
+        )
+        message_ids.extend(m["id"] for m in results.get("messages", []))
+        page_token = results.get("nextPageToken")
+        if not page_token:
+            break
+
+    emails = _fetch_email_summaries(service, message_ids)
+    upsert_emails(emails)
+    _prefetch_unread(service, emails)
+    update_sync_state("gmail", timestamp_ms=int(time.time() * 1000), history_id=str(history_id))
+    return {"emails": emails, "removed": [], "mode": "full"}
+
+
+def sync_emails(max_results: int = 100) -> dict:
+    """
+    Bring cached_emails up to date with Gmail.
+
+    With a stored history ID only the changes since the last sync are
+    fetched (history.list): new messages, and uncached ones moved into the
+    inbox, get one batched metadata fetch, deletions and trash/spam/archive
+    moves are dropped from the cache and label changes (read/unread
+    included) are applied in place. Without one, or when Gmail reports the
+    ID as expired, the sync window is re-listed in full.
+
+    Returns {"emails": [summaries fetched this round], "removed": [ids],
+    "mode": "incremental" | "full"}, or {"error": ...}.
+    """
+    from littlehive.agent.local_cache import (
+        get_sync_state,
+        update_sync_state,
+        upsert_emails,
+        delete_cached_emails,
+        set_cached_email_labels,
+        cached_email_timestamps,
+    )
+
+    service = get_gmail_service()
+    if not service:
+        return {"error": "Auth failed"}
+
+    state = get_sync_state("gmail")
+    start_history_id = state.get("last_history_id") if state else None
+    if not start_history_id:
+        return _full_email_resync(service, max_results)
+
+    added = {}
+    removed = set()
+    relabelled = {}
+    # Moved into the inbox (unarchived, or out of spam); fetched unless cached
+    inboxed = set()
+    latest_history_id = start_history_id
+    page_token = None
+    try:
+        while True:
+            resp = (
+                service.users()
+                .history()
+                .list(
+                    userId="me",
+                    startHistoryId=start_history_id,
+                    historyTypes=_HISTORY_TYPES,
+                    pageToken=page_token,
+                    maxResults=500,
+                    fields=_HISTORY_FIELDS,
+                )
+                .execute()
             )
-            
-            # Extract internal date for cache ordering
-            internal_date = int(response.get("internalDate", "0"))
-
-            # Check for one-click unsubscribe links
-            unsubscribe_header = next(
-                (
-                    h["value"]
-                    for h in headers
-                    if h["name"].lower() == "list-unsubscribe"
-                ),
-                None,
+            for record in resp.get("history", []):
+                for item in record.get("messagesAdded", []):
+                    msg = item["message"]
+                    labels = set(msg.get("labelIds", []))
+                    if "INBOX" not in labels or labels & (_SKIP_LABELS | _DROP_LABELS):
+                        continue
+                    added[msg["id"]] = True
+                    removed.discard(msg["id"])
+                for item in record.get("messagesDeleted", []):
+                    msg_id = item["message"]["id"]
+                    added.pop(msg_id, None)
+                    relabelled.pop(msg_id, None)
+                    removed.add(msg_id)
+                for key in ("labelsAdded", "labelsRemoved"):
+                    for item in record.get(key, []):
+                        msg = item["message"]
+                        msg_id = msg["id"]
+                        labels = set(msg.get("labelIds", []))
+                        archived = key == "labelsRemoved" and "INBOX" in item.get("labelIds", [])
+                        if labels & _DROP_LABELS or archived:
+                            # Same rule as manage_email: gone from the inbox, gone from the cache
+                            added.pop(msg_id, None)
+                            relabelled.pop(msg_id, None)
+                            removed.add(msg_id)
+                        elif msg_id not in removed:
+                            relabelled[msg_id] = msg.get("labelIds", [])
+                            if key == "labelsAdded" and "INBOX" in item.get("labelIds", []):
+                                inboxed.add(msg_id)
+            latest_history_id = resp.get("historyId", latest_history_id)
+            page_token = resp.get("nextPageToken")
+            if not page_token:
+                break
+    except HttpError as e:
+        if e.resp.status == 404:
+            logger.info("[Email Sync] History ID expired; falling back to a full resync.")
+            return _full_email_resync(service, max_results)
+        raise
+
+    inboxed = [
+        m for m in inboxed
+        if m not in added and "INBOX" in relabelled.get(m, []) and not set(relabelled[m]) & _SKIP_LABELS
+    ]
+    known = cached_email_timestamps(inboxed)
+    added.update((m, True) for m in inboxed if m not in known)
+
+    emails = _fetch_email_summaries(service, list(added)) if added else []
+    upsert_emails(emails)
+    _prefetch_unread(service, emails)
+    delete_cached_emails(list(removed))
+    set_cached_email_labels({m: labels for m, labels in relabelled.items() if m not in added})
+    update_sync_state(
+        "gmail", timestamp_ms=int(time.time() * 1000), history_id=str(latest_history_id)
+    )
+    return {"emails": emails, "removed": sorted(removed), "mode": "incremental"}
+
+
+# Messages listed per backfill call; the rest follows on later polls
+_BACKFILL_PER_RUN = 500
+
+
+def backfill_emails() -> dict:
+    """
+    Fill the cache back to email_cache_retention_days, at most
+    _BACKFILL_PER_RUN messages per call, newest first. Progress lives in
+    sync_state ("gmail_backfill"): last_sync_timestamp is the point the
+    cache is complete back to, so raising the retention later resumes from
+    there instead of starting over. Messages already cached are not fetched
+    again.
+
+    Returns {"emails": [summaries fetched], "removed": [], "mode":
+    "backfill" | "idle"}, or {"error": ...}.
+    """
+    from littlehive.agent.local_cache import (
+        get_sync_state,
+        update_sync_state,
+        upsert_emails,
+        cached_email_timestamps,
+        _email_retention_ms,
+    )
+
+    now_ms = int(time.time() * 1000)
+    target_ms = now_ms - _email_retention_ms()
+    state = get_sync_state("gmail_backfill")
+    cursor_ms = (state or {}).get("last_sync_timestamp") or now_ms
+    if cursor_ms <= target_ms:
+        return {"emails": [], "removed": [], "mode": "idle"}
+
+    service = get_gmail_service()
+    if not service:
+        return {"error": "Auth failed"}
+
+    query = f"in:inbox -in:sent after:{target_ms // 1000} before:{cursor_ms // 1000 + 1}"
+    message_ids = []
+    page_token = None
+    while len(message_ids) < _BACKFILL_PER_RUN:
+        results = (
+            service.users()
+            .messages()
+            .list(
+                userId="me",
+                q=query,
+                maxResults=min(100, _BACKFILL_PER_RUN - len(message_ids)),
+                pageToken=page_token,
+                fields="messages(id),nextPageToken",
             )
-            unsubscribe_link = None
-            if unsubscribe_header:
-                match = re.search(r"<(https?://[^>]+)>", unsubscribe_header)
-                if match:
-                    unsubscribe_link = match.group(1)
-            
-            # Determine if unread based on labels
-            label_ids = response.get("labelIds", [])
-            is_read = "UNREAD" not in label_ids
-
-            email_info = {
-                "id": response["id"],
-                "thread_id": response["threadId"],
-                "sender": sender,
-                "subject": subject,
-                "date": date,
-                "snippet": response.get("snippet", ""),
-                "is_read": is_read,
-                "timestamp_ms": internal_date
-            }
-            if unsubscribe_link:
-                email_info["unsubscribe_link"] = unsubscribe_link
+            .execute()
+        )
+        message_ids.extend(m["id"] for m in results.get("messages", []))
+        page_token = results.get("nextPageToken")
+        if not page_token:
+            break
+
+    known = cached_email_timestamps(message_ids)
+    emails = _fetch_email_summaries(service, [m for m in message_ids if m not in known])
+    upsert_emails(emails)
+
+    if page_token is None:
+        new_cursor_ms = target_ms
+    else:
+        stamps = [e["timestamp_ms"] for e in emails] + [t for t in known.values() if t]
+        new_cursor_ms = min(stamps) if stamps else target_ms
+    update_sync_state("gmail_backfill", timestamp_ms=new_cursor_ms)
+    logger.info(
+        f"[Email Sync] Backfilled {len(emails)} emails ({len(known)} already cached); "
+        f"complete back to {datetime.datetime.fromtimestamp(new_cursor_ms / 1000):%Y-%m-%d %H:%M}"
+    )
+    return {"emails": emails, "removed": [], "mode": "backfill"}
+
+
+def search_emails(query: str = "is:unread", max_results: int = 10) -> str:
+    """
+    Search inbox using the local cache; queries the cache cannot answer
+    exactly (see agent/gmail_query.py) go to the live API.
+    """
+    from littlehive.agent.local_cache import search_cached_emails, email_retention_days
+    emails = search_cached_emails(query, max_results)
+    if emails is None:
+        logger.info(f"[Email Search] Query not answerable from cache, searching live: {query}")
+        return _live_search_emails(query, max_results)
+    return json.dumps(
+        {
+            "emails": emails,
+            "source": "local_cache",
+            "message": f"Showing emails from the last {email_retention_days()} days.",
+        }
+    )
+
+
+class _HTMLText(HTMLParser):
+    """Collects the visible text of an HTML body (no scripts, styles or tags)."""
+
+    _SKIP = {"script", "style", "head", "title"}
+    _BREAKS = {"br", "p", "div", "tr", "li", "h1", "h2", "h3", "h4", "table"}
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIP:
+            self._skip += 1
+        elif tag in self._BREAKS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def _html_to_text(html: str) -> str:
+    parser = _HTMLText()
+    parser.feed(html)
+    text = "".join(parser.parts)
+    return re.sub(r"\n\s*\n+", "\n\n", re.sub(r"[ \t\r\f\v]+", " ", text)).strip()
+
+
+def _decode_part(part: dict) -> str:
+    data = part.get("body", {}).get("data", "")
+    return base64.urlsafe_b64decode(data).decode("utf-8", errors="replace") if data else ""
+
+
+def _extract_body(payload: dict) -> tuple:
+    """
+    (text, source) for a format="full" payload: the first text/plain part,
+    else the visible text of the first text/html part, else ("", None).
+    """
+    html_part = None
+    stack = [payload]
+    while stack:
+        part = stack.pop(0)
+        mime_type = part.get("mimeType")
+        if mime_type == "text/plain":
+            text = _decode_part(part)
+            if text:
+                return text, "plain"
+        elif mime_type == "text/html" and html_part is None:
+            html_part = part
+        stack.extend(part.get("parts", []))
+    if html_part is not None:
+        text = _html_to_text(_decode_part(html_part))
+        if text:
+            return text, "html"
+    return "", None
+
+
+def _full_email_record(msg: dict) -> dict:
+    payload = msg.get("payload", {})
+    body_text, source = _extract_body(payload)
+    if not body_text:
+        body_text, source = msg.get("snippet", "No readable text body found."), "snippet"
+    headers = payload.get("headers", [])
+    subject = next(
+        (h["value"] for h in headers if h["name"].lower() == "subject"),
+        "No Subject",
+    )
+    sender = next(
+        (h["value"] for h in headers if h["name"].lower() == "from"),
+        "Unknown Sender",
+    )
+    return {"id": msg["id"], "sender": sender, "subject": subject, "body": body_text, "body_source": source}
+
+
+# Bodies fetched ahead of time per sync; the newest unread mail is what the
+# user (or the auto-respond flow) opens next.
+_PREFETCH_LIMIT = 25
 
-            email_list.append(email_info)
 
-        # Execute all get requests in a single HTTP batch
+def prefetch_email_bodies(service, message_ids: list):
+    """Fetch and cache full bodies for messages not cached yet, in HTTP batches."""
+    from littlehive.agent.local_cache import cached_email_body_ids, store_email_bodies
+
+    cached = cached_email_body_ids(message_ids)
+    wanted = [m for m in message_ids if m not in cached][:_PREFETCH_LIMIT]
+    records = []
+
+    def batch_callback(request_id, response, exception):
+        if exception is not None:
+            logger.warning(f"[Email Prefetch] {exception}")
+            return
+        records.append(_full_email_record(response))
+
+    for i in range(0, len(wanted), _BATCH_SIZE):
         batch = service.new_batch_http_request(callback=batch_callback)
-        for msg in messages:
-            # Use fields mask to severely restrict the payload size returned by Google
-            req = (
-                service.users()
-                .messages()
-                .get(
+        for msg_id in wanted[i : i + _BATCH_SIZE]:
+            batch.add(
+                service.users().messages().get(
                     userId="me",
-                    id=msg["id"],
-                    format="metadata",
-                    metadataHeaders=["From", "Subject", "Date", "List-Unsubscribe"],
-                    fields="id,threadId,snippet,payload/headers,internalDate,labelIds",
+                    id=msg_id,
+                    format="full",
+                    fields="id,snippet,payload",
                 )
             )
-            batch.add(req)
-
         batch.execute()
+    store_email_bodies(records)
 
-        return json.dumps({"emails": email_list})
-    except Exception as e:
-        return json.dumps({"error": str(e)})
 
-def search_emails(query: str = "is:unread", max_results: int = 10) -> str:
-    """Search inbox using local cache."""
-    from littlehive.agent.local_cache import query_cached_emails
-    return query_cached_emails(query, max_results)
+def read_full_email(message_id: str) -> str:
+    """Fetch the full text body of a specific email (from the body cache when possible)."""
+    from littlehive.agent.local_cache import get_email_body, store_email_bodies
 
+    cached = get_email_body(message_id)
+    if cached is not None:
+        return json.dumps(
+            {"id": message_id, "sender": cached["sender"], "subject": cached["subject"], "body": cached["body"]}
+        )
 
-def read_full_email(message_id: str) -> str:
-    """Fetch the full raw text body of a specific email."""
     service = get_gmail_service()
     if not service:
         return json.dumps({"error": "Auth failed"})
@@ -158,38 +555,10 @@ def read_full_email(message_id: str) -> str:
             .get(userId="me", id=message_id, format="full")
             .execute()
         )
-        payload = msg.get("payload", {})
-
-        # Recursive function to dig through multipart emails to find the plain text
-        def get_text(payload):
-            mime_type = payload.get("mimeType")
-            if mime_type == "text/plain":
-                data = payload.get("body", {}).get("data", "")
-                if data:
-                    return base64.urlsafe_b64decode(data).decode("utf-8")
-            elif "parts" in payload:
-                for part in payload["parts"]:
-                    text = get_text(part)
-                    if text:
-                        return text
-            return ""
-
-        body_text = get_text(payload)
-        if not body_text:
-            body_text = msg.get("snippet", "No readable text body found.")
-
-        headers = payload.get("headers", [])
-        subject = next(
-            (h["value"] for h in headers if h["name"].lower() == "subject"),
-            "No Subject",
-        )
-        sender = next(
-            (h["value"] for h in headers if h["name"].lower() == "from"),
-            "Unknown Sender",
-        )
-
+        record = _full_email_record(msg)
+        store_email_bodies([record])
         return json.dumps(
-            {"id": message_id, "sender": sender, "subject": subject, "body": body_text}
+            {"id": message_id, "sender": record["sender"], "subject": record["subject"], "body": record["body"]}
         )
     except Exception as e:
         return json.dumps({"error": str(e)})
@@ -198,7 +567,11 @@ def read_full_email(message_id: str) -> str:
 def _update_email_cache_after_action(message_ids: list, action: str):
     """Immediately reflect manage_email actions in the local cache so searches stay consistent."""
     try:
-        from littlehive.agent.local_cache import _get_db
+        from littlehive.agent.local_cache import _get_db, delete_cached_emails
+        if action in ("archive", "trash"):
+            # Bodies go too, so trashed mail doesn't linger in the body cache
+            delete_cached_emails(message_ids)
+            return
         conn = _get_db()
         cur = conn.cursor()
         placeholders = ",".join("?" for _ in message_ids)
@@ -213,11 +586,6 @@ def _update_email_cache_after_action(message_ids: list, action: str):
                 f"UPDATE cached_emails SET is_read = 0 WHERE id IN ({placeholders})",
                 message_ids,
             )
-        elif action in ("archive", "trash"):
-            cur.execute(
-                f"DELETE FROM cached_emails WHERE id IN ({placeholders})",
-                message_ids,
-            )
         conn.commit()
         conn.close()
     except Exception as e:
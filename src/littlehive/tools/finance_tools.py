@@ -2,25 +2,12 @@ import sqlite3
 import json
 from datetime import datetime
 
-from littlehive.agent.paths import DB_PATH
+from littlehive.agent.db import get_connection
+from littlehive.agent.migrations import run_migrations
 
 
 def _init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS bills (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            vendor TEXT NOT NULL,
-            amount REAL NOT NULL,
-            due_date TEXT,
-            invoice_number TEXT,
-            status TEXT DEFAULT 'pending',
-            date_added TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
+    run_migrations()
 
 
 _init_db()
@@ -30,7 +17,7 @@ def add_bill(
     vendor: str, amount: float, due_date: str, invoice_number: str = "Unknown"
 ) -> str:
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         c = conn.cursor()
         date_added = datetime.now().isoformat()
         c.execute(
@@ -56,7 +43,7 @@ def add_bill(
 
 def list_bills(status: str = "pending") -> str:
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         conn.row_factory = sqlite3.Row
         c = conn.cursor()
         if status.lower() == "all":
@@ -80,7 +67,7 @@ def list_bills(status: str = "pending") -> str:
 
 def mark_bill_paid(bill_id: int) -> str:
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         c = conn.cursor()
         c.execute("UPDATE bills SET status = 'paid' WHERE id = ?", (bill_id,))
         if c.rowcount == 0:
@@ -97,7 +84,7 @@ def mark_bill_paid(bill_id: int) -> str:
 
 def delete_bill(bill_id: int) -> str:
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         c = conn.cursor()
         c.execute("DELETE FROM bills WHERE id = ?", (bill_id,))
         if c.rowcount == 0:
@@ -1,8 +1,11 @@
 import os
+import datetime
+import threading
 from littlehive.agent.logger_setup import logger
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.discovery import build
 from littlehive.agent.paths import TOKEN_PATH, CREDENTIALS_PATH
 
 # Centralized scopes for the Ultimate EA
@@ -12,34 +15,133 @@ SCOPES = [
     "https://www.googleapis.com/auth/tasks",
 ]
 
+# Refresh this long before the access token actually expires, so a request
+# never goes out with a token that dies in flight.
+REFRESH_MARGIN = datetime.timedelta(minutes=5)
+
+_creds = None
+_creds_mtime = None
+_creds_lock = threading.Lock()
+# Held for the whole interactive login (a browser consent page, which can
+# take minutes or never finish); _creds_lock is not
+_login_lock = threading.Lock()
+# googleapiclient services wrap an httplib2.Http, which is not thread-safe:
+# each thread gets its own client per API.
+_local = threading.local()
+
+
+def _token_mtime():
+    try:
+        return os.path.getmtime(TOKEN_PATH)
+    except OSError:
+        return None
+
+
+def _save(creds):
+    global _creds_mtime
+    with open(TOKEN_PATH, "w") as token:
+        token.write(creds.to_json())
+    _creds_mtime = _token_mtime()
+
+
+def _expiring(creds) -> bool:
+    if creds.expiry is None:
+        return not creds.valid
+    # google-auth keeps expiry as naive UTC
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return creds.expiry - now <= REFRESH_MARGIN
+
 
 def get_credentials():
-    """Handles OAuth 2.0 authentication for all Google services."""
-    creds = None
-    # The file token.json stores the user's access and refresh tokens
-    if os.path.exists(TOKEN_PATH):
-        creds = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
-
-    # If there are no (valid) credentials available, let the user log in.
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
+    """
+    Handles OAuth 2.0 authentication for all Google services.
+
+    Credentials are kept in memory and only re-read when token.json changes
+    on disk (same mtime rule as get_config). Tokens close to expiry are
+    refreshed under a lock, so concurrent syncs refresh once. Without
+    usable credentials one caller runs the interactive login, outside that
+    lock; the others get None straight away instead of waiting on it.
+    """
+    global _creds, _creds_mtime
+
+    with _creds_lock:
+        mtime = _token_mtime()
+        if mtime != _creds_mtime:
+            _creds = None
+            _creds_mtime = mtime
+            # The file token.json stores the user's access and refresh tokens
+            if mtime is not None:
+                _creds = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
+
+        creds = _creds
+        if creds and not _expiring(creds):
+            return creds
+
+        if creds and creds.refresh_token:
             try:
                 creds.refresh(Request())
-            except Exception:
+            except Exception as e:
+                if creds.valid:
+                    # Still usable for a few minutes; try again next call
+                    logger.warning(f"[Google Auth] Early token refresh failed: {e}")
+                    return creds
                 # If refresh fails (e.g. scopes changed), force re-auth
                 creds = None
+            else:
+                _save(creds)
+                return creds
+        elif creds and creds.valid:
+            return creds
 
-        if not creds:
-            if not os.path.exists(CREDENTIALS_PATH):
-                logger.warning(f"WARNING: {CREDENTIALS_PATH} not found.")
-                return None
-            flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_PATH, SCOPES)
-            # Fixed port to match Authorized redirect URIs in Google Cloud
-            # We MUST use prompt='consent' to force Google to give us a new refresh_token
-            creds = flow.run_local_server(port=53941, prompt="consent")
+        # If there are no (valid) credentials available, let the user log in.
+        _creds = None
+        if not os.path.exists(CREDENTIALS_PATH):
+            logger.warning(f"WARNING: {CREDENTIALS_PATH} not found.")
+            return None
 
-        # Save the credentials for the next run
-        with open(TOKEN_PATH, "w") as token:
-            token.write(creds.to_json())
+    if not _login_lock.acquire(blocking=False):
+        logger.warning("[Google Auth] Waiting for the Google sign-in in progress to finish.")
+        return None
+    try:
+        if _creds is not None:
+            # Another caller finished signing in since we checked
+            return _creds
+        flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_PATH, SCOPES)
+        # Fixed port to match Authorized redirect URIs in Google Cloud
+        # We MUST use prompt='consent' to force Google to give us a new refresh_token
+        creds = flow.run_local_server(port=53941, prompt="consent")
+    finally:
+        _login_lock.release()
 
+    with _creds_lock:
+        # Save the credentials for the next run
+        _save(creds)
+        _creds = creds
     return creds
+
+
+def get_service(api: str, version: str):
+    """
+    Returns this thread's client for a Google API, building it on first use
+    (or when the credentials were replaced) from the discovery document
+    bundled with google-api-python-client, so no network round trip.
+    Returns None when not authenticated.
+    """
+    creds = get_credentials()
+    if not creds:
+        return None
+    services = getattr(_local, "services", None)
+    if services is None:
+        services = _local.services = {}
+    cached = services.get((api, version))
+    if cached is not None and cached[0] is creds:
+        return cached[1]
+    try:
+        service = build(
+            api, version, credentials=creds, static_discovery=True, cache_discovery=False
+        )
+    except Exception as e:
+        logger.warning(f"[Google Auth] Failed to build {api} {version} client: {e}")
+        return None
+    services[(api, version)] = (creds, service)
+    return service
@@ -1,17 +1,14 @@
 import json
-from googleapiclient.discovery import build
-from littlehive.tools.google_auth import get_credentials
+import time
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from littlehive.tools.google_auth import get_service
 from littlehive.tools.task_queue import queue_task
+from littlehive.agent.logger_setup import logger
 
 
 def get_tasks_service():
-    creds = get_credentials()
-    if not creds:
-        return None
-    try:
-        return build("tasks", "v1", credentials=creds)
-    except Exception:
-        return None
+    return get_service("tasks", "v1")
 
 
 def get_task_lists() -> str:
@@ -29,6 +26,18 @@ def get_task_lists() -> str:
         return json.dumps({"error": str(e)})
 
 
+def _task_summary(item: dict, tasklist_id: str) -> dict:
+    return {
+        "id": item["id"],
+        "list_id": tasklist_id,
+        "title": item["title"],
+        "notes": item.get("notes", ""),
+        "status": item["status"],
+        "due": item.get("due"),
+        "updated": item.get("updated"),
+    }
+
+
 def _live_get_tasks(tasklist_id: str = "@default", show_completed: bool = False) -> str:
     """Fetch tasks from a specific list using the Google API."""
     service = get_tasks_service()
@@ -41,24 +50,139 @@ def _live_get_tasks(tasklist_id: str = "@default", show_completed: bool = False)
             .execute()
         )
         items = results.get("items", [])
-        return json.dumps(
-            [
-                {
-                    "id": i["id"],
-                    "list_id": tasklist_id,
-                    "title": i["title"],
-                    "notes": i.get("notes", ""),
-                    "status": i["status"],
-                    "due": i.get("due"),
-                    "updated": i.get("updated"),
-                }
-                for i in items
-            ]
-        )
+        return json.dumps([_task_summary(i, tasklist_id) for i in items])
     except Exception as e:
         return json.dumps({"error": str(e)})
 
 
+# --- Incremental Sync ---
+
+_SYNC_WORKERS = 4
+# Long-lived so the workers keep their per-thread Google API clients from
+# one poll to the next (same reason as scheduler._sync_pool)
+_list_pool = ThreadPoolExecutor(max_workers=_SYNC_WORKERS, thread_name_prefix="tasks-sync")
+# Re-read a minute of history on every poll so clock skew between this
+# machine and Google never drops an update; upserts make the overlap free.
+_UPDATED_MIN_OVERLAP_MS = 60 * 1000
+_TASK_FIELDS = "items(id,title,notes,status,due,updated,deleted,hidden),nextPageToken"
+
+
+def _sync_state_key(tasklist_id: str) -> str:
+    return f"tasks:{tasklist_id}"
+
+
+def _fetch_list_changes(tasklist_id: str, updated_min_ms: int | None) -> dict:
+    """
+    Pull one list. With updated_min_ms only tasks touched since then are
+    returned (completed and deleted ones included, so they can be dropped);
+    without it the open tasks are listed in full.
+    """
+    # googleapiclient services are not thread-safe; each worker uses its own
+    service = get_tasks_service()
+    if not service:
+        raise RuntimeError("Auth failed")
+
+    kwargs = {"tasklist": tasklist_id, "maxResults": 100, "fields": _TASK_FIELDS}
+    if updated_min_ms is None:
+        kwargs["showCompleted"] = False
+    else:
+        updated_min = datetime.datetime.fromtimestamp(
+            (updated_min_ms - _UPDATED_MIN_OVERLAP_MS) / 1000, datetime.timezone.utc
+        )
+        kwargs.update(
+            updatedMin=updated_min.isoformat().replace("+00:00", "Z"),
+            showCompleted=True,
+            showHidden=True,
+            showDeleted=True,
+        )
+
+    open_tasks = []
+    closed_ids = []
+    page_token = None
+    while True:
+        page = service.tasks().list(pageToken=page_token, **kwargs).execute()
+        for item in page.get("items", []):
+            if item.get("deleted") or item.get("status") != "needsAction":
+                closed_ids.append(item["id"])
+            else:
+                open_tasks.append(_task_summary(item, tasklist_id))
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            break
+    return {"tasks": open_tasks, "removed": closed_ids, "full": updated_min_ms is None}
+
+
+def sync_tasks() -> dict:
+    """
+    Bring cached_tasks up to date across every task list.
+
+    Lists are fetched concurrently. Each list keeps its own watermark in
+    sync_state ("tasks:<list_id>"): a list seen for the first time is
+    listed in full, afterwards only tasks updated since the last poll are
+    requested and upserted, and tasks that were completed or deleted are
+    dropped from the cache. Tasks of lists that no longer exist are dropped
+    as well. A list that fails keeps its watermark and is retried next poll.
+
+    Returns {"tasks": [open tasks fetched this round], "removed": [ids],
+    "lists": n}, or {"error": ...}.
+    """
+    from littlehive.agent.local_cache import (
+        get_sync_state,
+        update_sync_state,
+        apply_task_changes,
+    )
+
+    service = get_tasks_service()
+    if not service:
+        return {"error": "Auth failed"}
+
+    list_ids = []
+    page_token = None
+    while True:
+        page = (
+            service.tasklists()
+            .list(maxResults=100, pageToken=page_token, fields="items(id),nextPageToken")
+            .execute()
+        )
+        list_ids.extend(i["id"] for i in page.get("items", []))
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            break
+
+    watermarks = {}
+    for list_id in list_ids:
+        state = get_sync_state(_sync_state_key(list_id))
+        watermarks[list_id] = state.get("last_sync_timestamp") if state else None
+
+    started_ms = int(time.time() * 1000)
+    results = {}
+    futures = {
+        list_id: _list_pool.submit(_fetch_list_changes, list_id, watermarks[list_id])
+        for list_id in list_ids
+    }
+    for list_id, future in futures.items():
+        try:
+            results[list_id] = future.result()
+        except Exception as e:
+            logger.warning(f"[Tasks Sync] List {list_id} failed: {e}")
+
+    tasks = [t for r in results.values() for t in r["tasks"]]
+    removed = [i for r in results.values() for i in r["removed"]]
+    apply_task_changes(
+        tasks,
+        removed,
+        full_lists={
+            list_id: [t["id"] for t in r["tasks"]]
+            for list_id, r in results.items()
+            if r["full"]
+        },
+        live_list_ids=list_ids,
+    )
+    for list_id in results:
+        update_sync_state(_sync_state_key(list_id), timestamp_ms=started_ms)
+    return {"tasks": tasks, "removed": removed, "lists": len(list_ids)}
+
+
 def get_tasks(tasklist_id: str = None, status: str = None) -> str:
     """Fetch tasks from local cache."""
     from littlehive.agent.local_cache import query_cached_tasks
@@ -1,57 +1,66 @@
+import re
 import sqlite3
-import os
 from datetime import datetime
 import json
 
-from littlehive.agent.paths import DB_PATH
+from littlehive.agent.db import get_connection
+from littlehive.agent.migrations import run_migrations
+from littlehive.agent.embeddings import encode
+from littlehive.agent import archive_index
+from littlehive.agent.archive_index import archive_hash
 
 
 def _get_db():
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection()
     conn.row_factory = sqlite3.Row
     return conn
 
 
 def init_memory_db():
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = _get_db()
-    cursor = conn.cursor()
-    # Core memory for life facts
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS core_memory (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            fact_text TEXT NOT NULL,
-            timestamp DATETIME DEFAULT (datetime('now', 'localtime'))
-        )
-    """)
-    # Archival memory for chat history (FTS5 for fast search)
-    cursor.execute("""
-        CREATE VIRTUAL TABLE IF NOT EXISTS chat_archive USING fts5(
-            role,
-            content,
-            timestamp UNINDEXED
-        )
-    """)
-    conn.commit()
-    conn.close()
+    run_migrations()
 
 
 # Initialize DB on import
 init_memory_db()
 
-_encoder_model = None
+# Cosine similarity above which a new fact counts as a restatement
+DUPLICATE_THRESHOLD = 0.52
 
 
-def _get_encoder_model():
-    global _encoder_model
-    if _encoder_model is None:
-        try:
-            from sentence_transformers import SentenceTransformer
+def _to_blob(vector) -> bytes:
+    import numpy as np
 
-            _encoder_model = SentenceTransformer("all-MiniLM-L6-v2")
-        except ImportError:
-            pass
-    return _encoder_model
+    return vector.astype(np.float16).tobytes()
+
+
+def _fact_embeddings(cursor):
+    """
+    Ids, texts and the (n, dim) float32 matrix of every core fact, from the
+    stored float16 vectors. Rows stored without one (saved before vectors
+    were kept, saved while no model was available, or edited since) are
+    encoded here in one batch and written back. Returns None when facts
+    need encoding and there is no model.
+    """
+    import numpy as np
+
+    cursor.execute("SELECT id, fact_text, embedding FROM core_memory ORDER BY id")
+    rows = cursor.fetchall()
+    if not rows:
+        return [], [], None
+    missing = [i for i, row in enumerate(rows) if row["embedding"] is None]
+    vectors = [row["embedding"] for row in rows]
+    if missing:
+        encoded = encode([rows[i]["fact_text"] for i in missing])
+        if encoded is None:
+            return None
+        for i, vector in zip(missing, encoded):
+            vectors[i] = _to_blob(vector)
+        cursor.executemany(
+            "UPDATE core_memory SET embedding = ? WHERE id = ?",
+            [(vectors[i], rows[i]["id"]) for i in missing],
+        )
+    matrix = np.frombuffer(b"".join(vectors), dtype=np.float16).reshape(len(rows), -1)
+    return [row["id"] for row in rows], [row["fact_text"] for row in rows], matrix.astype(np.float32)
 
 
 def save_core_fact(fact: str) -> str:
@@ -62,26 +71,21 @@ def save_core_fact(fact: str) -> str:
     conn = _get_db()
     cursor = conn.cursor()
 
-    # Dedup logic
-    cursor.execute("SELECT id, fact_text FROM core_memory")
-    existing_facts = cursor.fetchall()
-
-    if existing_facts:
-        model = _get_encoder_model()
-        if model:
-            from sklearn.metrics.pairwise import cosine_similarity
-
-            existing_texts = [row["fact_text"] for row in existing_facts]
-
-            embeddings = model.encode([fact] + existing_texts)
-            sims = cosine_similarity(embeddings[0:1], embeddings[1:])[0]
-
-            max_sim_idx = sims.argmax()
-            max_sim = sims[max_sim_idx]
-
-            if max_sim > 0.52:
-                similar_fact = existing_texts[max_sim_idx]
-                similar_id = existing_facts[max_sim_idx]["id"]
+    # Dedup logic: only the new fact is encoded; existing ones are stored
+    embedding = None
+    encoded = encode([fact])
+    if encoded is not None:
+        embedding = encoded[0]
+        stored = _fact_embeddings(cursor)
+        if stored is not None and stored[0]:
+            ids, texts, matrix = stored
+            sims = matrix @ embedding
+            max_sim_idx = int(sims.argmax())
+            if sims[max_sim_idx] > DUPLICATE_THRESHOLD:
+                similar_fact = texts[max_sim_idx]
+                similar_id = ids[max_sim_idx]
+                # Keep any vectors backfilled along the way
+                conn.commit()
                 conn.close()
                 return json.dumps(
                     {
@@ -90,7 +94,10 @@ def save_core_fact(fact: str) -> str:
                     }
                 )
 
-    cursor.execute("INSERT INTO core_memory (fact_text) VALUES (?)", (fact,))
+    cursor.execute(
+        "INSERT INTO core_memory (fact_text, embedding) VALUES (?, ?)",
+        (fact, _to_blob(embedding) if embedding is not None else None),
+    )
     conn.commit()
     conn.close()
     return json.dumps(
@@ -139,24 +146,28 @@ def delete_core_fact(query: str) -> str:
 def search_past_conversations(query: str) -> str:
     """
     Searches the archival chat history.
-    - If you provide a keyword, it searches message content.
+    - Otherwise it searches message content, by keyword and by meaning.
     - If you provide a date (YYYY-MM-DD), it retrieves messages from that day.
     - If the query is "recent" or empty, it returns the 20 most recent messages.
     """
     conn = _get_db()
     cursor = conn.cursor()
-    import re
     date_match = re.search(r"(\d{4}-\d{2}-\d{2})", query)
     try:
         if date_match:
             target_date = date_match.group(1)
             cursor.execute("SELECT role, content, timestamp FROM chat_archive WHERE timestamp LIKE ? ORDER BY timestamp ASC", (f"{target_date}%",))
+            results = cursor.fetchall()
         elif query.lower() in ("recent", ""):
             cursor.execute("SELECT role, content, timestamp FROM chat_archive ORDER BY timestamp DESC LIMIT 20")
+            results = cursor.fetchall()
         else:
-            safe_query = '"{}"'.format(query.replace('"', '""'))
-            cursor.execute("SELECT role, content, timestamp FROM chat_archive WHERE chat_archive MATCH ? ORDER BY rank LIMIT 20", (safe_query,))
-        results = cursor.fetchall()
+            # Keyword (BM25) and semantic matches, fused; best first
+            rowids = archive_index.search(query, limit=20)
+            placeholders = ",".join("?" for _ in rowids)
+            cursor.execute(f"SELECT rowid, role, content, timestamp FROM chat_archive WHERE rowid IN ({placeholders})", rowids)
+            by_rowid = {r["rowid"]: r for r in cursor.fetchall()}
+            results = [by_rowid[rowid] for rowid in rowids if rowid in by_rowid]
     except Exception as e:
         conn.close()
         return json.dumps({"error": str(e)})
@@ -169,7 +180,7 @@ def search_past_conversations(query: str) -> str:
     return json.dumps({"results": formatted})
 
 def get_all_core_facts() -> list:
-    """Retrieves all core facts to be injected into the system prompt."""
+    """Retrieves all core facts, oldest first."""
     conn = _get_db()
     cursor = conn.cursor()
     cursor.execute("SELECT fact_text FROM core_memory ORDER BY timestamp ASC")
@@ -178,24 +189,150 @@ def get_all_core_facts() -> list:
     return results
 
 
-def archive_messages(messages: list):
-    """Saves a list of compacted messages to the chat archive, avoiding duplicates."""
+# ---------------------------------------------------------------------------
+# Prompt injection: a fixed pinned set in the system prompt, the rest
+# recalled per turn next to the user's message
+# ---------------------------------------------------------------------------
+
+RECALL_OPEN = "[RECALLED FACTS]"
+RECALL_CLOSE = "[/RECALLED FACTS]"
+_RECALL_BLOCK = re.compile(r"\s*\[RECALLED FACTS\].*?\[/RECALLED FACTS\]", re.S)
+# Keyword fallback: share of a fact's words the message must contain
+KEYWORD_MIN_OVERLAP = 0.2
+
+
+def _approx_tokens(text: str) -> int:
+    # Budgets only need to be roughly right; ~4 characters per token
+    return len(text) // 4 + 3
+
+
+def _pinned_count(texts: list, budget: int) -> int:
+    """How many of `texts` (oldest first) fit in `budget` tokens."""
+    used = 0
+    for n, text in enumerate(texts):
+        used += _approx_tokens(text)
+        if used > budget:
+            return n
+    return len(texts)
+
+
+def get_pinned_core_facts() -> tuple:
+    """
+    The oldest facts that fit in core_facts_pinned_tokens, for the system
+    prompt, and how many facts were left out of it.
+    """
+    from littlehive.agent.config import get_config
+
+    budget = get_config().get("core_facts_pinned_tokens", 300)
     conn = _get_db()
     cursor = conn.cursor()
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    cursor.execute("SELECT fact_text FROM core_memory ORDER BY id")
+    texts = [row["fact_text"] for row in cursor.fetchall()]
+    conn.close()
+    pinned = texts[:_pinned_count(texts, budget)]
+    return pinned, len(texts) - len(pinned)
+
+
+def _keyword_scores(query: str, texts: list) -> list:
+    # Without an embedding model: share of the fact's words found in the query
+    words = {w for w in re.findall(r"\w+", query.lower()) if len(w) > 3}
+    scores = []
+    for text in texts:
+        fact_words = {w for w in re.findall(r"\w+", text.lower()) if len(w) > 3}
+        scores.append(len(words & fact_words) / len(fact_words) if fact_words else 0.0)
+    return scores
+
+
+def recall_core_facts(query: str, exclude: set = frozenset()) -> list:
+    """
+    Facts outside the pinned set most relevant to `query`, best first: at
+    most core_facts_top_k, above core_facts_min_similarity, within
+    core_facts_turn_tokens. Facts whose ids are in `exclude` (already shown
+    this session) are skipped. Returns [{"id", "fact"}].
+    """
+    from littlehive.agent.config import get_config
+
+    config = get_config()
+    pinned_budget = config.get("core_facts_pinned_tokens", 300)
+    turn_budget = config.get("core_facts_turn_tokens", 200)
+    top_k = config.get("core_facts_top_k", 6)
+    min_similarity = config.get("core_facts_min_similarity", 0.2)
+
+    conn = _get_db()
+    cursor = conn.cursor()
+    try:
+        # Runs on the brain thread: keyword overlap while the model loads
+        query_vector = encode([query], wait=0)
+        stored = _fact_embeddings(cursor) if query_vector is not None else None
+        if stored is not None:
+            ids, texts, matrix = stored
+            scores = list(matrix @ query_vector[0]) if ids else []
+        else:
+            cursor.execute("SELECT id, fact_text FROM core_memory ORDER BY id")
+            rows = cursor.fetchall()
+            ids, texts = [row["id"] for row in rows], [row["fact_text"] for row in rows]
+            scores = _keyword_scores(query, texts)
+            min_similarity = KEYWORD_MIN_OVERLAP
+        # Keep backfilled vectors
+        conn.commit()
+    finally:
+        conn.close()
+
+    start = _pinned_count(texts, pinned_budget)
+    ranked = sorted(range(start, len(ids)), key=lambda i: scores[i], reverse=True)
+    recalled, used = [], 0
+    for i in ranked:
+        if len(recalled) == top_k or scores[i] < min_similarity:
+            break
+        if ids[i] in exclude:
+            continue
+        cost = _approx_tokens(texts[i])
+        if used + cost > turn_budget:
+            continue
+        used += cost
+        recalled.append({"id": ids[i], "fact": texts[i]})
+    return recalled
+
+
+def format_recalled_facts(facts: list) -> str:
+    """Block appended to the user's message; archive_messages strips it again."""
+    lines = "\n".join(f"- {f['fact']}" for f in facts)
+    return f"\n\n{RECALL_OPEN}\n{lines}\n{RECALL_CLOSE}"
+
+
+def archive_messages(messages: list):
+    """
+    Saves messages to the chat archive, skipping any already archived.
+    Callers pass only the messages added since their last call.
+    """
+    rows = {}
     for msg in messages:
         role = msg.get("role", "unknown")
         content = msg.get("content", "")
+        if isinstance(content, str):
+            content = _RECALL_BLOCK.sub("", content)
         if isinstance(content, str) and content.strip():
-            # Check for existing to prevent duplicate entries
-            cursor.execute(
-                "SELECT count(*) FROM chat_archive WHERE role = ? AND content = ?",
-                (role, content),
-            )
-            if cursor.fetchone()[0] == 0:
-                cursor.execute(
-                    "INSERT INTO chat_archive (role, content, timestamp) VALUES (?, ?, ?)",
-                    (role, content, timestamp),
-                )
+            rows.setdefault(archive_hash(role, content), (role, content))
+    if not rows:
+        return
+
+    conn = _get_db()
+    cursor = conn.cursor()
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # One write transaction, so concurrent archivers can't both miss a hash
+    cursor.execute("BEGIN IMMEDIATE")
+    keys = list(rows)
+    placeholders = ",".join("?" for _ in keys)
+    cursor.execute(f"SELECT hash FROM chat_archive_hashes WHERE hash IN ({placeholders})", keys)
+    for row in cursor.fetchall():
+        rows.pop(row["hash"], None)
+    if rows:
+        cursor.executemany(
+            "INSERT INTO chat_archive (role, content, timestamp) VALUES (?, ?, ?)",
+            [(role, content, timestamp) for role, content in rows.values()],
+        )
+        cursor.executemany("INSERT INTO chat_archive_hashes (hash) VALUES (?)", [(key,) for key in rows])
     conn.commit()
     conn.close()
+    # Already off the brain thread; embed what was just archived
+    archive_index.index_pending()
@@ -3,27 +3,12 @@ import sqlite3
 import json
 from datetime import datetime, timedelta, timezone
 
-from littlehive.agent.paths import DB_PATH
+from littlehive.agent.db import get_connection
+from littlehive.agent.migrations import run_migrations
 
 
 def _init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS reminders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            task TEXT NOT NULL,
-            deadline TEXT NOT NULL,
-            next_notification TEXT NOT NULL,
-            status TEXT DEFAULT 'pending'
-        )
-    """)
-    try:
-        c.execute('ALTER TABLE reminders ADD COLUMN priority TEXT DEFAULT "normal"')
-    except sqlite3.OperationalError:
-        pass
-    conn.commit()
-    conn.close()
+    run_migrations()
 
 
 _init_db()
@@ -48,7 +33,7 @@ def set_reminder(task: str, reminder_time: str, priority: str = "normal") -> str
         except (ValueError, TypeError):
             pass  # let malformed times through — the DB stores them as text anyway
 
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         c = conn.cursor()
         c.execute(
             "INSERT INTO reminders (task, deadline, next_notification, status, priority) VALUES (?, ?, ?, ?, ?)",
@@ -71,7 +56,7 @@ def set_reminder(task: str, reminder_time: str, priority: str = "normal") -> str
 def mark_reminder_completed(reminder_id: int) -> str:
     """Marks a reminder as done so it stops notifying the user."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         c = conn.cursor()
         c.execute(
             "UPDATE reminders SET status = 'completed' WHERE id = ?", (reminder_id,)
@@ -94,7 +79,7 @@ def mark_reminder_completed(reminder_id: int) -> str:
 def get_pending_reminders() -> str:
     """Gets all pending reminders."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         conn.row_factory = sqlite3.Row
         c = conn.cursor()
         c.execute(
@@ -112,7 +97,7 @@ def get_pending_reminders() -> str:
 def poll_due_reminders(skip_non_critical: bool = False) -> list:
     """Used strictly by the background worker to fetch due items."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         conn.row_factory = sqlite3.Row
         c = conn.cursor()
         now = datetime.now(timezone.utc).isoformat()
@@ -7,11 +7,10 @@ decides what actually executes.
 import os
 import re
 import shlex
-import sqlite3
 
 from littlehive.agent.config import get_config
 from littlehive.agent.logger_setup import logger
-from littlehive.agent.paths import DB_PATH
+from littlehive.agent.db import get_connection
 
 # ── Dangerous patterns that are ALWAYS blocked regardless of tier lists ──
 
@@ -121,7 +120,7 @@ def log_execution(command: str, status: str, output_summary: str = "",
                   working_dir: str = "") -> None:
     """Write an entry to the shell_audit_log table."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute(
             "SELECT name FROM sqlite_master WHERE type='table' AND name='shell_audit_log'"
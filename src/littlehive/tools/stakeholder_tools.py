@@ -2,7 +2,8 @@ import sqlite3
 import json
 import random
 
-from littlehive.agent.paths import DB_PATH
+from littlehive.agent.db import get_connection
+from littlehive.agent.migrations import run_migrations
 
 
 _FUN_FACTS = [
@@ -29,29 +30,7 @@ def pick_fun_fact() -> str:
 
 
 def _init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS stakeholders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            alias TEXT,
-            email TEXT,
-            phone TEXT,
-            telegram TEXT,
-            relationship TEXT,
-            preferences TEXT,
-            date_added TEXT,
-            auto_respond INTEGER DEFAULT 0
-        )
-    """)
-    # Migrate existing tables that lack auto_respond
-    try:
-        c.execute("ALTER TABLE stakeholders ADD COLUMN auto_respond INTEGER DEFAULT 0")
-    except sqlite3.OperationalError:
-        pass
-    conn.commit()
-    conn.close()
+    run_migrations()
 
 
 _init_db()
@@ -71,7 +50,7 @@ def add_stakeholder(
     try:
         from datetime import datetime
 
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         c = conn.cursor()
         date_added = datetime.now().isoformat()
 
@@ -111,7 +90,7 @@ def add_stakeholder(
 def lookup_stakeholder(query: str) -> str:
     """Search for a stakeholder by name, alias, email, phone, telegram, or relationship."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         conn.row_factory = sqlite3.Row
         c = conn.cursor()
 
@@ -150,7 +129,7 @@ def lookup_stakeholder(query: str) -> str:
 def remove_stakeholder(stakeholder_id: int) -> str:
     """Remove a stakeholder by their ID."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         c = conn.cursor()
         c.execute("DELETE FROM stakeholders WHERE id = ?", (stakeholder_id,))
         if c.rowcount == 0:
@@ -183,7 +162,7 @@ def update_stakeholder(
 ) -> str:
     """Update an existing stakeholder's details."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         c = conn.cursor()
 
         c.execute("SELECT * FROM stakeholders WHERE id = ?", (stakeholder_id,))
@@ -245,7 +224,7 @@ def update_stakeholder(
 def get_auto_respond_contacts() -> list[dict]:
     """Return stakeholders that have auto_respond enabled, with their email and preferences."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         conn.row_factory = sqlite3.Row
         c = conn.cursor()
         c.execute(
@@ -262,7 +241,7 @@ def bulk_import_contacts(contacts: list[dict]) -> dict:
     """Import multiple contacts at once. Each dict should have at least 'name'.
     Skips rows missing a name. Deduplicates against existing contacts by email.
     Returns counts of imported, skipped, and failed."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection()
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
 
@@ -1,35 +1,19 @@
 import sqlite3
-import os
 import json
 from datetime import datetime
 
-from littlehive.agent.paths import DB_PATH
+from littlehive.agent.db import get_connection
+from littlehive.agent.migrations import run_migrations
 
 
 def _get_db():
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection()
     conn.row_factory = sqlite3.Row
     return conn
 
 
 def init_queue_db():
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = _get_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS pending_tasks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tool_name TEXT NOT NULL,
-            arguments TEXT NOT NULL,
-            status TEXT DEFAULT 'queued',
-            retry_count INTEGER DEFAULT 0,
-            next_run_at DATETIME,
-            created_at DATETIME DEFAULT (datetime('now', 'localtime')),
-            error_message TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
+    run_migrations()
 
 
 init_queue_db()
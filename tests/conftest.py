@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# littlehive.agent.paths reads LITTLEHIVE_HOME once, at import time: point it
+# at a scratch directory before any test module imports littlehive.
+os.environ["LITTLEHIVE_HOME"] = tempfile.mkdtemp(prefix="littlehive-test-")
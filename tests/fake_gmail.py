@@ -0,0 +1,241 @@
+"""
+Local fake of the Gmail REST endpoints the sync uses, for tests.
+
+FakeGmail serves users.getProfile, messages.list/get, history.list and the
+/batch endpoint over HTTP on 127.0.0.1, so googleapiclient builds, batches
+and raises HttpError exactly as it does against Google. Every change to
+the mailbox (add, relabel, delete) is recorded as a history record, and
+expire_history() makes older history IDs answer 404 the way Gmail does
+once it has pruned them.
+
+    with FakeGmail() as gmail:
+        gmail.add_message("m1", subject="Hi")
+        service = gmail.service()
+"""
+
+import base64
+import json
+import threading
+import urllib.parse
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_PREFIX = "/gmail/v1/users/me/"
+_LISTED_EXCLUDE = {"SENT", "DRAFT", "TRASH", "SPAM"}
+
+
+class FakeGmail:
+    def __init__(self):
+        self.messages = {}
+        self.history = []
+        self.history_id = 1000
+        self.oldest_history_id = self.history_id
+        # (method, path) of every call, batched ones included
+        self.requests = []
+        self._lock = threading.Lock()
+        self._next_date = 1_700_000_000_000
+
+    # -- mailbox --------------------------------------------------------------
+
+    def _record(self, key, item):
+        self.history_id += 1
+        self.history.append({"id": str(self.history_id), key: [item]})
+
+    def _ref(self, msg_id):
+        return {"id": msg_id, "threadId": msg_id, "labelIds": list(self.messages[msg_id]["labelIds"])}
+
+    def add_message(self, msg_id, subject="Hello", sender="Alice <alice@example.com>",
+                    labels=("INBOX", "UNREAD"), body="Hi there"):
+        with self._lock:
+            self._next_date += 1000
+            self.messages[msg_id] = {
+                "id": msg_id,
+                "threadId": msg_id,
+                "labelIds": list(labels),
+                "snippet": body[:100],
+                "internalDate": str(self._next_date),
+                "payload": {
+                    "mimeType": "text/plain",
+                    "headers": [
+                        {"name": "From", "value": sender},
+                        {"name": "To", "value": "me@example.com"},
+                        {"name": "Subject", "value": subject},
+                        {"name": "Date", "value": "Mon, 2 Mar 2026 09:00:00 +0000"},
+                    ],
+                    "body": {"data": base64.urlsafe_b64encode(body.encode()).decode()},
+                },
+            }
+            self._record("messagesAdded", {"message": self._ref(msg_id)})
+
+    def relabel(self, msg_id, add=(), remove=()):
+        with self._lock:
+            labels = self.messages[msg_id]["labelIds"]
+            if add:
+                labels.extend(label for label in add if label not in labels)
+                self._record("labelsAdded", {"message": self._ref(msg_id), "labelIds": list(add)})
+            if remove:
+                labels[:] = [label for label in labels if label not in remove]
+                self._record("labelsRemoved", {"message": self._ref(msg_id), "labelIds": list(remove)})
+
+    def delete_message(self, msg_id):
+        with self._lock:
+            del self.messages[msg_id]
+            self._record("messagesDeleted", {"message": {"id": msg_id, "threadId": msg_id}})
+
+    def expire_history(self):
+        """Prune all history: start IDs older than the current one get a 404."""
+        with self._lock:
+            self.history = []
+            self.oldest_history_id = self.history_id
+
+    def calls(self, path):
+        """Number of requests made to `path` (relative to users/me/)."""
+        return sum(1 for _, p in self.requests if p == _PREFIX + path)
+
+    # -- API ------------------------------------------------------------------
+
+    def _handle(self, method, target):
+        url = urllib.parse.urlsplit(target)
+        path = url.path
+        query = urllib.parse.parse_qs(url.query)
+        self.requests.append((method, path))
+        if not path.startswith(_PREFIX) or method != "GET":
+            return 404, _error(404, "Not Found")
+        resource = path[len(_PREFIX):]
+        with self._lock:
+            if resource == "profile":
+                return 200, {"emailAddress": "me@example.com", "historyId": str(self.history_id)}
+            if resource == "messages":
+                return 200, self._list_messages(query)
+            if resource.startswith("messages/"):
+                msg = self.messages.get(resource[len("messages/"):])
+                if msg is None:
+                    return 404, _error(404, "Requested entity was not found.")
+                return 200, _formatted(msg, query.get("format", ["full"])[0])
+            if resource == "history":
+                return self._list_history(query)
+        return 404, _error(404, "Not Found")
+
+    def _list_messages(self, query):
+        # Of the search operators only in:inbox is honoured
+        inbox_only = "in:inbox" in query.get("q", [""])[0].split()
+        ids = [
+            m["id"]
+            for m in sorted(self.messages.values(), key=lambda m: m["internalDate"], reverse=True)
+            if not set(m["labelIds"]) & _LISTED_EXCLUDE and (not inbox_only or "INBOX" in m["labelIds"])
+        ]
+        return _page(ids, query, lambda page: {"messages": [{"id": i, "threadId": i} for i in page]})
+
+    def _list_history(self, query):
+        start = int(query["startHistoryId"][0])
+        if start < self.oldest_history_id:
+            return 404, _error(404, "Requested entity was not found.")
+        records = [r for r in self.history if int(r["id"]) > start]
+        wanted = {
+            "messageAdded": "messagesAdded",
+            "messageDeleted": "messagesDeleted",
+            "labelAdded": "labelsAdded",
+            "labelRemoved": "labelsRemoved",
+        }
+        types = {wanted[t] for t in query.get("historyTypes", wanted)}
+        records = [r for r in records if types & set(r)]
+        body = _page(records, query, lambda page: {"history": page} if page else {})
+        body["historyId"] = str(self.history_id)
+        return 200, body
+
+    # -- server ---------------------------------------------------------------
+
+    def __enter__(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status, body = fake._handle("GET", self.path)
+                self._send(status, "application/json", json.dumps(body).encode())
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                content = self.rfile.read(length)
+                if urllib.parse.urlsplit(self.path).path != "/batch":
+                    self._send(404, "application/json", json.dumps(_error(404, "Not Found")).encode())
+                    return
+                boundary = "batch_fake_gmail"
+                parts = []
+                message = BytesParser(policy=HTTP).parsebytes(
+                    b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + content
+                )
+                for part in message.iter_parts():
+                    request_line = part.get_content().decode().splitlines()[0]
+                    method, target, _ = request_line.split(" ", 2)
+                    status, body = fake._handle(method, target)
+                    content_id = part["Content-ID"].strip("<>")
+                    parts.append(
+                        f"--{boundary}\r\n"
+                        "Content-Type: application/http\r\n"
+                        f"Content-ID: <response-{content_id}>\r\n\r\n"
+                        f"HTTP/1.1 {status} {'OK' if status == 200 else 'Not Found'}\r\n"
+                        "Content-Type: application/json; charset=UTF-8\r\n\r\n"
+                        f"{json.dumps(body)}\r\n"
+                    )
+                payload = ("".join(parts) + f"--{boundary}--\r\n").encode()
+                self._send(200, f"multipart/mixed; boundary={boundary}", payload)
+
+            def _send(self, status, content_type, payload):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/"
+
+    def service(self):
+        """A googleapiclient Gmail service bound to this fake, no credentials needed."""
+        import httplib2
+        from googleapiclient import discovery
+        from googleapiclient.discovery_cache import get_static_doc
+
+        document = json.loads(get_static_doc("gmail", "v1"))
+        # rootUrl also decides where batches go, which api_endpoint does not
+        document["rootUrl"] = self.url
+        document["baseUrl"] = self.url + document["servicePath"]
+        return discovery.build_from_document(document, http=httplib2.Http())
+
+
+def _error(code, message):
+    return {"error": {"code": code, "message": message, "status": "NOT_FOUND"}}
+
+
+def _page(items, query, render):
+    size = int(query.get("maxResults", ["100"])[0])
+    offset = int(query.get("pageToken", ["0"])[0])
+    body = render(items[offset:offset + size])
+    if offset + size < len(items):
+        body["nextPageToken"] = str(offset + size)
+    return body
+
+
+def _formatted(msg, fmt):
+    msg = json.loads(json.dumps(msg))
+    if fmt == "metadata":
+        del msg["payload"]["body"]
+    elif fmt == "minimal":
+        del msg["payload"]
+    return msg
@@ -0,0 +1,65 @@
+"""When search_cached_emails answers from the cache and when it defers to the live API."""
+
+import time
+
+import pytest
+
+from littlehive.agent import local_cache
+from littlehive.agent.db import get_connection
+from littlehive.agent.gmail_query import translate_query
+
+DAY_MS = 86400 * 1000
+
+
+@pytest.fixture
+def cache():
+    local_cache.init_cache_db()
+    now_ms = int(time.time() * 1000)
+    local_cache.upsert_emails([
+        {"id": "new", "thread_id": "new", "sender": "Bob <bob@example.com>", "subject": "Lunch",
+         "snippet": "", "date": "", "is_read": False, "label_ids": ["INBOX", "UNREAD"],
+         "timestamp_ms": now_ms - DAY_MS},
+    ])
+
+    def backfilled_to(days_ago):
+        local_cache.update_sync_state("gmail_backfill", timestamp_ms=now_ms - days_ago * DAY_MS)
+
+    yield backfilled_to
+    conn = get_connection()
+    conn.execute("DELETE FROM cached_emails")
+    conn.execute("DELETE FROM sync_state WHERE service = 'gmail_backfill'")
+    conn.commit()
+    conn.close()
+
+
+def _ids(query):
+    emails = local_cache.search_cached_emails(query)
+    return None if emails is None else [e["id"] for e in emails]
+
+
+def test_backfill_not_started_defers_everything(cache):
+    assert _ids("is:unread") is None
+    assert _ids("newer_than:2d") is None
+
+
+def test_partial_backfill_answers_only_what_it_covers(cache):
+    cache(10)
+    assert _ids("newer_than:5d") == ["new"]
+    assert _ids("after:2020/01/01") is None
+    assert _ids("newer_than:30d") is None
+    # No lower bound: everything ever, which the cache can't have yet
+    assert _ids("is:unread") is None
+
+
+def test_complete_backfill_answers_within_retention(cache):
+    cache(local_cache.email_retention_days())
+    assert _ids("is:unread") == ["new"]
+    assert _ids("newer_than:30d lunch") == ["new"]
+    assert _ids("newer_than:2y") is None
+    assert _ids("older_than:1y") is None
+
+
+def test_cc_goes_to_the_live_api():
+    # To and Cc share the recipients column, so cc:x would match mail sent to x
+    assert translate_query("cc:bob@example.com") is None
+    assert translate_query("-cc:bob@example.com") is None
@@ -0,0 +1,154 @@
+"""email_tools.sync_emails against a local fake Gmail (tests/fake_gmail.py)."""
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+
+from fake_gmail import FakeGmail
+from littlehive.agent import local_cache
+from littlehive.agent.db import get_connection
+from littlehive.tools import email_tools
+
+
+@pytest.fixture
+def gmail(monkeypatch):
+    local_cache.init_cache_db()
+    conn = get_connection()
+    conn.execute("DELETE FROM cached_emails")
+    conn.execute("DELETE FROM email_bodies")
+    conn.execute("DELETE FROM sync_state WHERE service IN ('gmail', 'gmail_backfill')")
+    conn.commit()
+    conn.close()
+    with FakeGmail() as fake:
+        service = fake.service()
+        monkeypatch.setattr(email_tools, "get_gmail_service", lambda: service)
+        yield fake
+
+
+def _cached():
+    conn = get_connection()
+    rows = conn.execute("SELECT id, is_read, labels FROM cached_emails").fetchall()
+    conn.close()
+    return {row[0]: (bool(row[1]), row[2].split()) for row in rows}
+
+
+def _stored_history_id():
+    return local_cache.get_sync_state("gmail")["last_history_id"]
+
+
+def test_first_sync_lists_in_full(gmail):
+    gmail.add_message("m1", subject="Invoice")
+    gmail.add_message("m2", labels=("INBOX",))
+    gmail.add_message("s1", labels=("SENT",))
+
+    result = email_tools.sync_emails()
+
+    assert result["mode"] == "full"
+    assert sorted(e["id"] for e in result["emails"]) == ["m1", "m2"]
+    assert _cached() == {"m1": (False, ["INBOX", "UNREAD"]), "m2": (True, ["INBOX"])}
+    assert _stored_history_id() == str(gmail.history_id)
+    # The unread message's body was prefetched in the same sync
+    assert local_cache.get_email_body("m1")["body"] == "Hi there"
+
+
+def test_incremental_sync_replays_history(gmail):
+    gmail.add_message("m1")
+    gmail.add_message("m2")
+    email_tools.sync_emails()
+    listed = gmail.calls("messages")
+    fetched = gmail.calls("messages/m1")
+
+    gmail.add_message("m3", subject="New")
+    gmail.add_message("d1", labels=("DRAFT",))
+    gmail.delete_message("m2")
+    result = email_tools.sync_emails()
+
+    assert result["mode"] == "incremental"
+    assert [e["id"] for e in result["emails"]] == ["m3"]
+    assert result["removed"] == ["m2"]
+    assert sorted(_cached()) == ["m1", "m3"]
+    assert _stored_history_id() == str(gmail.history_id)
+    # Only the new message was fetched; nothing was listed again
+    assert gmail.calls("messages") == listed
+    assert gmail.calls("messages/m1") == fetched
+    assert gmail.calls("messages/m3") == 2  # metadata, then the unread body
+    assert gmail.calls("history") == 1
+
+    # Nothing changed since: one history call and no fetches
+    result = email_tools.sync_emails()
+    assert result == {"emails": [], "removed": [], "mode": "incremental"}
+    assert gmail.calls("history") == 2
+
+
+def test_expired_history_id_falls_back_to_full_resync(gmail):
+    gmail.add_message("m1")
+    email_tools.sync_emails()
+
+    gmail.add_message("m2")
+    gmail.expire_history()
+    result = email_tools.sync_emails()
+
+    assert result["mode"] == "full"
+    assert sorted(e["id"] for e in result["emails"]) == ["m1", "m2"]
+    assert sorted(_cached()) == ["m1", "m2"]
+    assert _stored_history_id() == str(gmail.history_id)
+
+    # The new history ID works again
+    gmail.add_message("m3")
+    assert email_tools.sync_emails()["mode"] == "incremental"
+
+
+def test_label_changes_update_cached_messages(gmail):
+    for msg_id in ("m1", "m2", "m3", "m4"):
+        gmail.add_message(msg_id)
+    email_tools.sync_emails()
+    fetched = gmail.calls("messages/m1")
+
+    gmail.relabel("m1", remove=["UNREAD"])
+    gmail.relabel("m2", add=["STARRED", "IMPORTANT"])
+    gmail.relabel("m3", remove=["INBOX"])   # archived
+    gmail.relabel("m4", add=["TRASH"])
+    result = email_tools.sync_emails()
+
+    assert result["emails"] == []
+    assert result["removed"] == ["m3", "m4"]
+    cached = _cached()
+    assert cached == {
+        "m1": (True, ["INBOX"]),
+        "m2": (False, ["INBOX", "UNREAD", "STARRED", "IMPORTANT"]),
+    }
+    assert local_cache.cached_email_body_ids(["m2", "m3", "m4"]) == {"m2"}
+    # Applied from the history records alone, without refetching
+    assert gmail.calls("messages/m1") == fetched
+
+    # Marked unread again later
+    gmail.relabel("m1", add=["UNREAD"])
+    email_tools.sync_emails()
+    assert _cached()["m1"] == (False, ["INBOX", "UNREAD"])
+
+
+def test_archived_mail_is_never_cached(gmail):
+    gmail.add_message("m1")
+    gmail.add_message("a1", labels=("UNREAD", "CATEGORY_UPDATES"))   # filtered past the inbox
+    email_tools.sync_emails()
+    gmail.add_message("a2", labels=("UNREAD",))
+    email_tools.sync_emails()
+    email_tools.backfill_emails()
+
+    assert list(_cached()) == ["m1"]
+
+
+def test_mail_moved_into_the_inbox_is_fetched(gmail):
+    gmail.add_message("m1")
+    gmail.add_message("a1", labels=("UNREAD",))
+    email_tools.sync_emails()
+    gmail.relabel("m1", remove=["INBOX"])
+    email_tools.sync_emails()
+    assert _cached() == {}
+
+    gmail.relabel("m1", add=["INBOX"])   # unarchived
+    gmail.relabel("a1", add=["INBOX"])
+    result = email_tools.sync_emails()
+
+    assert sorted(e["id"] for e in result["emails"]) == ["a1", "m1"]
+    assert _cached() == {"m1": (False, ["UNREAD", "INBOX"]), "a1": (False, ["UNREAD", "INBOX"])}
@@ -0,0 +1,62 @@
+"""events_in_progress and busy_intervals must find events that started more than a day earlier."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from littlehive.agent import local_cache
+
+HOUR = 3600
+NOW = 1_800_000_000
+
+
+def _event(event_id, start_ts, end_ts):
+    return {
+        "id": event_id,
+        "summary": event_id,
+        "start": datetime.fromtimestamp(start_ts, timezone.utc).isoformat(),
+        "end": datetime.fromtimestamp(end_ts, timezone.utc).isoformat(),
+    }
+
+
+@pytest.fixture
+def events():
+    local_cache.init_cache_db()
+    local_cache.replace_cached_events([
+        _event("standup", NOW - HOUR, NOW + HOUR),
+        _event("conference", NOW - 50 * HOUR, NOW + 20 * HOUR),
+        _event("finished", NOW - 50 * HOUR, NOW - 40 * HOUR),
+        _event("later", NOW + 2 * HOUR, NOW + 3 * HOUR),
+    ])
+    yield
+    local_cache.replace_cached_events([])
+
+
+def test_in_progress_includes_events_longer_than_a_day(events):
+    assert [e["id"] for e in local_cache.events_in_progress(NOW)] == ["conference", "standup"]
+
+
+def test_busy_intervals_includes_events_longer_than_a_day(events):
+    assert local_cache.busy_intervals(NOW, NOW + 4 * HOUR) == [
+        (NOW - 50 * HOUR, NOW + 20 * HOUR),
+        (NOW - HOUR, NOW + HOUR),
+        (NOW + 2 * HOUR, NOW + 3 * HOUR),
+    ]
+    assert local_cache.busy_intervals(NOW - 45 * HOUR, NOW - 44 * HOUR) == [
+        (NOW - 50 * HOUR, NOW - 40 * HOUR),
+        (NOW - 50 * HOUR, NOW + 20 * HOUR),
+    ]
+
+
+def test_multi_day_all_day_event_in_progress():
+    local_cache.init_cache_db()
+    start = local_cache.to_epoch("2027-01-04")
+    local_cache.replace_cached_events([
+        {"id": "vacation", "summary": "Vacation", "start": "2027-01-04", "end": "2027-01-09"},
+    ])
+    try:
+        assert local_cache.events_in_progress(start + 72 * HOUR) == []
+        in_progress = local_cache.events_in_progress(start + 72 * HOUR, include_all_day=True)
+        assert [e["id"] for e in in_progress] == ["vacation"]
+    finally:
+        local_cache.replace_cached_events([])
@@ -0,0 +1,43 @@
+"""log_store.query_logs: filters, pagination and rejection of malformed parameters."""
+
+import logging
+
+import pytest
+
+from littlehive.agent import log_store
+from littlehive.agent.db import get_connection
+from littlehive.agent.paths import TELEMETRY_DB_PATH
+
+
+@pytest.fixture(scope="module")
+def logs():
+    conn = get_connection(path=TELEMETRY_DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    log_store.write_rows(cursor, [
+        (f"2020-01-0{day}T10:00:00", logging.getLevelName(level), "bench", f"entry {day}", "")
+        for day, level in ((1, logging.INFO), (2, logging.ERROR), (3, logging.INFO))
+    ])
+    conn.commit()
+    conn.close()
+
+
+def test_pages_through_matching_entries(logs):
+    first = log_store.query_logs(module="bench", level="info", limit=1)
+    assert [r["message"] for r in first["logs"]] == ["entry 3"]
+    second = log_store.query_logs(module="bench", level="info", limit="1", cursor=first["next_cursor"])
+    assert [r["message"] for r in second["logs"]] == ["entry 1"]
+    assert second["next_cursor"] is None
+
+
+@pytest.mark.parametrize("params", [
+    {"limit": "ten"},
+    {"since": "yesterday"},
+    {"until": "2020-13-01"},
+    {"cursor": "2020-01-02T10:00:00|x"},
+    {"cursor": "nonsense"},
+    {"cursor": "not a time|12"},
+])
+def test_malformed_parameters_raise_value_error(logs, params):
+    with pytest.raises(ValueError):
+        log_store.query_logs(**params)
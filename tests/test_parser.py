@@ -0,0 +1,106 @@
+"""
+parse_mistral_tool_calls against tests/data/parser_corpus.jsonl: real and
+fuzzed model outputs with the calls the previous parser returned ("old").
+The current parser must return exactly those unless the record says
+otherwise ("expected"): "recovered" records gain calls without losing any,
+"rejected" ones were cut off inside a call's arguments and must not return
+that call, "changed" ones are reviewed differences: the old parser dropped
+the comma of ",}" and ",]" inside strings, ran a call whose last number a
+marker cut short, and a marker injected mid-name or into string-encoded
+arguments is misread by both, differently. Regenerate the file with
+scripts/bench_parser.py --write.
+"""
+
+import json
+import os
+import re
+import time
+
+import pytest
+
+from littlehive.agent.parser import parse_mistral_tool_calls
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "parser_corpus.jsonl")
+
+with open(CORPUS_PATH, encoding="utf-8") as f:
+    CORPUS = [json.loads(line) for line in f]
+REAL = [record["text"] for record in CORPUS if record["kind"] == "real"]
+
+
+def test_corpus_covers_real_and_fuzzed_outputs():
+    kinds = {record["kind"] for record in CORPUS}
+    assert kinds == {"real", "fuzzed"}
+
+
+@pytest.mark.parametrize("record", CORPUS, ids=[f"{r['kind']}-{i}" for i, r in enumerate(CORPUS)])
+def test_matches_previous_parser(record):
+    calls = parse_mistral_tool_calls(record["text"])
+    if "expected" not in record:
+        assert calls == record["old"]
+        return
+    assert calls == record["expected"]
+    if record["change"] == "recovered":
+        assert all(call in calls for call in record["old"])
+    if record["change"] == "rejected":
+        started = record["text"].count("[ARGS]") + len(re.findall(r'"arguments"\s*:', record["text"]))
+        assert len(calls) < started
+
+
+@pytest.mark.parametrize("text", REAL, ids=[f"real-{i}" for i in range(len(REAL))])
+def test_cut_off_value_never_yields_a_call(text):
+    # Every prefix of a real output: a returned call may lack arguments the
+    # cut fell before, but every argument it has is the complete one
+    full = parse_mistral_tool_calls(text)
+    for cut in range(len(text)):
+        for call, whole in zip(parse_mistral_tool_calls(text[:cut]), full):
+            if call["name"] != whole["name"]:
+                # Name cut short: an unknown tool, never run
+                assert whole["name"].startswith(call["name"]) and call["arguments"] == {}
+                continue
+            for key, value in call["arguments"].items():
+                assert whole["arguments"][key] == value, (text[:cut], call)
+
+
+def test_cut_off_argument_rejects_the_call():
+    cut = [
+        '[TOOL_CALLS]create_event[ARGS]{"summary": "Sync", "attendees": ["x@y.com", "z@',
+        '[TOOL_CALLS]create_event[ARGS]{"summary": "Sync", "attendees": ["x@y.com", ',
+        '[TOOL_CALLS]send_email[ARGS]{"to": "a@b.com", "subject": "Hi", "body": "Dear',
+        '[TOOL_CALLS]delete_core_fact[ARGS]{"fact_id": 1',
+        '[TOOL_CALLS]send_email[ARGS]{"to": "a@b.com", "subject"',
+        '[TOOL_CALLS][{"name": "send_email", "arguments": {"to": "a@b.com", "body": "Dear',
+    ]
+    for text in cut:
+        assert parse_mistral_tool_calls(text) == [], text
+    # On a member boundary the complete members are kept
+    assert parse_mistral_tool_calls('[TOOL_CALLS]send_email[ARGS]{"to": "a@b.com", ') == [
+        {"name": "send_email", "arguments": {"to": "a@b.com"}}
+    ]
+    # A call list keeps the calls before the one that was cut
+    assert parse_mistral_tool_calls(
+        '[TOOL_CALLS][{"name": "get_tasks", "arguments": {}}, {"name": "send_email", "arguments": {"body": "De'
+    ) == [{"name": "get_tasks", "arguments": {}}]
+
+
+def _best_time(text, runs=5):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        parse_mistral_tool_calls(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.mark.parametrize("closed", [False, True], ids=["truncated", "closed"])
+def test_long_string_is_linear(closed):
+    # The previous parser needed over a minute for 200 KB; the scan is one
+    # pass, so 10x the input may cost about 10x the time, not 100x
+    def output(size):
+        body = "x" * size + ('"}' if closed else "")
+        return '[TOOL_CALLS]send_email[ARGS]{"to": "a@b.com", "body": "' + body
+
+    assert parse_mistral_tool_calls(output(200_000)) == (
+        [{"name": "send_email", "arguments": {"to": "a@b.com", "body": "x" * 200_000}}] if closed else []
+    )
+    small, large = _best_time(output(20_000)), _best_time(output(200_000))
+    assert large < 30 * small + 0.005, (small, large)
@@ -0,0 +1,50 @@
+"""The scheduler's per-poll queries must stay on the indexes migration 4 adds."""
+
+import pytest
+
+from littlehive.agent.db import get_connection
+from littlehive.agent.migrations import run_migrations
+
+HOT_QUERIES = [
+    (
+        "idx_reminders_due",
+        "SELECT * FROM reminders WHERE status = 'pending' AND datetime(next_notification) <= datetime(?)",
+        ("2026-01-01T00:00:00+00:00",),
+    ),
+    (
+        "idx_pending_tasks_due",
+        "SELECT id, tool_name, arguments, retry_count FROM pending_tasks "
+        "WHERE status IN ('queued', 'failed_retry') AND next_run_at <= ?",
+        ("2026-01-01 00:00:00",),
+    ),
+    (
+        "idx_bills_status_due",
+        "SELECT * FROM bills WHERE status = ? ORDER BY due_date ASC",
+        ("unpaid",),
+    ),
+    (
+        "idx_cached_tasks_updated",
+        "SELECT * FROM cached_tasks ORDER BY updated DESC",
+        (),
+    ),
+    (
+        "idx_anticipation_log_pattern",
+        "SELECT COUNT(*) FROM anticipation_log "
+        "WHERE pattern_id = ? AND suggested_at >= datetime('now', 'localtime', ?)",
+        (1, "-4 hours"),
+    ),
+]
+
+
+@pytest.fixture(scope="module")
+def conn():
+    run_migrations()
+    conn = get_connection()
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("index, sql, params", HOT_QUERIES, ids=[q[0] for q in HOT_QUERIES])
+def test_hot_query_uses_index(conn, index, sql, params):
+    plan = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+    assert any(index in step for step in plan), plan
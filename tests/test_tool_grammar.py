@@ -0,0 +1,191 @@
+import pytest
+
+from littlehive.agent import tool_grammar
+from littlehive.agent.tool_grammar import TokenVocabulary, ToolCallGrammar
+
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "set_reminder",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "task": {"type": "string"},
+                    "priority": {"type": "string", "enum": ["low", "critical"]},
+                    "minutes": {"type": "integer"},
+                },
+                "required": ["task"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "search",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string"},
+                    "limit": {"type": "number"},
+                    "tags": {"type": "array", "items": {"type": "string"}},
+                    "exact": {"type": "boolean"},
+                },
+            },
+        },
+    },
+]
+
+CALLS = [
+    'set_reminder[ARGS]{"task": "water the plants"}',
+    'set_reminder[ARGS]{"task":"call \\"Mum\\" \\u00e9","priority":"critical","minutes":-15}',
+    'search[ARGS]{}',
+    'search[ARGS]{"query": "rent", "limit": 2.5e-1, "tags": ["home", "bills"], "exact": false}',
+    'search[ARGS]{"tags": []}',
+]
+
+# Toy tokenizer vocabulary: whole markers, name pieces, JSON punctuation and
+# words. Id 0 is EOS; id 1 decodes to the empty string, as special tokens do.
+VOCAB = [
+    "</s>", "", "[TOOL_CALLS]", "[ARGS]", "[", "TOOL", "_CALLS", "]", "ARGS",
+    "set", "_", "reminder", "set_reminder", "search", "sea", "rch", "s",
+    "{", "}", "{\"", "\"}", "\"", "\":", ":", ",", ", ", " ", "\",", ", \"",
+    "task", "priority", "minutes", "query", "limit", "tags", "exact",
+    "low", "critical", "crit", "ical", "hello", " world", "\\", "\\n", "\\\"",
+    "true", "false", "null", "tr", "ue", "0", "1", "15", "-", ".", "5", "e",
+    "\n", "\t", "Sure", " here", "[]", "\"]", "[\"",
+]
+EOS = 0
+
+
+@pytest.fixture(scope="module")
+def grammar():
+    return ToolCallGrammar(TOOLS)
+
+
+@pytest.fixture(scope="module")
+def vocab():
+    return TokenVocabulary(VOCAB, [EOS])
+
+
+def _call_state(grammar, text):
+    return grammar.feed(grammar.initial(), "Let me check. [TOOL_CALLS]" + text)
+
+
+@pytest.mark.parametrize("call", CALLS)
+def test_valid_call_is_accepted_at_every_prefix(grammar, call):
+    state = _call_state(grammar, "")
+    assert state is not None and not grammar.is_free(state)
+    for i, ch in enumerate(call):
+        assert not grammar.accepts_eos(state), call[:i]
+        state = grammar.step(state, ch)
+        assert state is not None, call[: i + 1]
+    assert grammar.accepts_eos(state)
+
+
+def test_calls_can_be_chained(grammar):
+    state = _call_state(grammar, CALLS[0] + "[TOOL_CALLS]" + CALLS[2])
+    assert grammar.accepts_eos(state)
+
+
+def test_text_before_marker_is_free(grammar):
+    state = grammar.feed(grammar.initial(), 'anything {"at": all} [TOOL')
+    assert grammar.is_free(state)
+    assert grammar.accepts_eos(state)
+
+
+@pytest.mark.parametrize(
+    "call",
+    [
+        "remind",                                    # unknown tool
+        "set_reminder{",                             # [ARGS] missing
+        'search[ARGS]{"query": 3}',                  # wrong type
+        'search[ARGS]{"nope"',                       # unknown key
+        'set_reminder[ARGS]{"priority": "high"',     # outside the enum
+        'set_reminder[ARGS]{"task": "a", "task"',    # repeated key
+        'set_reminder[ARGS]{"minutes": 1.5',         # integer with a fraction
+        'set_reminder[ARGS]{"minutes": 01',          # leading zero
+        'search[ARGS]{"tags": ["a", 1',              # wrong item type
+        'search[ARGS]{"exact": fals"',               # broken literal
+        'search[ARGS]{"query": "a\\x"',              # bad escape
+        'search[ARGS]{"query": "a\nb"',              # raw control character
+        'search[ARGS]{}}',                           # trailing garbage
+        'search[ARGS]{} ',                           # text after the call
+    ],
+)
+def test_invalid_prefix_is_rejected(grammar, call):
+    assert _call_state(grammar, call) is None
+
+
+def test_required_key_blocks_close(grammar):
+    state = _call_state(grammar, "set_reminder[ARGS]{")
+    assert grammar.step(state, "}") is None
+    state = _call_state(grammar, 'set_reminder[ARGS]{"minutes": 5')
+    assert grammar.step(state, "}") is None
+
+
+def test_incomplete_call_does_not_accept_eos(grammar):
+    for prefix in ("", "search", "search[ARGS]", 'search[ARGS]{"query": "x"'):
+        assert not grammar.accepts_eos(_call_state(grammar, prefix))
+
+
+def _brute_force(grammar, state):
+    ids = {i for i, text in enumerate(VOCAB) if i != EOS and text and grammar.feed(state, text) is not None}
+    if grammar.accepts_eos(state):
+        ids.add(EOS)
+    return ids
+
+
+@pytest.mark.parametrize(
+    "prefix",
+    [
+        None,                                  # before [TOOL_CALLS]
+        "",
+        "se",
+        "set_reminder",
+        "set_reminder[ARGS]",
+        "set_reminder[ARGS]{",
+        'set_reminder[ARGS]{"',
+        'set_reminder[ARGS]{"task": "',        # free string
+        'set_reminder[ARGS]{"task": "hi\\',    # escape
+        'set_reminder[ARGS]{"task": "hi", "priority": "cr',
+        'set_reminder[ARGS]{"task": "hi", "minutes": 1',
+        'search[ARGS]{"tags": [',
+        'search[ARGS]{"exact": t',
+        'search[ARGS]{"limit": 0.',
+        "search[ARGS]{}",
+    ],
+)
+def test_allowed_matches_brute_force(grammar, vocab, prefix):
+    if prefix is None:
+        state = grammar.feed(grammar.initial(), "Sure")
+    else:
+        state = _call_state(grammar, prefix)
+    assert state is not None
+    allowed = vocab.allowed(grammar, state)
+    assert len(allowed) == len(set(allowed))
+    assert set(allowed) == _brute_force(grammar, state)
+
+
+def test_allowed_completes_a_call(grammar, vocab):
+    # Greedy walk over the toy vocabulary: the longest allowed token at each
+    # step must reach a complete call ending in EOS
+    state = _call_state(grammar, "search[ARGS]{\"tags\": [\"")
+    for _ in range(20):
+        allowed = vocab.allowed(grammar, state)
+        if EOS in allowed:
+            break
+        token = max(allowed, key=lambda i: (VOCAB[i] in ('"]', "}"), len(VOCAB[i])))
+        state = grammar.feed(state, VOCAB[token])
+    assert EOS in vocab.allowed(grammar, state)
+
+
+def test_grammar_cache_tracks_schema_changes():
+    first = tool_grammar._grammar_for(TOOLS)
+    assert tool_grammar._grammar_for([dict(t) for t in TOOLS]) is first
+
+    changed = [TOOLS[0], {"type": "function", "function": {**TOOLS[1]["function"], "parameters": {"type": "object"}}}]
+    second = tool_grammar._grammar_for(changed)
+    assert second is not first
+    assert _call_state(second, 'search[ARGS]{"anything": 1}') is not None
+    assert _call_state(first, 'search[ARGS]{"anything": 1}') is None